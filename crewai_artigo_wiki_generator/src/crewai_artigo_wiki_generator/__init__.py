@@ -1,5 +1,8 @@
 import sys
 import os
 
-# Adiciona o diretório src ao sys.path para que o Python consiga localizar o módulo
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
+# Os módulos do pacote se importam pelo nome simples (from crew import ...); para que os
+# scripts do pyproject.toml funcionem, a pasta do pacote precisa estar no sys.path
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+if _PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, _PACKAGE_DIR)
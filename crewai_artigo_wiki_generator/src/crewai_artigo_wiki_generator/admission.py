@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from metrics import ADMISSION_REJECTED, TOPIC_VALIDATION_SECONDS
+from tools.text_utils import clean_query
+
+DEFAULT_MAX_TOPIC_CHARS = 200
+DEFAULT_MAX_PER_CLIENT = 2
+
+
+class ClientBusyError(Exception):
+    """Raised when a client already has its maximum number of generations running"""
+
+
+def max_topic_chars() -> int:
+    try:
+        return max(2, int(os.environ.get("TOPIC_MAX_CHARS", DEFAULT_MAX_TOPIC_CHARS)))
+    except ValueError:
+        return DEFAULT_MAX_TOPIC_CHARS
+
+
+def _smallest_period(text: str) -> int:
+    """Length of the shortest unit whose repetition forms `text` (prefix function, O(n))"""
+    prefix = [0] * len(text)
+    for position in range(1, len(text)):
+        length = prefix[position - 1]
+        while length and text[position] != text[length]:
+            length = prefix[length - 1]
+        if text[position] == text[length]:
+            length += 1
+        prefix[position] = length
+    period = len(text) - prefix[-1]
+    return period if len(text) % period == 0 else len(text)
+
+
+def _longest_run(text: str) -> int:
+    """Longest sequence of one repeated character"""
+    longest, current, previous = 0, 0, None
+    for char in text:
+        current = current + 1 if char == previous else 1
+        previous = char
+        longest = max(longest, current)
+    return longest
+
+
+def validate_topic(topic: str) -> None:
+    """
+    Reject topics that cannot produce an article, in time linear in the topic length.
+
+    Raises ValueError (message shown to the user) for empty, too short or too long
+    topics, digits or punctuation only, a whole topic made of one unit repeated at
+    least three times ('awdawdawd'), four or more equal characters in a row, or too
+    little character variety. Acronyms ('ONU', 'NASA') are accepted.
+    """
+    if not topic or not isinstance(topic, str):
+        raise ValueError("Tópico não pode ser vazio ou não-string")
+
+    stripped_topic = topic.strip()
+    limit = max_topic_chars()
+    if len(stripped_topic) < 2:
+        raise ValueError("Tópico muito curto (mínimo 2 caracteres)")
+    if len(stripped_topic) > limit:
+        raise ValueError(f"Tópico muito longo (máximo {limit} caracteres)")
+    if stripped_topic.isdigit():
+        raise ValueError("Tópico não pode conter apenas números")
+    if not any(char.isalnum() for char in stripped_topic):
+        raise ValueError("Tópico não pode conter apenas caracteres especiais")
+
+    lowered = stripped_topic.lower()
+    if len(stripped_topic) > 5:  # Só aplica para tópicos maiores
+        if len(lowered) // _smallest_period(lowered) >= 3:
+            raise ValueError("Tópico contém padrões repetitivos sem sentido")
+        if _longest_run(lowered) >= 4:
+            raise ValueError("Tópico contém muitas repetições de caracteres")
+
+    # Siglas válidas (mais de 1 letra maiúscula, sem números) são aceitas
+    if stripped_topic.isupper() and stripped_topic.isalpha():
+        return
+
+    if len(set(lowered)) < 2 and len(stripped_topic) >= 5:
+        raise ValueError("Tópico contém pouca variação de caracteres")
+
+
+def admit_topic(raw_topic: str) -> str:
+    """
+    Normalize and validate a topic from a request before any crew is built.
+
+    The topic gets the same cleanup as the Wikipedia tool's queries (URL decoding,
+    special characters removed, single spaces). Returns the clean topic or raises
+    ValueError; the time spent and the rejections are recorded in the metrics.
+    """
+    started = time.perf_counter()
+    try:
+        # Bounds the work done on absurdly long inputs before cleaning them
+        topic = clean_query((raw_topic or "")[:max_topic_chars() * 4])
+        validate_topic(topic)
+        return topic
+    except ValueError:
+        ADMISSION_REJECTED.inc(reason="invalid_topic")
+        raise
+    finally:
+        TOPIC_VALIDATION_SECONDS.observe(time.perf_counter() - started)
+
+
+class ClientLimiter:
+    """
+    Per-client cap on concurrent generations (CLIENT_MAX_CONCURRENT, 0 = no limit).
+
+    A slot is held from admission until the generation finishes; requests beyond
+    the cap raise ClientBusyError right away instead of waiting.
+    """
+
+    def __init__(self, max_per_client: Optional[int] = None):
+        if max_per_client is None:
+            max_per_client = int(os.environ.get("CLIENT_MAX_CONCURRENT", DEFAULT_MAX_PER_CLIENT))
+        self.max_per_client = max_per_client
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str) -> None:
+        with self._lock:
+            active = self._active.get(client, 0)
+            if self.max_per_client and active >= self.max_per_client:
+                ADMISSION_REJECTED.inc(reason="client_concurrency")
+                raise ClientBusyError(f"Client {client} already has {active} generations running")
+            self._active[client] = active + 1
+
+    def release(self, client: str) -> None:
+        with self._lock:
+            active = self._active.get(client, 0) - 1
+            if active > 0:
+                self._active[client] = active
+            else:
+                self._active.pop(client, None)
+
+    @contextmanager
+    def slot(self, client: str):
+        """Hold one of the client's slots while the block runs"""
+        self.acquire(client)
+        try:
+            yield
+        finally:
+            self.release(client)
+
+    def active(self, client: str) -> int:
+        with self._lock:
+            return self._active.get(client, 0)
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import unquote
+
+from tools.wiki_cache import TwoTierCache, get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+CONFIG_FILES = ("agents.yaml", "tasks.yaml")
+# Environment variables that change what the LLM produces for the same prompt
+MODEL_SETTINGS_ENV = ("MODEL", "TEMPERATURE", "MAX_TOKENS", "OPENAI_API_BASE")
+# ...and the ones that change the research material the prompts are built from
+RESEARCH_SETTINGS_ENV = ("RESEARCH_MODE", "RESEARCH_RELATED_PAGES", "CONTEXT_TOKEN_BUDGET", "WIKI_BUNDLE_PAGES")
+ARTICLE_CACHE_TTL = float(os.environ.get("ARTICLE_CACHE_TTL", 7 * 24 * 3600))
+
+
+def normalize_topic(topic: str) -> str:
+    """Canonical form of a topic used as cache key (decoded, case-folded, single-spaced)"""
+    if '%' in topic:
+        topic = unquote(topic)
+    return re.sub(r'\s+', ' ', topic).strip().casefold()
+
+
+class ConfigFingerprint:
+    """
+    Hash of the prompt configuration, model settings and research settings.
+
+    Files are only re-hashed when their size or mtime changes, so checking the
+    fingerprint on every request costs a couple of `stat` calls.
+    """
+
+    def __init__(self, config_dir: str = CONFIG_DIR, files=CONFIG_FILES,
+                 env_keys=MODEL_SETTINGS_ENV + RESEARCH_SETTINGS_ENV):
+        self.config_dir = config_dir
+        self.files = files
+        self.env_keys = env_keys
+        self._stamp = None
+        self._file_digest = None
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        stamp = []
+        for name in self.files:
+            try:
+                st = os.stat(os.path.join(self.config_dir, name))
+                stamp.append((name, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append((name, None, None))
+        return tuple(stamp)
+
+    def value(self) -> str:
+        stamp = self._file_stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                digest = hashlib.sha256()
+                for name in self.files:
+                    path = os.path.join(self.config_dir, name)
+                    digest.update(name.encode("utf-8"))
+                    if os.path.exists(path):
+                        with open(path, "rb") as f:
+                            digest.update(f.read())
+                self._file_digest = digest.hexdigest()
+                self._stamp = stamp
+            file_digest = self._file_digest
+
+        settings = "|".join(f"{key}={os.environ.get(key, '')}" for key in self.env_keys)
+        return hashlib.sha256(f"{file_digest}|{settings}".encode("utf-8")).hexdigest()[:16]
+
+
+class ArticleCache:
+    """Validated `Artigo` payloads keyed by normalized topic and configuration fingerprint"""
+
+    def __init__(self, cache: Optional[TwoTierCache] = None, fingerprint: Optional[ConfigFingerprint] = None):
+        self._cache = cache
+        self.fingerprint = fingerprint or ConfigFingerprint()
+
+    @property
+    def cache(self) -> TwoTierCache:
+        if self._cache is None:
+            self._cache = get_shared_cache("articles", ttl=ARTICLE_CACHE_TTL)
+        return self._cache
+
+    def key(self, topic: str) -> str:
+        return f"{self.fingerprint.value()}:{normalize_topic(topic)}"
+
+    def get(self, topic: str) -> Optional[Dict[str, Any]]:
+        raw = self.cache.get(self.key(topic))
+        if raw is None:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding corrupt cached article for: {topic}")
+            return None
+
+    def set(self, topic: str, article: Dict[str, Any]) -> None:
+        self.cache.set(self.key(topic), json.dumps(article, ensure_ascii=False))
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
@@ -0,0 +1,350 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+DEFAULT_INPUT_DIR = os.path.join("artigos-gerados", "json")
+DEFAULT_OUTPUT_DIR = os.path.join("artigos-gerados", "edicao-final")
+MANIFEST_NAME = "_export_manifest.json"
+# Bump when a renderer's output changes, so every article is converted again
+RENDERER_VERSION = 1
+
+# Special paragraph titles and their ABNT section headings
+SECOES_ABNT = {
+    "resumo": "RESUMO",
+    "introdução": "1 INTRODUÇÃO",
+    "desenvolvimento": "2 DESENVOLVIMENTO",
+    "conclusão": "3 CONSIDERAÇÕES FINAIS",
+}
+
+
+def formatar_nome_autor(autor: str) -> str:
+    """Formata o nome do autor no padrão ABNT (SOBRENOME, Nome)"""
+    partes = autor.split()
+    if len(partes) > 1:
+        return f"{partes[-1].upper()}, {' '.join(partes[:-1])}"
+    return autor
+
+
+def formatar_referencia_abnt(ref: str) -> str:
+    """Formata referências no estilo ABNT básico"""
+    if "Acesso em" in ref:
+        return ref
+    if "http" in ref:
+        return f"Disponível em: <{ref}>. Acesso em: [data]."
+    return f"{ref}."
+
+
+def formatar_data(data_criacao: Optional[str]) -> str:
+    """ISO (2024-05-01T10:00:00) para o formato ABNT dia/mês/ano; vazio se inválida"""
+    if not data_criacao:
+        return ""
+    try:
+        return datetime.strptime(data_criacao.split("T")[0], "%Y-%m-%d").strftime("%d/%m/%Y")
+    except ValueError:
+        return ""
+
+
+def render_markdown(data: Dict[str, Any]) -> Iterator[str]:
+    """ABNT Markdown of an article, yielded piece by piece (same layout as the old temp_md_converter.py)"""
+    yield f'# {html.unescape(data.get("titulo", "Artigo")).upper()}\n\n'
+    yield f'**Autor:** {formatar_nome_autor(html.unescape(data.get("autor", "Artigo Multiagente IA")))}\n\n'
+    yield f'**Data:** {formatar_data(data.get("data_criacao"))}\n\n'
+    yield "---\n\n"
+
+    for paragrafo in data.get("paragrafos", []):
+        titulo = html.unescape(paragrafo.get("titulo", ""))
+        conteudo = html.unescape(paragrafo.get("conteudo", ""))
+        secao = SECOES_ABNT.get(titulo.lower())
+        if secao is None:
+            yield f"### {titulo}\n\n{conteudo}\n\n"
+            continue
+        yield f"## {secao}\n\n{conteudo}\n\n"
+        if titulo.lower() == "resumo":
+            yield "**Palavras-chave:** [adicione 3-5 palavras-chave separadas por vírgula].\n\n"
+            yield "---\n\n"
+
+    if data.get("referencias"):
+        yield "## REFERÊNCIAS\n\n"
+        for ref in data["referencias"]:
+            yield f"- {formatar_referencia_abnt(html.unescape(ref))}\n"
+
+    yield "\n\n---\n"
+
+
+def render_html(data: Dict[str, Any]) -> Iterator[str]:
+    """Standalone HTML page of an article with the same ABNT sections as the Markdown"""
+    def text(value: str) -> str:
+        return html.escape(html.unescape(value), quote=False)
+
+    titulo = html.unescape(data.get("titulo", "Artigo"))
+    yield '<!DOCTYPE html>\n<html lang="pt-BR">\n<head>\n<meta charset="utf-8">\n'
+    yield f"<title>{html.escape(titulo, quote=False)}</title>\n</head>\n<body>\n<article>\n"
+    yield f"<h1>{html.escape(titulo.upper(), quote=False)}</h1>\n"
+    yield f'<p><strong>Autor:</strong> {text(formatar_nome_autor(html.unescape(data.get("autor", "Artigo Multiagente IA"))))}</p>\n'
+    yield f'<p><strong>Data:</strong> {formatar_data(data.get("data_criacao"))}</p>\n<hr>\n'
+
+    for paragrafo in data.get("paragrafos", []):
+        titulo_paragrafo = html.unescape(paragrafo.get("titulo", ""))
+        secao = SECOES_ABNT.get(titulo_paragrafo.lower())
+        if secao is None:
+            yield f"<h3>{text(titulo_paragrafo)}</h3>\n"
+        else:
+            yield f"<h2>{secao}</h2>\n"
+        for bloco in html.unescape(paragrafo.get("conteudo", "")).split("\n\n"):
+            if bloco.strip():
+                yield f"<p>{html.escape(bloco.strip(), quote=False)}</p>\n"
+        if titulo_paragrafo.lower() == "resumo":
+            yield "<p><strong>Palavras-chave:</strong> [adicione 3-5 palavras-chave separadas por vírgula].</p>\n<hr>\n"
+
+    if data.get("referencias"):
+        yield "<h2>REFERÊNCIAS</h2>\n<ul>\n"
+        for ref in data["referencias"]:
+            yield f"<li>{text(formatar_referencia_abnt(html.unescape(ref)))}</li>\n"
+        yield "</ul>\n"
+
+    yield "</article>\n</body>\n</html>\n"
+
+
+# Format name -> (output file suffix, renderer)
+RENDERERS: Dict[str, tuple] = {
+    "md": ("_ABNT.md", render_markdown),
+    "html": (".html", render_html),
+}
+
+
+def output_path(source: str, output_dir: str, fmt: str) -> str:
+    """Output file of `source` in one format: <output_dir>/<source name><suffix>"""
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(output_dir, stem + RENDERERS[fmt][0])
+
+
+def write_chunks_atomic(path: str, chunks: Iterable[str]) -> None:
+    """Write the rendered pieces to a temporary file and rename it over `path`"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(chunks)
+    os.replace(tmp_path, path)
+
+
+def convert_file(source: str, output_dir: str, formats: Sequence[str]) -> Dict[str, Any]:
+    """Worker entry point: render one article JSON in every format, straight to disk"""
+    started = time.perf_counter()
+    record: Dict[str, Any] = {"source": source, "outputs": {}}
+    try:
+        with open(source, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("o arquivo não contém um objeto JSON")
+        for fmt in formats:
+            path = output_path(source, output_dir, fmt)
+            write_chunks_atomic(path, RENDERERS[fmt][1](data))
+            record["outputs"][fmt] = path
+        record["ok"] = True
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        record.update(ok=False, error=str(e))
+    record["seconds"] = time.perf_counter() - started
+    return record
+
+
+def file_digest(path: str) -> tuple:
+    """SHA-256 of the file contents and its size in bytes"""
+    with open(path, "rb") as f:
+        content = f.read()
+    return hashlib.sha256(content).hexdigest(), len(content)
+
+
+def list_sources(inputs: Sequence[str]) -> List[str]:
+    """Article JSON files from files and directories (files starting with '_', like logs, are ignored)"""
+    sources = []
+    for item in inputs:
+        if os.path.isdir(item):
+            sources.extend(
+                os.path.join(item, name) for name in sorted(os.listdir(item))
+                if name.endswith(".json") and not name.startswith("_")
+            )
+        else:
+            sources.append(item)
+    return sources
+
+
+_manifest_lock = threading.Lock()
+
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    """Manifest of converted articles; empty (everything converts) if missing, unreadable or outdated"""
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": RENDERER_VERSION, "files": {}}
+    if manifest.get("version") != RENDERER_VERSION:
+        return {"version": RENDERER_VERSION, "files": {}}
+    return manifest
+
+
+def _manifest_key(source: str, output_dir: str) -> str:
+    # Relative to the output directory, so the key does not depend on the working directory
+    return os.path.relpath(os.path.abspath(source), os.path.abspath(output_dir))
+
+
+def _is_current(entry: Optional[Dict[str, Any]], digest: str, source: str, output_dir: str,
+                formats: Sequence[str]) -> bool:
+    if not entry or entry.get("sha256") != digest:
+        return False
+    return all(
+        fmt in entry.get("formats", []) and os.path.exists(output_path(source, output_dir, fmt)) for fmt in formats
+    )
+
+
+def summarize(records: List[Dict[str, Any]], wall_time: float, unchanged: int, input_bytes: int) -> Dict[str, Any]:
+    """Counts and conversion throughput of one export run"""
+    converted = [r for r in records if r["ok"]]
+    return {
+        "files": len(records) + unchanged,
+        "converted": len(converted),
+        "unchanged": unchanged,
+        "failed": len(records) - len(converted),
+        "converted_bytes": input_bytes,
+        "wall_time": round(wall_time, 4),
+        "articles_per_second": round(len(converted) / wall_time, 1) if wall_time > 0 else 0.0,
+        "mb_per_second": round(input_bytes / 1e6 / wall_time, 2) if wall_time > 0 else 0.0,
+        "errors": {r["source"]: r["error"] for r in records if not r["ok"]},
+    }
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print()
+    print(f"Convertidos: {summary['converted']}  |  Sem alteração: {summary['unchanged']}  |  "
+          f"Falhas: {summary['failed']}")
+    print(f"Tempo total: {summary['wall_time']}s  |  Throughput: {summary['articles_per_second']} artigos/s "
+          f"({summary['mb_per_second']} MB/s)")
+    for source, error in summary["errors"].items():
+        print(f"[falha] {source}: {error}")
+
+
+def run_export(inputs: Sequence[str] = (DEFAULT_INPUT_DIR,), output_dir: str = DEFAULT_OUTPUT_DIR,
+               formats: Sequence[str] = tuple(RENDERERS), workers: Optional[int] = None,
+               force: bool = False, converter: Callable[..., Dict[str, Any]] = convert_file) -> Dict[str, Any]:
+    """
+    Convert article JSON files (or whole directories) to the requested formats.
+
+    Each article's content hash is compared with `_export_manifest.json` in
+    `output_dir`; unchanged articles whose outputs still exist are skipped. The rest
+    are rendered on a process pool (`workers`, default: one per core) and the
+    manifest is updated with every successful conversion.
+    """
+    unknown = [fmt for fmt in formats if fmt not in RENDERERS]
+    if unknown:
+        raise ValueError(f"Formato de exportação desconhecido: {', '.join(unknown)} (use {', '.join(RENDERERS)})")
+    os.makedirs(output_dir, exist_ok=True)
+    started = time.perf_counter()
+
+    manifest = load_manifest(output_dir)
+    pending, digests, unchanged, input_bytes = [], {}, 0, 0
+    for source in list_sources(inputs):
+        try:
+            digest, size = file_digest(source)
+        except OSError:
+            pending.append(source)  # The converter reports the error
+            continue
+        digests[source] = digest
+        entry = manifest["files"].get(_manifest_key(source, output_dir))
+        if not force and _is_current(entry, digest, source, output_dir, formats):
+            unchanged += 1
+        else:
+            pending.append(source)
+            input_bytes += size
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1 or len(pending) < 2:
+        records = [converter(source, output_dir, formats) for source in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            # Articles are small: batching them amortizes the inter-process round trips
+            chunksize = max(1, len(pending) // (workers * 4))
+            records = list(executor.map(
+                converter, pending, [output_dir] * len(pending), [formats] * len(pending), chunksize=chunksize,
+            ))
+
+    with _manifest_lock:
+        manifest = load_manifest(output_dir)  # Another run may have updated it meanwhile
+        for record in records:
+            key = _manifest_key(record["source"], output_dir)
+            if not record["ok"] or record["source"] not in digests:
+                manifest["files"].pop(key, None)
+                continue
+            digest = digests[record["source"]]
+            previous = manifest["files"].get(key) or {}
+            # Formats converted earlier from the same content are still current
+            kept = previous.get("formats", []) if previous.get("sha256") == digest else []
+            manifest["files"][key] = {"sha256": digest, "formats": sorted(set(kept) | set(record["outputs"]))}
+        write_chunks_atomic(
+            os.path.join(output_dir, MANIFEST_NAME), [json.dumps(manifest, ensure_ascii=False, indent=2)],
+        )
+
+    return summarize(records, time.perf_counter() - started, unchanged, input_bytes)
+
+
+def export_generated_article(topic: str, article: Dict[str, Any],
+                             export_dir: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """
+    API post-step: save a newly generated article under `export_dir` (else EXPORT_DIR)
+    and convert it. The JSON goes to `<export_dir>/json` with the batch file naming and
+    the formats in EXPORT_FORMATS (default: all) to `<export_dir>/edicao-final`.
+    Returns the output paths per format, or None when exporting is disabled.
+    """
+    from batch import article_filename, write_json_atomic
+
+    export_dir = export_dir or os.environ.get("EXPORT_DIR")
+    if not export_dir:
+        return None
+    formats = [fmt.strip() for fmt in os.environ.get("EXPORT_FORMATS", ",".join(RENDERERS)).split(",") if fmt.strip()]
+
+    json_dir = os.path.join(export_dir, "json")
+    os.makedirs(json_dir, exist_ok=True)
+    source = os.path.join(json_dir, article_filename(topic))
+    write_json_atomic(source, article)
+
+    output_dir = os.path.join(export_dir, "edicao-final")
+    summary = run_export([source], output_dir=output_dir, formats=formats, workers=1)
+    if summary["failed"]:
+        raise ValueError(summary["errors"][source])
+    return {fmt: output_path(source, output_dir, fmt) for fmt in formats}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Converte artigos JSON para Markdown ABNT e HTML")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_INPUT_DIR],
+                        help=f"arquivos JSON ou diretórios (padrão: {DEFAULT_INPUT_DIR})")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"diretório de saída (padrão: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("-f", "--formats", default=",".join(RENDERERS),
+                        help=f"formatos separados por vírgula (padrão: {','.join(RENDERERS)})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="número de processos (padrão: um por núcleo)")
+    parser.add_argument("--force", action="store_true", help="converte novamente artigos sem alteração")
+    parser.add_argument("--summary-json", help="grava o resumo final neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    try:
+        summary = run_export(args.inputs, output_dir=args.output_dir, formats=formats,
+                             workers=args.workers, force=args.force)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+    print_summary(summary)
+    if args.summary_json:
+        write_chunks_atomic(args.summary_json, [json.dumps(summary, ensure_ascii=False, indent=2)])
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+import ast
+import logging
+import os
+import re
+import threading
+from json.decoder import scanstring
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+from llm_cache import WrappedLLM
+from metrics import REVIEW_OUTPUT_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# Text tolerated before the JSON object ("Thought: ...\nFinal Answer: ", ```json fences)
+MAX_PREAMBLE = 2000
+DEFAULT_PARAGRAPH_TITLE = "Parágrafo"
+
+# Allowed value types per path of the `Artigo` object ("*" = any list item).
+# Paths not listed (unknown fields) are accepted as they come.
+EXPECTED_TYPES = {
+    ("titulo",): (str,),
+    ("topico",): (str,),
+    ("data_criacao",): (str, type(None)),
+    ("autor",): (str,),
+    ("paragrafos",): (list,),
+    ("paragrafos", "*"): (dict, str),
+    ("paragrafos", "*", "titulo"): (str,),
+    ("paragrafos", "*", "conteudo"): (str,),
+    ("referencias",): (list,),
+    ("referencias", "*"): (str,),
+}
+BARE_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+_WHITESPACE = re.compile(r"[ \t\r\n]+")
+_BARE = re.compile(r"[A-Za-z0-9_.+\-]+")
+_PUNCTUATION = frozenset(" \t\r\n{}[]\"',:")
+# String contents up to the closing quote, escaped characters included
+_STRING_BODY = {
+    '"': re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.S),
+    "'": re.compile(r"[^'\\]*(?:\\.[^'\\]*)*", re.S),
+}
+
+
+class HopelessOutputError(ValueError):
+    """The output cannot become an `Artigo`, whatever follows it"""
+
+
+class _Frame:
+    __slots__ = ("container", "path", "key")
+
+    def __init__(self, container: Union[dict, list], path: tuple):
+        self.container = container
+        self.path = path
+        self.key: Optional[str] = None
+
+
+class ArticleParser:
+    """
+    Single-pass, incremental extractor of the article object from the reviewer's text.
+
+    `feed` accepts the output in chunks of any size (e.g. as the model streams it)
+    and scans every character once: the preamble before the first `{` is skipped,
+    string contents are copied in bulk between quotes and each value is type-checked
+    against the `Artigo`/`Paragrafo` fields as soon as it starts. Paragraphs given as
+    plain strings get the default title. JSON and Python literal syntax are both
+    accepted (single quotes, True/None, trailing commas); anything after the closing
+    brace (``` fences, notes) is ignored.
+
+    Raises `HopelessOutputError` as soon as the text cannot produce an article: too
+    much preamble, a structural error or a field of the wrong type.
+    """
+
+    def __init__(self, max_preamble: int = MAX_PREAMBLE):
+        self.max_preamble = max_preamble
+        self.preamble = 0
+        self.chars = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[HopelessOutputError] = None
+        self._stack: List[_Frame] = []
+        self._quote: Optional[str] = None
+        self._escape = False
+        self._raw: List[str] = []
+        self._bare: List[str] = []
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def _fail(self, message: str) -> None:
+        self.error = HopelessOutputError(f"Saída do revisor inválida (até {self.chars} caracteres): {message}")
+        raise self.error
+
+    def _value_path(self) -> Optional[tuple]:
+        """Path of the value starting now, or None when a dict key is expected"""
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            return frame.path + ("*",)
+        if frame.key is None:
+            return None
+        return frame.path + (frame.key,)
+
+    def _check(self, path: tuple, kind: type) -> None:
+        expected = EXPECTED_TYPES.get(path)
+        if expected is not None and kind not in expected:
+            self._fail(f"'{'.'.join(path)}' deveria ser {' ou '.join(t.__name__ for t in expected)}, não {kind.__name__}")
+
+    def _open(self, container: Union[dict, list]) -> None:
+        if not self._stack:
+            self._stack.append(_Frame(container, ()))
+            return
+        path = self._value_path()
+        if path is None:
+            self._fail("chave esperada")
+        self._check(path, type(container))
+        self._stack.append(_Frame(container, path))
+
+    def _close(self, kind: type) -> None:
+        if not self._stack or not isinstance(self._stack[-1].container, kind):
+            self._fail("fechamento inesperado")
+        frame = self._stack.pop()
+        value = frame.container
+        if frame.path == ("paragrafos", "*"):
+            value = self._paragraph(value)
+        self._emit(value)
+
+    def _paragraph(self, value: Any) -> Dict[str, str]:
+        if isinstance(value, str):
+            return {"titulo": DEFAULT_PARAGRAPH_TITLE, "conteudo": value}
+        if "conteudo" not in value:
+            self._fail("parágrafo sem 'conteudo'")
+        return {"titulo": value.get("titulo", DEFAULT_PARAGRAPH_TITLE), "conteudo": value["conteudo"]}
+
+    def _emit(self, value: Any) -> None:
+        if not self._stack:
+            if not isinstance(value, dict):
+                self._fail("o artigo deve ser um objeto")
+            self.result = value
+            return
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            if frame.path == ("paragrafos",) and isinstance(value, str):
+                value = self._paragraph(value)
+            frame.container.append(value)
+        elif frame.key is None:
+            if not isinstance(value, str):
+                self._fail("chave esperada")
+            frame.key = value
+        else:
+            frame.container[frame.key] = value
+            frame.key = None
+
+    def _scalar(self, value: Any) -> None:
+        path = self._value_path()
+        if path is not None:
+            self._check(path, type(value))
+        self._emit(value)
+
+    def _flush_bare(self) -> None:
+        if not self._bare:
+            return
+        token = "".join(self._bare)
+        self._bare = []
+        if token in BARE_LITERALS:
+            value = BARE_LITERALS[token]
+        else:
+            try:
+                value = int(token)
+            except ValueError:
+                try:
+                    value = float(token)
+                except ValueError:
+                    self._fail(f"valor inválido '{token[:20]}'")
+        self._scalar(value)
+
+    def _end_string(self) -> None:
+        raw = "".join(self._raw)
+        self._raw = []
+        quote, self._quote = self._quote, None
+        try:
+            if "\\" not in raw:
+                value = raw
+            elif quote == '"':
+                value = scanstring(raw + '"', 0, False)[0]
+            else:
+                value = ast.literal_eval("'" + raw.replace("\n", "\\n") + "'")
+        except (ValueError, SyntaxError):
+            self._fail("texto com escape inválido")
+        self._emit(value)  # Type already checked when the string opened
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """Consume the next piece of output; returns the article dict once it is complete"""
+        if self.error is not None:
+            raise self.error
+        self.chars += len(chunk)
+        position, end = 0, len(chunk)
+        while position < end and self.result is None:
+            if self._quote is not None:
+                if self._escape:
+                    self._raw.append(chunk[position])
+                    self._escape = False
+                    position += 1
+                    continue
+                body = _STRING_BODY[self._quote].match(chunk, position)
+                self._raw.append(body.group())
+                position = body.end()
+                if position == end:
+                    continue
+                if chunk[position] == "\\":  # Escape split across chunks
+                    self._raw.append("\\")
+                    self._escape = True
+                else:
+                    self._end_string()
+                position += 1
+                continue
+
+            if not self._stack:
+                start = chunk.find("{", position)
+                self.preamble += (end if start < 0 else start) - position
+                if self.preamble > self.max_preamble:
+                    self._fail("nenhum objeto JSON no início da resposta")
+                if start < 0:
+                    return None
+                position = start
+
+            char = chunk[position]
+            if char not in _PUNCTUATION:
+                bare = _BARE.match(chunk, position)
+                if bare is not None:
+                    self._bare.append(bare.group())
+                    position = bare.end()
+                    continue
+            if self._bare:
+                self._flush_bare()
+            if char in " \t\r\n":
+                position = _WHITESPACE.match(chunk, position).end()
+            elif char == "{":
+                self._open({})
+                position += 1
+            elif char == "[":
+                self._open([])
+                position += 1
+            elif char == "}":
+                self._close(dict)
+                position += 1
+            elif char == "]":
+                self._close(list)
+                position += 1
+            elif char in "\"'":
+                path = self._value_path()
+                if path is not None:
+                    self._check(path, str)
+                self._quote = char
+                position += 1
+            elif char in ",:":
+                position += 1
+            else:
+                self._fail(f"caractere inesperado {char!r}")
+        return self.result
+
+    def close(self) -> Dict[str, Any]:
+        """End of the output: the complete article dict, or ValueError if it never closed"""
+        if self.result is None:
+            if self.error is not None:
+                raise self.error
+            raise ValueError("Saída do revisor incompleta: objeto JSON não foi fechado")
+        return self.result
+
+
+def parse_article(text: str) -> Dict[str, Any]:
+    """Extract the article dict from a complete output in one pass (see `ArticleParser`)"""
+    parser = ArticleParser()
+    parser.feed(text)
+    return parser.close()
+
+
+_active = threading.local()
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_stream_chunk(source: Any, event: LLMStreamChunkEvent) -> None:
+    # Chunks are emitted in the thread that made the call; only the guarded call parses them
+    parser = getattr(_active, "parser", None)
+    if parser is not None and parser.error is None:
+        parser.feed(event.chunk)
+
+
+class ArticleOutputGuard(WrappedLLM):
+    """
+    Reviewer LLM that checks the article while it is being written.
+
+    With a streaming model every chunk goes through an `ArticleParser`; when the
+    output turns out to be hopeless the stream is interrupted right there (CrewAI
+    stops reading the response) and the call raises `HopelessOutputError`, so the
+    agent retries instead of paying for the rest of the response. Without streaming
+    the same check runs on the complete text. Rejections are counted in
+    `review_output_rejected_total{phase}`.
+    """
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        parser = ArticleParser()
+        previous = getattr(_active, "parser", None)
+        _active.parser = parser
+        try:
+            completion = super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        finally:
+            _active.parser = previous
+
+        phase = "stream" if parser.chars else "complete"
+        if parser.error is None and not parser.chars and isinstance(completion, str):
+            try:
+                parser.feed(completion)
+            except HopelessOutputError:
+                pass
+        if parser.error is not None:
+            REVIEW_OUTPUT_REJECTED.inc(phase=phase)
+            logger.warning(f"Reviewer output rejected ({phase}): {parser.error}")
+            raise parser.error
+        return completion
+
+
+def article_output_guard(llm: Optional[BaseLLM] = None) -> ArticleOutputGuard:
+    """
+    The reviewer's LLM behind `ArticleOutputGuard`. None resolves to the model
+    configured in the environment (MODEL), streamed unless REVIEW_STREAM=0 so the
+    output can be checked as it arrives.
+    """
+    if llm is None:
+        from crewai.utilities.llm_utils import create_llm
+        llm = create_llm(None)
+        llm.stream = os.environ.get("REVIEW_STREAM", "1").strip().lower() not in ("0", "false", "no")
+    return ArticleOutputGuard(llm)
@@ -0,0 +1,340 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from article_cache import normalize_topic
+from article_export import SECOES_ABNT
+from article_parser import parse_article
+from models.article_model import Artigo
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "crewai_artigo_wiki_generator", "articles.sqlite3"
+)
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# ABNT section heading -> paragraph title, to read back the exported Markdown
+PARAGRAFOS_ABNT = {secao: titulo.capitalize() for titulo, secao in SECOES_ABNT.items()}
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def fts_query(text: str) -> str:
+    """User text as an FTS5 query: every word must match (quoted, so operators are literal)"""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words)
+
+
+class ArticleStore:
+    """
+    Embedded SQLite store of validated articles with full-text search.
+
+    - articles: one row per article (keyed by its case-folded title), with the topic,
+      the full `Artigo` JSON and created/updated timestamps
+    - articles_fts: FTS5 index (accents ignored) over title, topic, paragraphs and references
+
+    Listing uses keyset pagination on (updated_at, id), so every page is one index
+    range scan whatever the corpus size; search pages by rank. Saving an article
+    with a title already stored replaces it and keeps its creation time.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, title_key TEXT NOT NULL UNIQUE, topic_key TEXT NOT NULL, "
+            "titulo TEXT NOT NULL, topico TEXT NOT NULL, autor TEXT, data_criacao TEXT, "
+            "body TEXT NOT NULL, source TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS articles_updated ON articles (updated_at, id);"
+            "CREATE INDEX IF NOT EXISTS articles_topic ON articles (topic_key, updated_at, id);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+            "titulo, topico, conteudo, referencias, tokenize = 'unicode61 remove_diacritics 2');"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Per-thread SQLite connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, article: Dict[str, Any], source: Optional[str] = None,
+             timestamp: Optional[float] = None) -> int:
+        """
+        Validate and store an article (insert or replace by title); returns its id.
+        `timestamp` is when it was written (default: now), e.g. the mtime of an imported file.
+        """
+        artigo = Artigo(**article)
+        now = timestamp or time.time()
+        title_key = normalize_topic(artigo.titulo)
+        conteudo = "\n\n".join(f"{p.titulo}\n{p.conteudo}" for p in artigo.paragrafos)
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT id, created_at FROM articles WHERE title_key = ?", (title_key,)).fetchone()
+            values = (
+                normalize_topic(artigo.topico), artigo.titulo, artigo.topico, artigo.autor, artigo.data_criacao,
+                artigo.model_dump_json(), source,
+            )
+            if row is None:
+                article_id = conn.execute(
+                    "INSERT INTO articles (topic_key, titulo, topico, autor, data_criacao, body, source, "
+                    "title_key, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    values + (title_key, now, now),
+                ).lastrowid
+            else:
+                article_id = row[0]
+                conn.execute(
+                    "UPDATE articles SET topic_key = ?, titulo = ?, topico = ?, autor = ?, data_criacao = ?, "
+                    "body = ?, source = ?, created_at = ?, updated_at = ? WHERE id = ?",
+                    values + (min(row[1], now), now, article_id),
+                )
+                conn.execute("DELETE FROM articles_fts WHERE rowid = ?", (article_id,))
+            conn.execute(
+                "INSERT INTO articles_fts (rowid, titulo, topico, conteudo, referencias) VALUES (?, ?, ?, ?, ?)",
+                (article_id, artigo.titulo, artigo.topico, conteudo, "\n".join(artigo.referencias)),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return article_id
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row[0], "titulo": row[1], "topico": row[2], "autor": row[3], "data_criacao": row[4],
+            "created_at": _iso(row[5]), "updated_at": _iso(row[6]),
+        }
+
+    def get(self, article_id: int) -> Optional[Dict[str, Any]]:
+        """Full article plus its store id and timestamps, or None"""
+        row = self._connect().execute(
+            "SELECT body, id, created_at, updated_at FROM articles WHERE id = ?", (article_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        article = json.loads(row[0])
+        article.update(id=row[1], created_at=_iso(row[2]), updated_at=_iso(row[3]))
+        return article
+
+    def list(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+             topic: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Most recently updated first. `cursor` is the `next_cursor` of the previous page
+        (ValueError if malformed); `topic` restricts to one normalized topic.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        where, params = [], []
+        if topic:
+            where.append("topic_key = ?")
+            params.append(normalize_topic(topic))
+        if cursor:
+            try:
+                updated_at, article_id = cursor.split("_", 1)
+                params.extend((float(updated_at), int(article_id)))
+            except ValueError:
+                raise ValueError(f"Cursor inválido: '{cursor}'")
+            where.append("(updated_at, id) < (?, ?)")
+
+        rows = self._connect().execute(
+            "SELECT id, titulo, topico, autor, data_criacao, created_at, updated_at FROM articles"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY updated_at DESC, id DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        page = rows[:limit]
+        next_cursor = f"{page[-1][6]!r}_{page[-1][0]}" if len(rows) > limit else None
+        return {"articles": [self._summary(row) for row in page], "next_cursor": next_cursor}
+
+    def search(self, query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Full-text search ranked by BM25, with a highlighted snippet of the paragraphs.
+        `cursor` is the `next_cursor` of the previous page (ValueError if malformed).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        try:
+            offset = int(cursor or 0)
+        except ValueError:
+            raise ValueError(f"Cursor inválido: '{cursor}'")
+        match = fts_query(query)
+        if not match:
+            return {"articles": [], "next_cursor": None}
+
+        rows = self._connect().execute(
+            "SELECT a.id, a.titulo, a.topico, a.autor, a.data_criacao, a.created_at, a.updated_at, "
+            "snippet(articles_fts, 2, '[', ']', '…', 16) FROM articles_fts "
+            "JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+            (match, limit + 1, max(0, offset)),
+        ).fetchall()
+        articles = []
+        for row in rows[:limit]:
+            summary = self._summary(row)
+            summary["trecho"] = row[7]
+            articles.append(summary)
+        return {"articles": articles, "next_cursor": str(offset + limit) if len(rows) > limit else None}
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+_shared_stores: Dict[str, ArticleStore] = {}
+_shared_lock = threading.Lock()
+
+
+def get_article_store(path: Optional[str] = None) -> ArticleStore:
+    """Process-wide store at `path` (else ARTICLE_STORE_PATH, else the default under ~/.cache)"""
+    path = path or os.environ.get("ARTICLE_STORE_PATH") or DEFAULT_STORE_PATH
+    with _shared_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = ArticleStore(path)
+            _shared_stores[path] = store
+        return store
+
+
+def _restore_case(heading: str, filename_title: str) -> str:
+    """
+    Original title from the uppercased ABNT heading and the file name, which keeps the
+    case but lost the punctuation: ('SAÚDE: DO X', 'Saúde Do X') -> 'Saúde: Do X'
+    """
+    restored, position = [], 0
+    for char in heading:
+        if position < len(filename_title) and filename_title[position].upper() == char.upper():
+            restored.append(filename_title[position])
+            position += 1
+        elif char.isalnum():
+            return heading  # The file was renamed: keep the heading as it is
+        else:
+            restored.append(char)
+    return "".join(restored)
+
+
+def parse_abnt_markdown(text: str, filename_title: str = "") -> Optional[Dict[str, Any]]:
+    """Article dict from the ABNT Markdown written by article_export.py, or None if it is not one"""
+    lines = text.splitlines()
+    if not lines or not lines[0].startswith("# "):
+        return None
+
+    article: Dict[str, Any] = {"paragrafos": [], "referencias": []}
+    article["titulo"] = _restore_case(lines[0][2:].strip(), filename_title)
+    article["topico"] = article["titulo"]
+    current: Optional[Dict[str, Any]] = None
+    in_references = False
+    for line in lines[1:]:
+        stripped = line.strip()
+        if stripped.startswith("**Autor:**"):
+            autor = stripped[len("**Autor:**"):].strip()
+            # Undo formatar_nome_autor: 'SOBRENOME, Nome' -> 'Nome SOBRENOME'
+            article["autor"] = " ".join(reversed(autor.split(", ", 1))) if ", " in autor else autor
+        elif stripped.startswith("**Data:**"):
+            try:
+                data = datetime.strptime(stripped[len("**Data:**"):].strip(), "%d/%m/%Y")
+                article["data_criacao"] = data.strftime("%Y-%m-%dT00:00:00")
+            except ValueError:
+                pass
+        elif stripped == "## REFERÊNCIAS":
+            in_references, current = True, None
+        elif stripped.startswith("## ") or stripped.startswith("### "):
+            heading = stripped.split(" ", 1)[1].strip()
+            current = {"titulo": PARAGRAFOS_ABNT.get(heading, heading), "conteudo": ""}
+            article["paragrafos"].append(current)
+        elif in_references and stripped.startswith("- "):
+            ref = stripped[2:].strip()
+            link = re.fullmatch(r"Disponível em: <(.+)>\. Acesso em: \[data\]\.", ref)
+            article["referencias"].append(link.group(1) if link else ref[:-1] if ref.endswith(".") else ref)
+        elif current is not None and stripped and stripped != "---" and not stripped.startswith("**Palavras-chave:**"):
+            current["conteudo"] = f"{current['conteudo']}\n\n{stripped}" if current["conteudo"] else stripped
+
+    return article if article["paragrafos"] else None
+
+
+def read_article_file(path: str) -> Optional[Dict[str, Any]]:
+    """Article dict from a JSON file or a Markdown file (JSON inside or ABNT layout); None if neither"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("{"):
+        return parse_article(text)
+    if path.endswith(".md"):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return parse_abnt_markdown(text, stem[:-len("_ABNT")] if stem.endswith("_ABNT") else stem)
+    return None
+
+
+def iter_article_files(paths: Sequence[str]) -> Iterator[str]:
+    """
+    .json and .md files under `paths`, Markdown first: JSON holds the complete article,
+    so it is stored last and replaces the Markdown rendering of the same title.
+    """
+    files = []
+    for item in paths:
+        if os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, name) for name in names)
+        else:
+            files.append(item)
+    selected = [path for path in files if path.endswith((".json", ".md"))
+                and not os.path.basename(path).startswith("_")]
+    yield from sorted(selected, key=lambda path: (path.endswith(".json"), path))
+
+
+def import_articles(paths: Sequence[str], store: ArticleStore) -> Dict[str, Any]:
+    """Load existing article files into the store; unrecognized or invalid files are reported"""
+    started = time.perf_counter()
+    imported: List[str] = []
+    skipped: List[Tuple[str, str]] = []
+    for path in iter_article_files(paths):
+        try:
+            article = read_article_file(path)
+            if article is None:
+                skipped.append((path, "formato não reconhecido"))
+                continue
+            store.save(article, source=os.path.abspath(path), timestamp=os.path.getmtime(path))
+            imported.append(path)
+        except (OSError, ValueError, ValidationError) as e:
+            skipped.append((path, str(e).splitlines()[0]))
+    return {
+        "imported": len(imported),
+        "skipped": dict(skipped),
+        "articles": store.count(),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa artigos JSON e Markdown existentes para o banco de artigos")
+    parser.add_argument("paths", nargs="*", default=["artigos-gerados"],
+                        help="arquivos ou diretórios (padrão: artigos-gerados)")
+    parser.add_argument("--store", help="arquivo do banco (padrão: ARTICLE_STORE_PATH ou ~/.cache/...)")
+    args = parser.parse_args(argv)
+
+    result = import_articles(args.paths, get_article_store(args.store))
+    for path, reason in result["skipped"].items():
+        print(f"[ignorado] {path}: {reason}")
+    print(f"Importados: {result['imported']}  |  Ignorados: {len(result['skipped'])}  |  "
+          f"Artigos no banco: {result['articles']}  |  Tempo: {result['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
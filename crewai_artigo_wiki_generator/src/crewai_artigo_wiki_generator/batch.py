@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = os.path.join("artigos-gerados", "json")
+STAGES = ("research_task", "reporting_task", "review_task")
+
+
+def read_topics(path: str) -> List[str]:
+    """One topic per line; blank lines, duplicates and lines starting with '#' are ignored"""
+    topics = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            topic = line.strip()
+            if topic and not topic.startswith("#") and topic not in topics:
+                topics.append(topic)
+    return topics
+
+
+def article_filename(topic: str) -> str:
+    """Same naming as the start scripts: artigo_<topic without path characters, max 50 chars>.json"""
+    clean = re.sub(r'[/\\:?&*"<>|]', '', topic).strip()
+    return f"artigo_{clean[:50]}.json"
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """Write to a temporary file and rename, so a crash never leaves a half-written article"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile (None for an empty list)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def generate_one(topic: str) -> Dict[str, Any]:
+    """Worker entry point: run one crew and report the article plus per-stage timings"""
+    from main import _run_crew  # Imported in the worker process only
+
+    started = time.monotonic()
+    last_mark = [started]
+    stages: Dict[str, float] = {}
+
+    def on_task_done(output) -> None:
+        now = time.monotonic()
+        stages[output.name] = now - last_mark[0]
+        last_mark[0] = now
+
+    result = _run_crew(topic, store=True, task_callback=on_task_done)
+    record = {"topic": topic, "stages": stages, "total": time.monotonic() - started}
+    if "error" in result:
+        record.update(ok=False, error=result["error"])
+    else:
+        record.update(ok=True, article=result)
+    return record
+
+
+def summarize(records: List[Dict[str, Any]], wall_time: float, skipped: int = 0) -> Dict[str, Any]:
+    """Throughput, per-stage p50/p95 latencies and failure counts for a batch run"""
+    succeeded = [r for r in records if r["ok"]]
+    summary = {
+        "topics": len(records) + skipped,
+        "succeeded": len(succeeded),
+        "failed": len(records) - len(succeeded),
+        "skipped": skipped,
+        "wall_time": round(wall_time, 2),
+        "articles_per_minute": round(len(succeeded) / (wall_time / 60.0), 2) if wall_time > 0 else 0.0,
+        "stages": {},
+    }
+    for stage in STAGES + ("total",):
+        if stage == "total":
+            values = [r["total"] for r in succeeded]
+        else:
+            values = [r["stages"][stage] for r in records if stage in r.get("stages", {})]
+        summary["stages"][stage] = {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 2) if values else None,
+            "p95": round(percentile(values, 95), 2) if values else None,
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print()
+    print(f"Artigos gerados: {summary['succeeded']}  |  Falhas: {summary['failed']}  |  "
+          f"Já existentes: {summary['skipped']}")
+    print(f"Tempo total: {summary['wall_time']}s  |  Throughput: {summary['articles_per_minute']} artigos/min")
+    print(f"{'Etapa':<16}{'n':>5}{'p50 (s)':>10}{'p95 (s)':>10}")
+    for stage, stats in summary["stages"].items():
+        p50 = "-" if stats["p50"] is None else stats["p50"]
+        p95 = "-" if stats["p95"] is None else stats["p95"]
+        print(f"{stage:<16}{stats['count']:>5}{p50:>10}{p95:>10}")
+
+
+def run_batch(topics: List[str], output_dir: str = DEFAULT_OUTPUT_DIR, workers: int = 2,
+              force: bool = False, worker=generate_one) -> Dict[str, Any]:
+    """
+    Generate articles for `topics` on a process pool.
+
+    Every finished article is written to `output_dir` as soon as it completes and
+    recorded in `_batch_log.jsonl`; topics whose file already exists are skipped,
+    so re-running after a crash resumes where it stopped.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    log_path = os.path.join(output_dir, "_batch_log.jsonl")
+
+    pending = []
+    skipped = 0
+    for topic in topics:
+        if not force and os.path.exists(os.path.join(output_dir, article_filename(topic))):
+            skipped += 1
+        else:
+            pending.append(topic)
+
+    records = []
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor, \
+            open(log_path, "a", encoding="utf-8") as log:
+        futures = {executor.submit(worker, topic): topic for topic in pending}
+        for future in as_completed(futures):
+            topic = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:  # Worker crashed (e.g. BrokenProcessPool)
+                record = {"topic": topic, "ok": False, "error": str(e), "stages": {}, "total": 0.0}
+
+            if record["ok"]:
+                write_json_atomic(os.path.join(output_dir, article_filename(topic)), record["article"])
+                print(f"[ok] {topic} ({record['total']:.1f}s)")
+            else:
+                print(f"[falha] {topic}: {record['error']}")
+
+            log_entry = {key: value for key, value in record.items() if key != "article"}
+            log.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
+            log.flush()
+            records.append(record)
+
+    return summarize(records, time.monotonic() - started, skipped)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera artigos em lote a partir de uma lista de tópicos")
+    parser.add_argument("topics_file", help="arquivo texto com um tópico por linha")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"diretório de saída dos JSON (padrão: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("-w", "--workers", type=int, default=int(os.environ.get("BATCH_WORKERS", 2)),
+                        help="número de processos (padrão: 2 ou BATCH_WORKERS)")
+    parser.add_argument("--force", action="store_true", help="gera novamente tópicos que já têm arquivo")
+    parser.add_argument("--summary-json", help="grava o resumo final neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    topics = read_topics(args.topics_file)
+    if not topics:
+        print("Nenhum tópico encontrado no arquivo.")
+        return 1
+
+    summary = run_batch(topics, output_dir=args.output_dir, workers=args.workers, force=args.force)
+    print_summary(summary)
+    if args.summary_json:
+        write_json_atomic(args.summary_json, summary)
+    return 0 if summary["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,492 @@
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, the peak RSS is reported as unavailable
+    resource = None
+
+# The benchmark must not reach the network: keep CrewAI's telemetry exporter off
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+from crewai.llms.base_llm import BaseLLM
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from batch import percentile, write_json_atomic
+from llm_cache import LLM_CACHE_MODES
+from research_prefetch import RESEARCH_MODES
+from metrics import CONTEXT_TOKENS, LLM_CACHE_LOOKUPS, STAGE_DURATION
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+DEFAULT_CASSETTE = os.path.join(BENCHMARK_DIR, "cassettes", "ptwiki.json")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_TOPICS = ("Saúde", "Inteligência artificial", "Rio Amazonas")
+WIKIPEDIA_PREFIX = "https://pt.wikipedia.org/"
+STAGES = ("research_task", "reporting_task", "review_task")
+
+
+class RecordReplayAdapter(BaseAdapter):
+    """
+    requests transport that serves pt.wikipedia.org from a recorded cassette.
+
+    In replay mode every request is answered from the cassette (unknown URLs get
+    a 404 and are counted as misses); in record mode requests go to the network
+    and the responses are added to the cassette, which `save()` writes back.
+    """
+
+    def __init__(self, cassette_path: str, record: bool = False):
+        super().__init__()
+        self.cassette_path = cassette_path
+        self.record = record
+        self.interactions: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(cassette_path):
+            with open(cassette_path, "r", encoding="utf-8") as f:
+                self.interactions = json.load(f).get("interactions", {})
+        self.requests = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._upstream = HTTPAdapter() if record else None
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests += 1
+            recorded = self.interactions.get(request.url)
+
+        if recorded is None and self.record:
+            live = self._upstream.send(request, **kwargs)
+            recorded = {"status": live.status_code, "body": live.text}
+            with self._lock:
+                self.interactions[request.url] = recorded
+        elif recorded is None:
+            with self._lock:
+                self.misses += 1
+            recorded = {"status": 404, "body": json.dumps({"error": "not recorded"})}
+
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response._content = recorded["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.headers["Content-Type"] = "application/json; charset=utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.cassette_path), exist_ok=True)
+        write_json_atomic(self.cassette_path, {"interactions": dict(sorted(self.interactions.items()))})
+
+    def close(self) -> None:
+        if self._upstream is not None:
+            self._upstream.close()
+
+
+class FakeLLM(BaseLLM):
+    """
+    Deterministic stand-in for the model, driven by the agent role in the prompt:
+    the researcher calls `wikipedia_tool` once and summarizes the observation (or
+    summarizes the prefetched material), the writer expands it into an article and
+    the reviewer returns the article JSON. An optional fixed latency per call
+    approximates a remote model.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(model="fake-llm", temperature=0)
+        self.latency = latency
+        self.calls = 0
+        self.prompt_chars = 0
+        self._lock = threading.Lock()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        text = "\n".join(str(message.get("content", "")) for message in messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(text)
+        if self.latency:
+            time.sleep(self.latency)
+
+        # The system prompt documents the ReAct format (including "Observation:"),
+        # so tool results are only looked for in the assistant turns
+        history = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "assistant")
+        # Output of the previous task, without the closing "Begin! ..." instructions
+        context = text.split(self.CONTEXT_MARKER, 1)[-1].split("\nBegin!", 1)[0] if self.CONTEXT_MARKER in text else ""
+        # Material fetched before kickoff (RESEARCH_MODE=prefetch|direct)
+        material = self.MATERIAL.search(text)
+        material = material.group(1) if material else None
+        if "Especialista em Pesquisa Wikipedia" in text:
+            if material is not None:
+                topic = self._topic(text, r'tópico: "([^"]+)"')
+                return f"Thought: I now know the final answer\nFinal Answer: Pesquisa sobre {topic}:\n\n{material}"
+            return self._research(text, history)
+        if "Redator de Artigos" in text:
+            if not context and material is not None:
+                context = f"Pesquisa sobre {self._topic(material, r'(?m)^# (.+)$')}:\n\n{material}"
+            return self._write(context)
+        return self._review(context)
+
+    CONTEXT_MARKER = "This is the context you're working with:"
+    MATERIAL = re.compile(r"Material de pesquisa:\s*(.*?)\s*Fim do material de pesquisa", re.S)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+    @staticmethod
+    def _topic(text: str, pattern: str) -> str:
+        match = re.search(pattern, text)
+        return match.group(1).strip() if match else "Tópico"
+
+    def _research(self, text: str, history: str) -> str:
+        topic = self._topic(text, r'tópico: "([^"]+)"')
+        if "Observation:" not in history:
+            return (
+                f"Thought: Preciso buscar informações sobre {topic} na Wikipedia.\n"
+                f"Action: wikipedia_tool\n"
+                f"Action Input: {json.dumps({'query': topic}, ensure_ascii=False)}"
+            )
+        observation = history.rsplit("Observation:", 1)[1].strip()
+        return f"Thought: I now know the final answer\nFinal Answer: Pesquisa sobre {topic}:\n\n{observation}"
+
+    def _write(self, text: str) -> str:
+        topic = self._topic(text, r"Pesquisa sobre ([^:\n]+):")
+        research = text.split(f"Pesquisa sobre {topic}:", 1)[-1].strip()
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", research) if s.strip()][:6] or [research]
+        sections = []
+        for heading in ("Introdução", "Desenvolvimento", "Conclusão"):
+            sections.append(f"{heading}\n\n" + " ".join(sentences * 3))
+        return "Thought: I now know the final answer\nFinal Answer: Artigo sobre: {}\n\n{}".format(
+            topic, "\n\n".join(sections)
+        )
+
+    def _review(self, text: str) -> str:
+        topic = self._topic(text, r"Artigo sobre: ([^\n]+)")
+        body = text.split(f"Artigo sobre: {topic}", 1)[-1]
+        sections = dict(re.findall(r"(Introdução|Desenvolvimento|Conclusão)\n\n([^\n]+)", body))
+        article = {
+            "titulo": f"Artigo sobre: {topic}",
+            "topico": topic,
+            "data_criacao": "2025-01-01T00:00:00",
+            "autor": "MultiAgente AI",
+            "paragrafos": [
+                {"titulo": heading, "conteudo": sections.get(heading, sections.get("Introdução", ""))[:600]}
+                for heading in ("Resumo", "Introdução", "Desenvolvimento", "Conclusão")
+            ],
+            "referencias": [f"WIKIPEDIA. {topic}. Acesso em 01/01/2025."],
+        }
+        return "Thought: I now know the final answer\nFinal Answer: " + json.dumps(article, ensure_ascii=False)
+
+
+def _hit_rate(before: Dict[str, int], after: Dict[str, int]) -> Optional[float]:
+    hits = after["hits"] - before["hits"]
+    lookups = hits + after["misses"] - before["misses"]
+    return round(hits / lookups, 3) if lookups else None
+
+
+def _context_tokens_saved() -> float:
+    return sum(
+        CONTEXT_TOKENS.value(stage=stage, kind="before") - CONTEXT_TOKENS.value(stage=stage, kind="after")
+        for stage in STAGES
+    )
+
+
+def run_topic(topic: str, llm: FakeLLM, adapter: RecordReplayAdapter, trace_memory: bool = False,
+              research_mode: str = "agent") -> Dict[str, Any]:
+    """Generate one article end to end and collect timings, request counts and cache activity"""
+    from main import _run_crew
+    from tools.wikipedia_tool import WikipediaTool
+
+    cache_before = WikipediaTool.cache_stats()
+    negative_before = WikipediaTool.negative_cache_stats()
+    requests_before, misses_before = adapter.requests, adapter.misses
+    calls_before, chars_before = llm.calls, llm.prompt_chars
+    llm_hits_before = LLM_CACHE_LOOKUPS.value(result="hit")
+    saved_before = _context_tokens_saved()
+    prefetch_before = STAGE_DURATION.sum(stage="prefetch")
+
+    started = time.monotonic()
+    last_mark = [started]
+    stages: Dict[str, float] = {}
+
+    def on_task_done(output) -> None:
+        now = time.monotonic()
+        stages[output.name] = round(now - last_mark[0], 4)
+        last_mark[0] = now
+
+    if trace_memory:
+        tracemalloc.start()
+    result = _run_crew(topic, store=False, task_callback=on_task_done, llm=llm, research_mode=research_mode)
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    cache_after = WikipediaTool.cache_stats()
+    negative_after = WikipediaTool.negative_cache_stats()
+    if research_mode != "agent":
+        prefetch = STAGE_DURATION.sum(stage="prefetch") - prefetch_before
+        stages = {"prefetch": round(prefetch, 4), **stages}
+    return {
+        "topic": topic,
+        "ok": "error" not in result,
+        "error": result.get("error"),
+        "total": round(time.monotonic() - started, 4),
+        "stages": stages,
+        "wikipedia_requests": adapter.requests - requests_before,
+        "replay_misses": adapter.misses - misses_before,
+        "llm_calls": llm.calls - calls_before,
+        "prompt_chars": llm.prompt_chars - chars_before,
+        "llm_cache_hits": LLM_CACHE_LOOKUPS.value(result="hit") - llm_hits_before,
+        "context_tokens_saved": _context_tokens_saved() - saved_before,
+        "cache_hit_rate": _hit_rate(cache_before, cache_after),
+        "negative_cache_hit_rate": _hit_rate(negative_before, negative_after),
+        "peak_traced_bytes": peak_traced,
+    }
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-stage p50/p95 plus request, cache and memory totals across all runs"""
+    summary: Dict[str, Any] = {"runs": len(records), "failed": sum(1 for r in records if not r["ok"]), "stages": {}}
+    for stage in ("prefetch",) + STAGES + ("total",):
+        values = [r["total"] if stage == "total" else r["stages"][stage]
+                  for r in records if stage == "total" or stage in r["stages"]]
+        if not values:
+            continue
+        summary["stages"][stage] = {
+            "p50": round(percentile(values, 50), 4),
+            "p95": round(percentile(values, 95), 4),
+        }
+    summary["wikipedia_requests"] = sum(r["wikipedia_requests"] for r in records)
+    summary["replay_misses"] = sum(r["replay_misses"] for r in records)
+    summary["llm_calls"] = sum(r["llm_calls"] for r in records)
+    summary["prompt_chars"] = sum(r["prompt_chars"] for r in records)
+    summary["llm_cache_hits"] = sum(r["llm_cache_hits"] for r in records)
+    summary["context_tokens_saved"] = sum(r["context_tokens_saved"] for r in records)
+    rates = [r["cache_hit_rate"] for r in records if r["cache_hit_rate"] is not None]
+    summary["cache_hit_rate"] = round(sum(rates) / len(rates), 3) if rates else None
+    traced = [r["peak_traced_bytes"] for r in records if r["peak_traced_bytes"] is not None]
+    summary["peak_traced_bytes"] = max(traced) if traced else None
+    summary["peak_rss_bytes"] = peak_rss_bytes()
+    return summary
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident memory of this process, or None where getrusage is unavailable (Windows)"""
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(topics=DEFAULT_TOPICS, repeat: int = 2, cassette: str = DEFAULT_CASSETTE,
+                  record: bool = False, llm_latency: float = 0.0, trace_memory: bool = False,
+                  research_mode: str = "agent", llm_cache: str = "off",
+                  llm_cache_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run every topic `repeat` times against the fake LLM and the recorded Wikipedia.
+
+    Caches start empty (a temporary WIKI_CACHE_PATH), so the first round measures
+    cold lookups and later rounds measure the warm tool cache. With `llm_cache`
+    'on' or 'replay' the agents go through the LLM completion cache, kept in a
+    temporary file unless `llm_cache_path` points to a recorded one.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="wiki-bench-")
+    os.environ["WIKI_CACHE_PATH"] = os.path.join(cache_dir, "wikipedia.sqlite3")
+    os.environ["LLM_CACHE"] = llm_cache
+    os.environ["LLM_CACHE_PATH"] = llm_cache_path or os.path.join(cache_dir, "llm.sqlite3")
+    from tools.wiki_http import get_session
+    from tools.wikipedia_tool import WikipediaTool
+
+    adapter = RecordReplayAdapter(cassette, record=record)
+    session = get_session(WikipediaTool()._USER_AGENT)
+    session.mount(WIKIPEDIA_PREFIX, adapter)
+    llm = FakeLLM(latency=llm_latency)
+
+    started = time.monotonic()
+    records = []
+    try:
+        for round_number in range(1, repeat + 1):
+            for topic in topics:
+                run = run_topic(topic, llm, adapter, trace_memory=trace_memory, research_mode=research_mode)
+                run["round"] = round_number
+                records.append(run)
+                print(f"[{round_number}] {topic}: {run['total']:.3f}s, "
+                      f"{run['wikipedia_requests']} req. Wikipedia, {run['llm_calls']} chamadas LLM")
+    finally:
+        session.adapters.pop(WIKIPEDIA_PREFIX, None)
+        if record:
+            adapter.save()
+        adapter.close()
+
+    import crewai
+    from main import crew_templates
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "crewai": crewai.__version__,
+        "settings": {"topics": list(topics), "repeat": repeat, "llm_latency": llm_latency,
+                     "trace_memory": trace_memory, "research_mode": research_mode, "llm_cache": llm_cache},
+        "wall_time": round(time.monotonic() - started, 3),
+        "summary": summarize(records),
+        "crew_construction": crew_templates.stats(),
+        "runs": records,
+    }
+
+
+def _large_review_output(paragraphs: int, paragraph_chars: int) -> str:
+    """Reviewer response (ReAct preamble, ```json fence) with an article of `paragraphs` long paragraphs"""
+    sentence = "A saúde é um \"estado\" de completo bem-estar físico, mental e social.\n"
+    article = {
+        "titulo": "Artigo sobre: Saúde",
+        "topico": "Saúde",
+        "data_criacao": "2025-01-01T00:00:00",
+        "autor": "MultiAgente AI",
+        "paragrafos": [
+            {"titulo": f"Seção {number}", "conteudo": (sentence * (paragraph_chars // len(sentence) + 1))[:paragraph_chars]}
+            for number in range(paragraphs)
+        ],
+        "referencias": [f"WIKIPEDIA. Saúde {number}. Acesso em 01/01/2025." for number in range(20)],
+    }
+    body = json.dumps(article, ensure_ascii=False, indent=2)
+    return f"Thought: I now know the final answer\nFinal Answer: ```json\n{body}\n```"
+
+
+def parse_benchmark(paragraphs: int = 200, paragraph_chars: int = 1500, repeat: int = 5,
+                    chunk_size: int = 64) -> Dict[str, Any]:
+    """
+    Parse time of a large reviewer output: one pass over the complete text, the same
+    text streamed in `chunk_size` pieces, and the whole normalize/validate path; plain
+    `json.loads` of the bare object is the reference. Also reports how much of a
+    hopeless response (paragraphs given as a string) is read before it is rejected.
+    """
+    from article_parser import ArticleParser, HopelessOutputError, parse_article
+    from main import normalize_output, validate_article_data
+
+    payload = _large_review_output(paragraphs, paragraph_chars)
+    body = payload[payload.index("{"):payload.rindex("}") + 1]
+
+    def streamed(text: str) -> ArticleParser:
+        parser = ArticleParser()
+        for start in range(0, len(text), chunk_size):
+            if parser.feed(text[start:start + chunk_size]) is not None:
+                break
+        return parser
+
+    def best(function) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        return round(min(timings), 6)
+
+    hopeless = payload.replace('"paragrafos": [', '"paragrafos": "', 1)
+    try:
+        streamed(hopeless)
+        rejected_after = None
+    except HopelessOutputError:
+        rejected_after = hopeless.index('"paragrafos": "') + len('"paragrafos": "')
+
+    return {
+        "payload_chars": len(payload),
+        "paragraphs": paragraphs,
+        "json_loads_seconds": best(lambda: json.loads(body)),
+        "parse_seconds": best(lambda: parse_article(payload)),
+        "parse_streamed_seconds": best(lambda: streamed(payload).close()),
+        "normalize_and_validate_seconds": best(lambda: validate_article_data(normalize_output(payload))),
+        "hopeless_chars": len(hopeless),
+        "hopeless_rejected_after_chars": rejected_after,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the change of each headline metric against a previous result file"""
+    print(f"\nComparação com {baseline.get('commit') or 'base'}:")
+    rows = [(f"{stage} p50", ("stages", stage, "p50")) for stage in ("prefetch",) + STAGES + ("total",)]
+    rows += [(name, (name,)) for name in ("wikipedia_requests", "llm_calls", "llm_cache_hits", "prompt_chars",
+                                          "context_tokens_saved", "cache_hit_rate", "peak_rss_bytes")]
+    for label, path in rows:
+        old, new = baseline["summary"], current["summary"]
+        for key in path:
+            old, new = (old or {}).get(key), (new or {}).get(key)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else "-"
+        print(f"{label:<22}{str(old):>14}{str(new):>14}{change:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark offline de ponta a ponta (LLM simulado + Wikipedia gravada)"
+    )
+    parser.add_argument("topics", nargs="*", help=f"tópicos (padrão: {', '.join(DEFAULT_TOPICS)})")
+    parser.add_argument("-n", "--repeat", type=int, default=2, help="rodadas por tópico (padrão: 2)")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE, help="arquivo de respostas gravadas da Wikipedia")
+    parser.add_argument("--record", action="store_true", help="consulta a Wikipedia real e grava as respostas novas")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="atraso simulado por chamada ao LLM (s)")
+    parser.add_argument("--trace-memory", action="store_true", help="mede o pico de memória Python (tracemalloc)")
+    parser.add_argument("--research-mode", choices=RESEARCH_MODES, default="agent",
+                        help="agent (padrão), prefetch ou direct; compare com --compare")
+    parser.add_argument("--llm-cache", choices=LLM_CACHE_MODES, default="off",
+                        help="cache de respostas do LLM: off (padrão), on ou replay (falha se faltar resposta)")
+    parser.add_argument("--llm-cache-path", help="arquivo do cache de respostas do LLM (padrão: temporário)")
+    parser.add_argument("--parse-only", action="store_true",
+                        help="mede apenas a análise da saída do revisor em um artigo grande (sem crew)")
+    parser.add_argument("--parse-paragraphs", type=int, default=200,
+                        help="parágrafos do artigo usado em --parse-only (padrão: 200)")
+    parser.add_argument("-o", "--output", help="arquivo JSON de resultado (padrão: benchmarks/results/)")
+    parser.add_argument("--compare", help="resultado anterior para comparação")
+    args = parser.parse_args(argv)
+
+    if args.parse_only:
+        print(json.dumps(parse_benchmark(paragraphs=args.parse_paragraphs), indent=2, ensure_ascii=False))
+        return 0
+
+    results = run_benchmark(
+        topics=args.topics or DEFAULT_TOPICS, repeat=args.repeat, cassette=args.cassette,
+        record=args.record, llm_latency=args.llm_latency, trace_memory=args.trace_memory,
+        research_mode=args.research_mode, llm_cache=args.llm_cache, llm_cache_path=args.llm_cache_path,
+    )
+    output = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"benchmark-{results['commit'] or 'local'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    write_json_atomic(output, results)
+    print(json.dumps(results["summary"], indent=2, ensure_ascii=False))
+    print(f"\nResultado salvo em {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0 if results["summary"]["failed"] == 0 and results["summary"]["replay_misses"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
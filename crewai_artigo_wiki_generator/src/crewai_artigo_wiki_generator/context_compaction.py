@@ -0,0 +1,189 @@
+import logging
+import math
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from crewai.tasks.task_output import TaskOutput
+
+from metrics import CONTEXT_TOKENS
+from tools.text_utils import strip_accents
+from tools.wiki_search import tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGET = 1200
+CHARS_PER_TOKEN = 4
+
+# Lines the Wikipedia tool adds around the page text; useless to the next agents
+BOILERPLATE = re.compile(
+    r"^\s*(?:"
+    r"\((?:Redirecionado de|Não encontrado exatamente) [^\n]*\)"
+    r"|Não encontrado exatamente [^\n]*mas talvez queira:"
+    r"|Nenhum resultado encontrado para [^\n]*"
+    r"|Outros resultados:"
+    r")\s*$",
+    re.IGNORECASE,
+)
+LIST_ITEM = re.compile(r"^\s*-\s+\S")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"“(\[\w])")
+# Markdown (format_bundle) and wiki (== Seção ==) headings: kept as structure, never trimmed
+HEADING = re.compile(r"^\s*(?:(#{1,6})\s+\S.*|(={2,6})\s*\S.*?\s*\2)\s*$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about 4 characters per token for Portuguese prose)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_budget() -> int:
+    """Token budget for the context handed between stages (CONTEXT_TOKEN_BUDGET, 0 = no limit)"""
+    try:
+        return max(0, int(os.environ.get("CONTEXT_TOKEN_BUDGET", DEFAULT_BUDGET)))
+    except ValueError:
+        return DEFAULT_BUDGET
+
+
+def _strip_boilerplate(text: str) -> List[str]:
+    """Paragraphs of `text` without the tool's redirect/suggestion lines and their title lists"""
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        lines, in_list = [], False
+        for line in block.splitlines():
+            if BOILERPLATE.match(line):
+                in_list = True  # The title list that follows is boilerplate too
+                continue
+            if in_list and LIST_ITEM.match(line):
+                continue
+            in_list = False
+            lines.append(line)
+        paragraph = "\n".join(lines).strip()
+        if paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def _sentence_key(sentence: str) -> str:
+    return " ".join(re.findall(r"\w+", strip_accents(sentence.casefold())))
+
+
+def _heading_level(line: str) -> int:
+    """Level of a heading line (1 for '#', 2 for '##' or '== x =='), 0 for text"""
+    match = HEADING.match(line)
+    if match is None:
+        return 0
+    return len(match.group(1) or match.group(2))
+
+
+def _select(sentences: List[str], budget: int, fixed: set) -> set:
+    """
+    Greedy choice of the sentences that add the most unseen information per token:
+    each candidate is scored by the IDF mass of its terms not covered yet, divided
+    by its token cost. The `fixed` ones (lead sentence, headings) are always kept.
+    """
+    terms = [set(tokenize(sentence)) for sentence in sentences]
+    document_frequency: Dict[str, int] = {}
+    for sentence_terms in terms:
+        for term in sentence_terms:
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    idf = {term: math.log(1 + len(sentences) / df) for term, df in document_frequency.items()}
+    costs = [estimate_tokens(sentence) + 1 for sentence in sentences]
+
+    chosen = set(fixed)
+    covered = set().union(*(terms[index] for index in chosen))
+    used = sum(costs[index] for index in chosen)
+    remaining = set(range(len(sentences))) - chosen
+    while remaining:
+        best, best_score = None, 0.0
+        for index in remaining:
+            if used + costs[index] > budget:
+                continue
+            gain = sum(idf[term] for term in terms[index] - covered)
+            score = gain / costs[index]
+            if score > best_score:
+                best, best_score = index, score
+        if best is None:
+            break
+        chosen.add(best)
+        covered |= terms[best]
+        used += costs[best]
+        remaining.discard(best)
+    return chosen
+
+
+def _drop_empty_headings(units: List[Tuple[int, str, str, int]]) -> List[Tuple[int, str, str, int]]:
+    """Headings whose whole section was removed go too (walking back from the end)"""
+    kept = []
+    following = None  # What comes after: None (end), 0 (text) or the next heading's level
+    for unit in reversed(units):
+        level = unit[3]
+        if level and (following is None or 0 < following <= level):
+            continue
+        kept.append(unit)
+        following = level
+    return kept[::-1]
+
+
+def compact_context(text: str, budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Shrink a stage output before it becomes the next stage's context.
+
+    Removes the tool boilerplate, drops sentences already seen (ignoring case,
+    accents and punctuation) and, when the result is still above `budget` tokens,
+    keeps the most informative sentences in their original order. A budget of 0
+    only deduplicates. Headings, line breaks and paragraph breaks of what is kept
+    stay as they were. Returns the compacted text and the token estimates.
+    """
+    budget = context_budget() if budget is None else budget
+    before = estimate_tokens(text)
+
+    seen = set()
+    # (paragraph, separator before it within the paragraph, text, heading level)
+    units: List[Tuple[int, str, str, int]] = []
+    for paragraph_index, paragraph in enumerate(_strip_boilerplate(text)):
+        for line in paragraph.splitlines():
+            level = _heading_level(line)
+            if level:
+                units.append((paragraph_index, "\n", line.strip(), level))
+                continue
+            for position, sentence in enumerate(SENTENCE_BOUNDARY.split(line)):
+                key = _sentence_key(sentence)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                units.append((paragraph_index, " " if position else "\n", sentence.strip(), 0))
+
+    if budget and units and sum(estimate_tokens(unit[2]) + 1 for unit in units) > budget:
+        fixed = {0} | {index for index, unit in enumerate(units) if unit[3]}
+        chosen = _select([unit[2] for unit in units], budget, fixed)
+        units = [unit for index, unit in enumerate(units) if index in chosen]
+    units = _drop_empty_headings(units)
+
+    paragraphs: Dict[int, str] = {}
+    for paragraph_index, separator, sentence, _ in units:
+        if paragraph_index in paragraphs:
+            paragraphs[paragraph_index] += separator + sentence
+        else:
+            paragraphs[paragraph_index] = sentence
+    compacted = "\n\n".join(paragraph for _, paragraph in sorted(paragraphs.items()))
+    if not compacted:
+        return text, {"before": before, "after": before, "saved": 0}
+
+    after = estimate_tokens(compacted)
+    return compacted, {"before": before, "after": after, "saved": before - after}
+
+
+def compaction_guardrail(stage: str, budget: Optional[int] = None) -> Callable[[TaskOutput], Tuple[bool, Any]]:
+    """
+    Task guardrail that replaces the task's raw output with its compacted form, so the
+    following tasks receive the smaller text as context. Savings are logged and counted
+    in `context_compaction_tokens_total{stage,kind}`.
+    """
+    def compact(output: TaskOutput) -> Tuple[bool, Any]:
+        compacted, stats = compact_context(output.raw or "", budget)
+        CONTEXT_TOKENS.inc(stats["before"], stage=stage, kind="before")
+        CONTEXT_TOKENS.inc(stats["after"], stage=stage, kind="after")
+        logger.info(f"Context after {stage}: ~{stats['before']} -> ~{stats['after']} tokens ({stats['saved']} saved)")
+        return True, compacted
+
+    return compact
@@ -3,9 +3,17 @@ from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task, tool
 from tools.wikipedia_tool import WikipediaTool
 from models.article_model import Artigo
+from context_compaction import compaction_guardrail
+from research_prefetch import get_research_mode
+from admission import validate_topic
+from llm_cache import cached_llm
+from article_parser import article_output_guard
 from crewai.tasks import TaskOutput
 
-import re
+# Acrescentado à redação no modo 'direct', em que não há etapa de pesquisa
+MATERIAL_DE_PESQUISA = (
+    "\n\nMaterial de pesquisa:\n\n{research}\n\nFim do material de pesquisa.\n"
+)
 
 def validate_topic_and_interrupt(topic: str) -> None:
     """
@@ -17,48 +25,15 @@ def validate_topic_and_interrupt(topic: str) -> None:
     Raises:
         ValueError: Se o tópico for considerado inválido
     
-    Validações incluídas:
+    Validações incluídas (tempo linear no tamanho do tópico, ver admission.validate_topic):
     - Não vazio e é string
-    - Tamanho mínimo (3 caracteres)
+    - Tamanho mínimo (2 caracteres) e máximo (TOPIC_MAX_CHARS)
     - Não apenas números
-    - Padrões repetitivos (como "awdawdawd")
+    - Padrões repetitivos (como "awdawdawd") e 4+ letras iguais seguidas
     - Não apenas caracteres especiais
     - Permite siglas (mais de 1 letra em maiúsculas)
     """
-    # Validação básica
-    if not topic or not isinstance(topic, str):
-        raise ValueError("Tópico não pode ser vazio ou não-string")
-    
-    stripped_topic = topic.strip()
-    
-    if len(stripped_topic) < 2:
-        raise ValueError("Tópico muito curto (mínimo 2 caracteres)")
-    
-    if stripped_topic.isdigit():
-        raise ValueError("Tópico não pode conter apenas números")
-    
-    # Verifica se é apenas caracteres especiais/repetitivos
-    if re.fullmatch(r'[\W_]+', stripped_topic):
-        raise ValueError("Tópico não pode conter apenas caracteres especiais")
-    
-    # Detecta padrões repetitivos (como "abcabcabc" ou "aaaaaa")
-    if len(stripped_topic) > 5:  # Só aplica para tópicos maiores
-        # Verifica sequências repetidas
-        if re.search(r'(.+)\1+', stripped_topic.lower()):
-            raise ValueError("Tópico contém padrões repetitivos sem sentido")
-        
-        # Verifica muitas letras repetidas
-        if any(char * 4 in stripped_topic.lower() for char in stripped_topic.lower()):
-            raise ValueError("Tópico contém muitas repetições de caracteres")
-    
-    # Verifica se é uma sigla válida (mais de 1 letra maiúscula, sem números)
-    if stripped_topic.isupper() and len(stripped_topic) > 1 and stripped_topic.isalpha():
-        return  # Siglas válidas são aceitas
-    
-    # Verifica se tem pelo menos 2 letras diferentes
-    unique_chars = set(stripped_topic.lower())
-    if len(unique_chars) < 2 and len(stripped_topic) >= 5:
-        raise ValueError("Tópico contém pouca variação de caracteres")
+    validate_topic(topic)
 
 
 @CrewBase
@@ -73,8 +48,20 @@ class CrewaiArtigoWikiGenerator:
     agents_config = 'config/agents.yaml'
     tasks_config = 'config/tasks.yaml'
     
-    def __init__(self):
+    def __init__(self, task_callback=None, llm=None, research_mode=None):
         self.topico = None  # Inicializa como None
+        # Chamado com o TaskOutput ao final de cada tarefa (usado no streaming de progresso)
+        self.task_callback = task_callback
+        # LLM dos agentes; None usa o modelo configurado no ambiente (MODEL).
+        # Com LLM_CACHE=on|replay, as respostas passam pelo cache de completions em disco
+        self.llm = cached_llm(llm)
+        # Revisor: o JSON do artigo é verificado enquanto chega e respostas sem conserto
+        # são interrompidas e repetidas (ver article_parser). O cache envolve o guarda:
+        # só respostas aceitas por ele são gravadas, e um acerto já sai verificado
+        self.review_llm = cached_llm(article_output_guard(llm))
+        # 'agent' (pesquisa pelo agente), 'prefetch' (material pré-carregado, uma síntese)
+        # ou 'direct' (material pré-carregado direto para a redação); padrão: RESEARCH_MODE
+        self.research_mode = get_research_mode(research_mode)
 
     def set_topic(self, topic:str):
         
@@ -103,7 +90,9 @@ class CrewaiArtigoWikiGenerator:
         """
         return Agent(
             config=self.agents_config['researcher'],
-            tools=[WikipediaTool()],
+            # Mesma instância (memoizada) em todo o gerador; sem ferramentas se o material já vem pronto
+            tools=[self.wikipedia_tool()] if self.research_mode == "agent" else [],
+            llm=self.llm,
             verbose=True,
             allow_delegation=False,
             max_iter=10
@@ -119,6 +108,7 @@ class CrewaiArtigoWikiGenerator:
         """
         return Agent(
             config=self.agents_config['reporting_analyst'],
+            llm=self.llm,
             allow_delegation=False,
             verbose=True
         )
@@ -133,6 +123,7 @@ class CrewaiArtigoWikiGenerator:
         """
         return Agent(
             config=self.agents_config['reviewer'],
+            llm=self.review_llm,
             allow_delegation=False,
             verbose=False
         )
@@ -144,11 +135,19 @@ class CrewaiArtigoWikiGenerator:
                 raise f"Pesquisa falhou: {result}"
             return TaskOutput(output=result)
 
+        if self.research_mode != "agent":
+            return Task(
+                config=self.tasks_config['research_prefetch_task'],
+                guardrail=compaction_guardrail("research_task"),
+            )
+
         return Task(
             config=self.tasks_config['research_task'],
-            tools=[WikipediaTool()],
+            tools=[self.wikipedia_tool()],
             allow_delegation=False,
             output_parser=validate_result,  # aqui está o pulo do gato!
+            # Compacta a pesquisa antes de ela virar contexto da redação e da revisão
+            guardrail=compaction_guardrail("research_task"),
         )
 
     @task
@@ -159,8 +158,11 @@ class CrewaiArtigoWikiGenerator:
         Returns:
             Task: Tarefa configurada com arquivo de saída preliminar.
         """
+        config = self.tasks_config['reporting_task']
+        if self.research_mode == "direct":
+            return Task(config=config, description=config['description'] + MATERIAL_DE_PESQUISA)
         return Task(
-            config=self.tasks_config['reporting_task'],
+            config=config,
             
         )
 
@@ -186,11 +188,18 @@ class CrewaiArtigoWikiGenerator:
         Returns:
             Crew: A crew completa pronta para execução.
         """
+        agents, tasks = self.agents, self.tasks
+        if self.research_mode == "direct":
+            # Sem etapa de pesquisa: a redação recebe o material pré-carregado
+            agents = [agent for agent in agents if agent is not self.researcher()]
+            tasks = [task for task in tasks if task is not self.research_task()]
+
         return Crew(
-            agents=self.agents,
-            tasks=self.tasks,
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             output_pydantic=Artigo,
             verbose=True,
+            task_callback=self.task_callback,
         )
 
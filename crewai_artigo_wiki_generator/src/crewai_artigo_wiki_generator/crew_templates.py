@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from crewai import Crew
+
+from metrics import CREW_CONSTRUCTION
+
+logger = logging.getLogger(__name__)
+
+
+class CrewTemplates:
+    """
+    Warm crew templates: parse the YAML config and build agents, tasks and tools
+    once per (generator class, LLM, options), then hand out cheap copies per request.
+
+    `Crew.copy()` re-creates the agent and task models from the template's already
+    resolved data, so no YAML is read and no tool is instantiated per request; tools
+    and the LLM object are shared with the template. Factories whose `crew()` does
+    not return a real `Crew` (e.g. test doubles) are built fresh on every call.
+    Set CREW_TEMPLATE_REUSE=0 to always build from scratch (useful for comparisons).
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get("CREW_TEMPLATE_REUSE", "1").strip().lower() not in ("0", "false", "no")
+        self.enabled = enabled
+        self._templates: Dict[Tuple[Any, int], Tuple[Any, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "templates": 0,
+            "template_build_seconds": 0.0,
+            "builds": 0,
+            "build_seconds": 0.0,
+            "clones": 0,
+            "clone_seconds": 0.0,
+        }
+
+    def _build(self, factory: Callable, task_callback=None, llm=None, **options) -> Any:
+        started = time.perf_counter()
+        crew = factory(task_callback=task_callback, llm=llm, **options).crew()
+        elapsed = time.perf_counter() - started
+        CREW_CONSTRUCTION.observe(elapsed, mode="build")
+        with self._lock:
+            self._stats["builds"] += 1
+            self._stats["build_seconds"] += elapsed
+        return crew
+
+    def template(self, factory: Callable, llm=None, **options) -> Any:
+        """Template crew for `factory`, `llm` and the generator options, built on first use"""
+        key = (factory, id(llm), tuple(sorted(options.items())))
+        with self._lock:
+            entry = self._templates.get(key)
+        if entry is not None:
+            return entry[0]
+
+        started = time.perf_counter()
+        crew = factory(llm=llm, **options).crew()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            entry = self._templates.setdefault(key, (crew, llm))  # Keeps `llm` alive so its id is not reused
+            if entry[0] is crew:
+                self._stats["templates"] += 1
+                self._stats["template_build_seconds"] += elapsed
+                logger.info(f"Crew template for {getattr(factory, '__name__', factory)} built in {elapsed:.3f}s")
+        return entry[0]
+
+    def create(self, factory: Callable, task_callback=None, llm=None, **options) -> Any:
+        """New crew for one run: a copy of the warm template, or a fresh build as fallback"""
+        if not self.enabled:
+            return self._build(factory, task_callback, llm, **options)
+
+        template = self.template(factory, llm, **options)
+        if not isinstance(template, Crew):
+            return self._build(factory, task_callback, llm, **options)
+
+        started = time.perf_counter()
+        crew = template.copy()
+        for cloned, original in zip(crew.agents, template.agents):
+            cloned.llm = original.llm  # Same LLM client as the template instead of a shallow copy
+        crew.task_callback = task_callback
+        elapsed = time.perf_counter() - started
+        CREW_CONSTRUCTION.observe(elapsed, mode="clone")
+        with self._lock:
+            self._stats["clones"] += 1
+            self._stats["clone_seconds"] += elapsed
+        return crew
+
+    def warm_up(self, factory: Callable, llm=None, **options) -> float:
+        """Build the template ahead of the first request; returns the seconds it took"""
+        started = time.perf_counter()
+        if self.enabled:
+            self.template(factory, llm, **options)
+        return time.perf_counter() - started
+
+    def stats(self) -> Dict[str, float]:
+        """Template build cost and average per-request construction cost (clone vs. full build)"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_clone_seconds"] = stats["clone_seconds"] / stats["clones"] if stats["clones"] else None
+        stats["avg_build_seconds"] = stats["build_seconds"] / stats["builds"] if stats["builds"] else None
+        return {key: round(value, 6) if isinstance(value, float) else value for key, value in stats.items()}
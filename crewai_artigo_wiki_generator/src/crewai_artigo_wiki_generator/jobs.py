@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has reached its configured depth"""
+
+
+class JobManager:
+    """
+    Runs article generation jobs on a bounded worker pool.
+
+    Jobs wait in a queue limited to `max_queue` entries; once it is full,
+    `submit` raises QueueFullError so the API can answer with backpressure.
+    Finished jobs are kept for `retention` seconds so clients can poll them.
+    """
+
+    def __init__(
+        self,
+        runner: Callable[..., Dict[str, Any]],
+        max_workers: int = 2,
+        max_queue: int = 20,
+        retention: float = 3600,
+    ):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention = retention
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._on_done: Dict[str, Callable[[], None]] = {}
+        self._queued = 0
+        self._lock = threading.Lock()
+
+    def submit(self, topic: str, options: Optional[Dict[str, Any]] = None,
+               on_done: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+        """
+        Queue a generation for `topic` (options are passed to the runner) and return the job record.
+        `on_done` is called once the job has finished, whatever its outcome.
+        """
+        with self._lock:
+            self._purge_finished()
+            if self._queued >= self.max_queue:
+                raise QueueFullError(f"Job queue is full ({self.max_queue} pending)")
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "topic": topic,
+                "options": dict(options or {}),
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._jobs[job_id] = job
+            if on_done is not None:
+                self._on_done[job_id] = on_done
+            self._queued += 1
+
+        self._executor.submit(self._run, job_id)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a snapshot of the job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a free worker"""
+        with self._lock:
+            return self._queued
+
+    def retry_after(self) -> int:
+        """
+        Rough estimate (seconds) of when a queue slot will free up, i.e. when the
+        next running job should finish and a worker picks up the head of the queue
+        """
+        now = time.time()
+        with self._lock:
+            durations = [
+                job["finished_at"] - job["started_at"]
+                for job in self._jobs.values()
+                if job["finished_at"] and job["started_at"]
+            ]
+            elapsed = [
+                now - job["started_at"]
+                for job in self._jobs.values()
+                if job["status"] == "running"
+            ]
+        average = sum(durations) / len(durations) if durations else 60
+        if elapsed:
+            # The job furthest along is expected to free its worker first
+            return max(1, int(average - max(elapsed)))
+        return max(1, int(average / max(1, self.max_workers)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            self._queued -= 1
+
+        try:
+            result = self.runner(job["topic"], **job["options"])
+            if isinstance(result, dict) and "error" in result:
+                status, error, result = "failed", result["error"], None
+            else:
+                status, error = "done", None
+        except Exception as e:
+            logger.exception(f"Job {job_id} failed")
+            status, error, result = "failed", str(e), None
+
+        with self._lock:
+            job.update(status=status, result=result, error=error, finished_at=time.time())
+            on_done = self._on_done.pop(job_id, None)
+        if on_done is not None:
+            on_done()
+
+    def _purge_finished(self) -> None:
+        """Drop finished jobs older than the retention window (caller holds the lock)"""
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
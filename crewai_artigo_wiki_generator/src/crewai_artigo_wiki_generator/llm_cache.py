@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+
+from metrics import LLM_CACHE_LOOKUPS
+from tools.wiki_cache import TwoTierCache, get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+# off: every call goes to the model
+# on: completions are read from the cache and misses are stored after calling the model
+# replay: completions only come from the cache; a miss raises LLMCacheMiss
+LLM_CACHE_MODES = ("off", "on", "replay")
+LLM_CACHE_NAMESPACE = "llm_completion"
+DEFAULT_LLM_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "crewai_artigo_wiki_generator", "llm.sqlite3"
+)
+# LLM attributes that change the completion for the same messages
+KEY_PARAMS = (
+    "temperature", "top_p", "n", "max_tokens", "max_completion_tokens", "presence_penalty",
+    "frequency_penalty", "logit_bias", "response_format", "seed", "logprobs", "top_logprobs",
+    "reasoning_effort", "base_url", "api_base", "api_version",
+)
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a prompt has no recorded completion"""
+
+
+def get_llm_cache_mode(mode: Optional[str] = None) -> str:
+    """Validated LLM cache mode: the argument, else LLM_CACHE, else 'off'"""
+    mode = (mode or os.environ.get("LLM_CACHE") or "off").strip().lower()
+    if mode not in LLM_CACHE_MODES:
+        raise ValueError(f"Modo de cache do LLM inválido: '{mode}' (use {', '.join(LLM_CACHE_MODES)})")
+    return mode
+
+
+def completion_key(model: str, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> str:
+    """Content address of one completion: SHA-256 of the canonical JSON of model, messages and parameters"""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WrappedLLM(BaseLLM):
+    """
+    LLM that forwards to another one. Stop words and unknown attributes are shared
+    with the wrapped LLM, which is the one that actually receives the request.
+    """
+
+    def __init__(self, llm: BaseLLM):
+        self.llm = llm
+        stop = llm.stop
+        super().__init__(model=llm.model, temperature=getattr(llm, "temperature", None))
+        self.stop = stop
+
+    @property
+    def stop(self) -> Optional[List[str]]:
+        return self.llm.stop
+
+    @stop.setter
+    def stop(self, value: Optional[List[str]]) -> None:
+        self.llm.stop = value
+
+    def __getattr__(self, name: str) -> Any:
+        # Attributes CrewAI may read from a concrete LLM (api_key, callbacks...)
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        return self.llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
+
+
+class CachedLLM(WrappedLLM):
+    """
+    Wrapper that serves repeated prompts from a persistent completion cache.
+
+    Every agent call goes through `call`; the cache key covers the model name,
+    the full message list, the tool schemas, the stop words and the sampling
+    parameters of the wrapped LLM, so any change to prompts, inputs or settings is
+    a new entry. Only text completions are stored. Cache hits skip the model, so
+    they add no tokens to the agents' usage.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: Optional[TwoTierCache] = None, mode: str = "on"):
+        super().__init__(llm)
+        self.mode = get_llm_cache_mode(mode)
+        self.cache = cache if cache is not None else get_llm_cache()
+
+    def cache_key(self, messages: List[Dict[str, Any]], tools: Optional[List[dict]] = None) -> str:
+        params = {name: getattr(self.llm, name, None) for name in KEY_PARAMS}
+        params = {name: value for name, value in params.items() if value is not None}
+        params["stop"] = sorted(self.stop or [])
+        if tools:
+            params["tools"] = tools
+        return completion_key(self.model, messages, params)
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+    ) -> Union[str, Any]:
+        if self.mode == "off":
+            return super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+
+        normalized = [{"role": "user", "content": messages}] if isinstance(messages, str) else messages
+        key = self.cache_key(normalized, tools)
+        cached = self.cache.get(key)
+        if cached is not None:
+            LLM_CACHE_LOOKUPS.inc(result="hit")
+            return cached
+
+        LLM_CACHE_LOOKUPS.inc(result="miss")
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"Resposta do LLM não encontrada no cache (modelo {self.model}, chave {key[:12]})")
+
+        completion = super().call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions)
+        if isinstance(completion, str) and completion:
+            self.cache.set(key, completion)
+        return completion
+
+
+def get_llm_cache(path: Optional[str] = None) -> TwoTierCache:
+    """Process-wide completion cache at `path` (else LLM_CACHE_PATH); entries never expire"""
+    path = path or os.environ.get("LLM_CACHE_PATH") or DEFAULT_LLM_CACHE_PATH
+    return get_shared_cache(LLM_CACHE_NAMESPACE, ttl=float("inf"), path=path)
+
+
+def cached_llm(llm: Optional[BaseLLM] = None, mode: Optional[str] = None, path: Optional[str] = None) -> Optional[BaseLLM]:
+    """
+    The LLM the agents should use under the LLM cache mode (`mode`, else LLM_CACHE).
+
+    With the cache off `llm` is returned unchanged (None keeps CrewAI's default model);
+    otherwise it is wrapped in `CachedLLM`, resolving None to the model configured in
+    the environment (MODEL) first. Already wrapped LLMs are returned as they are.
+    """
+    mode = get_llm_cache_mode(mode)
+    if mode == "off" or isinstance(llm, CachedLLM):
+        return llm
+    if llm is None:
+        from crewai.utilities.llm_utils import create_llm
+        llm = create_llm(None)
+    return CachedLLM(llm, cache=get_llm_cache(path), mode=mode)
@@ -1,47 +1,73 @@
+import argparse
+import inspect
 import json
 import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 import traceback
 from typing import Dict, Any
 from urllib.parse import unquote
 from flask import request, jsonify
-from flask import Flask
+from flask import Flask, Response, stream_with_context
 from pydantic import ValidationError
-from crewai import Crew
+
+# Importing crewai is the largest one-off startup cost; it is measured and reported
+_import_started = time.perf_counter()
+from crewai import Crew, CrewOutput
 from crewai.task import TaskOutput
 from models.article_model import Artigo # Your Pydantic model
 from crew import CrewaiArtigoWikiGenerator
+CREWAI_IMPORT_SECONDS = time.perf_counter() - _import_started
+
+from crew_templates import CrewTemplates
+from research_prefetch import RESEARCH_MODES, get_research_mode, prefetch_research
+from llm_cache import cached_llm
+from article_parser import parse_article
+from article_export import export_generated_article
+from article_store import DEFAULT_PAGE_SIZE, get_article_store
+from tools.wiki_bundle import format_bundle
+from jobs import JobManager, QueueFullError
+from admission import ClientBusyError, ClientLimiter, admit_topic
+from article_cache import ArticleCache, normalize_topic
+from singleflight import SingleFlight
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, GENERATION_DURATION, GENERATIONS_IN_FLIGHT, LLM_REQUESTS, LLM_TOKENS,
+    REGISTRY, STAGE_DURATION, STARTUP_SECONDS,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+article_cache = ArticleCache()
+# Concurrent requests for the same normalized topic share one crew run
+generation_flights = SingleFlight("generation")
+# Agents, tasks and tools are built once and copied for each run
+crew_templates = CrewTemplates()
+# Concurrent generations per client; checked, like the topic, before any crew is built
+client_limiter = ClientLimiter()
+STARTUP_SECONDS.set(CREWAI_IMPORT_SECONDS, phase="crewai_import")
 
 def normalize_output(output: Any) -> Dict[str, Any]:
-    """Normalize CrewAI output to consistent dictionary format"""
+    """
+    Normalize CrewAI output to consistent dictionary format.
+
+    The crew already converts the review into `Artigo` (or a dict); only when neither
+    is available is the raw text parsed, in a single pass, by `parse_article`.
+    """
     try:
-        # Handle TaskOutput objects
-        if isinstance(output, TaskOutput):
-            output = output.raw_output
-        
-        # Handle string output that might be Python dict representation
+        # Handle CrewOutput/TaskOutput objects: prefer what CrewAI already parsed
+        if isinstance(output, (CrewOutput, TaskOutput)):
+            output = output.pydantic or output.json_dict or output.raw
+
+        # Handle string output (JSON or Python dict representation, possibly inside a ```json block)
         if isinstance(output, str):
-            output = output.strip()
-            
-            # Try to detect and convert Python dict string
-            if output.startswith(('{', '[', 'titulo=', 'paragrafos=')):
-                try:
-                    # Convert from Python dict string to actual dict
-                    import ast
-                    output = ast.literal_eval(output)
-                except (ValueError, SyntaxError):
-                    # If that fails, try as JSON
-                    try:
-                        output = json.loads(output)
-                    except json.JSONDecodeError:
-                        pass  # Keep as string
-        
+            return parse_article(output)
+
         # Handle Pydantic models
         if hasattr(output, 'model_dump'):  # Pydantic v2
             return output.model_dump()
@@ -64,70 +90,47 @@ def normalize_output(output: Any) -> Dict[str, Any]:
         logger.error(f"Normalization failed: {str(e)}")
         return {"error": f"Output normalization error: {str(e)}"}
 
+def _validate_paragraph(para: Any) -> Dict[str, Any]:
+    """Paragraph as {titulo, conteudo}; plain strings get a default title"""
+    if isinstance(para, str):
+        return {"titulo": "Parágrafo", "conteudo": para}
+    if isinstance(para, dict):
+        return {"titulo": para.get('titulo', "Parágrafo"), "conteudo": para.get('conteudo', "")}
+    # Try to convert other paragraph types
+    return {"titulo": getattr(para, 'titulo', "Parágrafo"), "conteudo": getattr(para, 'conteudo', "")}
+
 def validate_article_data(data: Dict[str, Any]) -> Dict[str, Any]:
     """Validate and complete article data structure"""
     try:
         # Handle cases where data might be a string representation
         if isinstance(data, str):
-            try:
-                data = json.loads(data)
-            except json.JSONDecodeError:
-                try:
-                    import ast
-                    data = ast.literal_eval(data)
-                except (ValueError, SyntaxError):
-                    raise ValueError("Invalid data format - could not parse as JSON or Python dict")
+            data = parse_article(data)
 
         # Ensure we have a dictionary at this point
         if not isinstance(data, dict):
             raise ValueError("Input data must be a dictionary or convertible to one")
+        if 'error' in data:
+            raise ValueError(data['error'])
 
-        # Handle raw content if present
+        # Handle raw content if present (dumped CrewOutput/TaskOutput)
         if 'raw' in data and data['raw']:
             try:
-                raw_content = data['raw'].strip()
-                if raw_content.startswith('```json') and raw_content.endswith('```'):
-                    raw_content = raw_content[7:-3].strip()
-                parsed_raw = json.loads(raw_content)
-                data = {**data, **parsed_raw}
+                data = {**data, **parse_article(data['raw'])}
                 data.pop('raw', None)
-            except json.JSONDecodeError:
+            except ValueError:
                 logger.warning("Could not parse raw content - proceeding without it")
 
-        # Set defaults
-        defaults = {
-            "titulo": data.get('titulo', "Sem Título"),
-            "topico": data.get('topico', "Tópico Desconhecido"),
-            "paragrafos": data.get('paragrafos', []),
+        # Defaults, overridden by the data
+        validated_data = {
+            "titulo": "Sem Título",
+            "topico": "Tópico Desconhecido",
+            "paragrafos": [],
             "data_criacao": datetime.now().isoformat(),
             "autor": "Artigo Multiagente IA",
-            "referencias": []
+            "referencias": [],
+            **data,
         }
-
-        # Merge with existing data
-        validated_data = {**defaults, **data}
-
-        # Ensure paragraphs have proper structure
-        validated_paragraphs = []
-        for para in validated_data['paragrafos']:
-            if isinstance(para, str):
-                validated_paragraphs.append({
-                    "titulo": "Parágrafo",
-                    "conteudo": para
-                })
-            elif isinstance(para, dict):
-                validated_paragraphs.append({
-                    "titulo": para.get('titulo', "Parágrafo"),
-                    "conteudo": para.get('conteudo', "")
-                })
-            else:
-                # Try to convert other paragraph types
-                validated_paragraphs.append({
-                    "titulo": getattr(para, 'titulo', "Parágrafo"),
-                    "conteudo": getattr(para, 'conteudo', "")
-                })
-
-        validated_data['paragrafos'] = validated_paragraphs
+        validated_data['paragrafos'] = [_validate_paragraph(para) for para in validated_data['paragrafos']]
 
         # Validate using Pydantic model
         artigo = Artigo(**validated_data)
@@ -140,14 +143,108 @@ def validate_article_data(data: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Unexpected validation error: {str(e)}")
         raise ValueError(f"Article validation failed: {str(e)}")
 
-def execute_crew_process(topic: str) -> Dict[str, Any]:
-    """Execute the CrewAI process with robust error handling"""
+def parse_flag(value: Any) -> bool:
+    """Interpret query-string/JSON flags such as ?refresh=1 or {"cache": false}"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "sim", "on")
+
+def execute_crew_process(topic: str, use_cache: bool = True, refresh: bool = False) -> Dict[str, Any]:
+    """
+    Execute the CrewAI process with robust error handling.
+
+    use_cache=False bypasses the article cache entirely (no read, no write);
+    refresh=True skips the cached entry but stores the newly generated article.
+    Concurrent calls for the same normalized topic are coalesced into one run.
+    """
+    if use_cache and not refresh:
+        cached = article_cache.get(topic)
+        if cached is not None:
+            logger.info(f"Article cache hit for: {topic}")
+            return cached
+
+    return generate_once(topic, store=use_cache or refresh)
+
+def generate_once(topic: str, store: bool, on_stage=None) -> Dict[str, Any]:
+    """
+    Run the crew for `topic`, or join the run already in flight for the same
+    normalized topic. `on_stage` receives a dict for every finished stage of that
+    run (stage, agent, duration, elapsed since the run started, output), including
+    the stages finished before this caller joined.
+
+    Runs that store their article and runs that must not (cache=0) never share a
+    flight, so a caller asking for the article to be cached always gets it cached.
+    """
+    key = normalize_topic(topic) if store else f"{normalize_topic(topic)}|nostore"
+    started = time.monotonic()
+    last_mark = [started]
+
+    # Only the leader's callback runs; followers get the stages it publishes
+    def publish_stage(output: TaskOutput) -> None:
+        now = time.monotonic()
+        generation_flights.publish(key, {
+            "stage": output.name,
+            "agent": output.agent,
+            "duration": round(now - last_mark[0], 3),
+            "elapsed": round(now - started, 3),
+            "output": output.raw,
+        })
+        last_mark[0] = now
+
+    result = generation_flights.do(
+        key,
+        lambda: _run_crew(topic, store=store, task_callback=publish_stage),
+        listener=on_stage,
+    )
+    return dict(result)
+
+def record_token_usage(crew: Any) -> None:
+    """Add the tokens each agent consumed in this run to the LLM metrics"""
+    for agent in getattr(crew, "agents", []):
+        usage = agent._token_process.get_summary()
+        LLM_TOKENS.inc(usage.prompt_tokens, agent=agent.role, type="prompt")
+        LLM_TOKENS.inc(usage.cached_prompt_tokens, agent=agent.role, type="cached_prompt")
+        LLM_TOKENS.inc(usage.completion_tokens, agent=agent.role, type="completion")
+        LLM_REQUESTS.inc(usage.successful_requests, agent=agent.role)
+
+def _run_crew(topic: str, store: bool, task_callback=None, llm=None, research_mode=None) -> Dict[str, Any]:
+    """
+    Run the crew once for `topic` and validate the article. With `store`, the article
+    is also cached, saved to the article store and exported (when EXPORT_DIR is set).
+
+    In the 'prefetch' and 'direct' research modes the Wikipedia material is fetched
+    here, before kickoff, and handed to the crew as the `research` input.
+    """
+    started = time.monotonic()
+    last_mark = [started]
+
+    def on_task_done(output: TaskOutput) -> None:
+        now = time.monotonic()
+        STAGE_DURATION.observe(now - last_mark[0], stage=output.name)
+        last_mark[0] = now
+        if task_callback is not None:
+            task_callback(output)
+
+    outcome = "error"
     try:
         logger.info(f"Starting article generation for: {topic}")
+        mode = get_research_mode(research_mode)
         
-        
-        # Initialize and execute crew
-        result = CrewaiArtigoWikiGenerator().crew().kickoff(inputs={"topic": topic})
+        with GENERATIONS_IN_FLIGHT.track_inprogress():
+            inputs = {"topic": topic}
+            if mode != "agent":
+                with STAGE_DURATION.time(stage="prefetch"):
+                    inputs["research"] = format_bundle(prefetch_research(topic))
+                last_mark[0] = time.monotonic()
+
+            # Initialize and execute crew
+            crew = crew_templates.create(
+                CrewaiArtigoWikiGenerator, task_callback=on_task_done, llm=llm, research_mode=mode
+            )
+            try:
+                result = crew.kickoff(inputs=inputs)
+            finally:
+                record_token_usage(crew)
         
         # Normalize and validate output
         print(result)
@@ -157,11 +254,50 @@ def execute_crew_process(topic: str) -> Dict[str, Any]:
         # Debug logging
         logger.debug(f"Final output structure: {json.dumps(validated, indent=2, ensure_ascii=False)}")
         
+        # Runs that must leave no trace (cache=0, replay, benchmark) skip every post-step
+        if store:
+            article_cache.set(topic, validated)
+            save_article(validated)
+            export_article(topic, validated)
+        
+        outcome = "success"
         return validated
     
     except Exception as e:
         logger.error(f"Process execution failed: {str(e)}")
         return {"error": str(e)}
+    finally:
+        GENERATION_DURATION.observe(time.monotonic() - started, outcome=outcome)
+
+def save_article(article: Dict[str, Any]) -> None:
+    """Post-step: keep every validated article in the searchable store; failures never fail the generation"""
+    try:
+        get_article_store().save(article, source="api")
+    except Exception as e:
+        logger.warning(f"Article store save failed for '{article.get('titulo')}': {str(e)}")
+
+def export_article(topic: str, article: Dict[str, Any]) -> None:
+    """Post-step: convert a new article to Markdown/HTML under EXPORT_DIR; failures never fail the generation"""
+    try:
+        outputs = export_generated_article(topic, article)
+    except Exception as e:
+        logger.warning(f"Article export failed for '{topic}': {str(e)}")
+        return
+    if outputs:
+        logger.info(f"Article exported: {', '.join(outputs.values())}")
+
+def client_id() -> str:
+    """Key of the per-client concurrency limit (behind a reverse proxy, apply ProxyFix so this is the real client)"""
+    return request.remote_addr or "unknown"
+
+def client_busy_response():
+    """429 for a client that already has its maximum number of generations running"""
+    response = jsonify({
+        "error": "Muitas gerações simultâneas para este cliente, aguarde as anteriores terminarem",
+        "limit": client_limiter.max_per_client,
+    })
+    response.status_code = 429
+    return response
 
 @app.route("/generate_article", methods=["GET"])
 def generate_article():
@@ -169,26 +305,272 @@ def generate_article():
         topic = request.args.get('topic', '').strip()
         if not topic:
             return jsonify({"error": "O parâmetro 'topic' é obrigatório"}), 400
+        topic = admit_topic(topic)
         
         # Initialize the generator
-        result = execute_crew_process(topic)
+        with client_limiter.slot(client_id()):
+            result = execute_crew_process(
+                topic,
+                use_cache=parse_flag(request.args.get('cache', '1')),
+                refresh=parse_flag(request.args.get('refresh', '0')),
+            )
         
         return jsonify(result)
         
+    except ClientBusyError:
+        return client_busy_response()
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": f"Erro interno: {str(e)}"}), 500
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_generation(topic: str, use_cache: bool = True, refresh: bool = False, keepalive: float = 15.0,
+                      on_done=None):
+    """
+    Yield SSE messages while the crew runs: `start`, one `stage` per finished task
+    (research_task, reporting_task, review_task) with its timing and output, then
+    `result` with the validated article or `error`.
+
+    Like /generate_article, a stream for a topic already being generated joins that
+    run (see `generate_once`): it replays the stages finished so far, then follows it.
+
+    `on_done` is called once the generation is over: when the crew thread finishes,
+    even if the client disconnected long before, or when the stream ends without
+    starting one (cache hit, disconnect before the crew started).
+    """
+    handed_off = False
+    try:
+        started = time.monotonic()
+        yield sse_event("start", {"topic": topic})
+
+        if use_cache and not refresh:
+            cached = article_cache.get(topic)
+            if cached is not None:
+                yield sse_event("result", {"article": cached, "cached": True, "elapsed": 0.0})
+                return
+
+        events: "queue.Queue" = queue.Queue()
+
+        def run() -> None:
+            try:
+                result = generate_once(topic, store=use_cache or refresh,
+                                       on_stage=lambda stage: events.put(("stage", stage)))
+                elapsed = round(time.monotonic() - started, 3)
+                if "error" in result:
+                    events.put(("error", {"error": result["error"], "elapsed": elapsed}))
+                else:
+                    events.put(("result", {"article": result, "cached": False, "elapsed": elapsed}))
+            finally:
+                if on_done is not None:
+                    on_done()
+
+        threading.Thread(target=run, name="crew-stream", daemon=True).start()
+        handed_off = True
+
+        while True:
+            try:
+                event, data = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keep-alive\n\n"  # Keeps proxies/load balancers from closing the connection
+                continue
+            yield sse_event(event, data)
+            if event in ("result", "error"):
+                return
+    finally:
+        if not handed_off and on_done is not None:
+            on_done()
+
+@app.route("/generate_article/stream", methods=["GET"])
+def generate_article_stream():
+    """Streaming variant of /generate_article using Server-Sent Events"""
+    topic = request.args.get('topic', '').strip()
+    if not topic:
+        return jsonify({"error": "O parâmetro 'topic' é obrigatório"}), 400
+    try:
+        topic = admit_topic(topic)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    client = client_id()
+    try:
+        client_limiter.acquire(client)
+    except ClientBusyError:
+        return client_busy_response()
+
+    # The slot is held until the crew finishes, not until the client goes away:
+    # disconnecting does not stop the generation, so it must keep counting
+    events = stream_generation(
+        topic,
+        use_cache=parse_flag(request.args.get('cache', '1')),
+        refresh=parse_flag(request.args.get('refresh', '0')),
+        on_done=lambda: client_limiter.release(client),
+    )
+    response = Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+    def release_if_never_started() -> None:
+        # A client gone before the first event never runs the generator, nor its on_done
+        if inspect.getgeneratorstate(events) == inspect.GEN_CREATED:
+            client_limiter.release(client)
 
+    response.call_on_close(release_if_never_started)
+    return response
+
+
+# Background generation: bounded worker pool with a limited queue
+job_manager = JobManager(
+    execute_crew_process,
+    max_workers=int(os.environ.get("JOB_WORKERS", 2)),
+    max_queue=int(os.environ.get("JOB_QUEUE_DEPTH", 20)),
+)
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Queue an article generation and return its job id immediately"""
+    payload = request.get_json(silent=True) or {}
+    topic = str(payload.get('topic') or request.values.get('topic', '')).strip()
+    if not topic:
+        return jsonify({"error": "O parâmetro 'topic' é obrigatório"}), 400
+    try:
+        topic = admit_topic(topic)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    options = {
+        "use_cache": parse_flag(payload.get('cache', request.values.get('cache', '1'))),
+        "refresh": parse_flag(payload.get('refresh', request.values.get('refresh', '0'))),
+    }
+
+    client = client_id()
+    try:
+        client_limiter.acquire(client)
+    except ClientBusyError:
+        return client_busy_response()
+
+    try:
+        job = job_manager.submit(topic, options, on_done=lambda: client_limiter.release(client))
+    except QueueFullError:
+        client_limiter.release(client)
+        response = jsonify({
+            "error": "Fila de geração cheia, tente novamente mais tarde",
+            "queue_depth": job_manager.queue_depth(),
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(job_manager.retry_after())
+        return response
+
+    response = jsonify({"job_id": job["id"], "status": job["status"], "topic": topic})
+    response.status_code = 202
+    response.headers['Location'] = f"/jobs/{job['id']}"
+    return response
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """Return the status of a job and, once finished, its article or error"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job não encontrado"}), 404
+    return jsonify(job)
+
+def page_limit() -> int:
+    """The ?limit= of the article listings (ValueError if it is not an integer)"""
+    try:
+        return int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("O parâmetro 'limit' deve ser um número inteiro")
+
+@app.route("/articles", methods=["GET"])
+def list_articles():
+    """Stored articles, most recently updated first, one page per `next_cursor`"""
+    try:
+        page = get_article_store().list(
+            limit=page_limit(), cursor=request.args.get('cursor'), topic=request.args.get('topic'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
+
+@app.route("/articles/search", methods=["GET"])
+def search_articles():
+    """Full-text search over the stored articles (title, topic, paragraphs and references)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "O parâmetro 'q' é obrigatório"}), 400
+    try:
+        page = get_article_store().search(query, limit=page_limit(), cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page)
+
+@app.route("/articles/<int:article_id>", methods=["GET"])
+def get_article(article_id: int):
+    """One stored article with its id and timestamps"""
+    article = get_article_store().get(article_id)
+    if article is None:
+        return jsonify({"error": "Artigo não encontrado"}), 404
+    return jsonify(article)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus scrape endpoint: stage durations, Wikipedia calls, LLM tokens and in-flight runs"""
+    return Response(REGISTRY.render(), headers={"Content-Type": METRICS_CONTENT_TYPE})
 
 
 @app.after_request
 def add_headers(response):
     """Ensure proper content type and encoding"""
-    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    if response.mimetype == 'text/event-stream':
+        response.headers['Content-Type'] = 'text/event-stream; charset=utf-8'
+    elif response.mimetype != 'text/plain':  # /metrics keeps the Prometheus text format
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
     return response
 
+def warm_up() -> Dict[str, float]:
+    """Build the crew template before serving, and report the one-off startup costs"""
+    template_seconds = crew_templates.warm_up(CrewaiArtigoWikiGenerator, research_mode=get_research_mode())
+    STARTUP_SECONDS.set(template_seconds, phase="crew_template")
+    startup = {"crewai_import_seconds": round(CREWAI_IMPORT_SECONDS, 3), "crew_template_seconds": round(template_seconds, 3)}
+    logger.info(f"Startup costs: {startup}")
+    return startup
+
+def run():
+    """Start the Flask API (entry point of the `run_crew` script)"""
+    warm_up()
+    app.run(host="0.0.0.0", port=5000, debug=True)
+
+def replay(argv=None) -> int:
+    """
+    Regenerate articles from recorded LLM completions only (entry point of the `replay` script).
+
+    The crew runs with the LLM cache in strict replay mode: no model is called and
+    a prompt without a recorded completion fails the topic. Completions are recorded
+    by any run with LLM_CACHE=on; the Wikipedia material must match that run (it is
+    served from the Wikipedia cache while the entries are valid).
+    """
+    parser = argparse.ArgumentParser(
+        description="Gera artigos novamente usando apenas respostas do LLM já gravadas (LLM_CACHE=on)"
+    )
+    parser.add_argument("topics", nargs="+", help="tópicos a reproduzir")
+    parser.add_argument("--research-mode", choices=RESEARCH_MODES,
+                        help="modo de pesquisa usado na gravação (padrão: RESEARCH_MODE)")
+    parser.add_argument("--cache-path", help="arquivo do cache de respostas do LLM (padrão: LLM_CACHE_PATH)")
+    args = parser.parse_args(argv)
+
+    llm = cached_llm(mode="replay", path=args.cache_path)
+    failures = 0
+    for topic in args.topics:
+        result = _run_crew(topic, store=False, llm=llm, research_mode=args.research_mode)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        failures += "error" in result
+    return 1 if failures else 0
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    run()
\ No newline at end of file
@@ -0,0 +1,265 @@
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric(abc.ABC):
+    """Base of the in-process metrics: one value (or histogram) per label combination"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of the metric (caller holds the lock)"""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class _Value(_Metric):
+    """Single number per label combination, shared by counters and gauges"""
+
+    def _add(self, amount: float, labels: Dict[str, object]) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Counter(_Value):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"{self.name} is a counter and can only increase (got {amount})")
+        self._add(amount, labels)
+
+
+class Gauge(_Value):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self._add(-amount, labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        """Increment while the block runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, plus their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            state["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block in seconds"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def sum(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["sum"] if state else 0.0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, hits in zip(self.buckets + (float("inf"),), state["buckets"]):
+                cumulative += hits
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Metrics are per process: with several gunicorn workers, scrape each worker
+# (or aggregate in Prometheus) rather than expecting one global view.
+REGISTRY = Registry()
+
+STAGE_BUCKETS = (1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+
+STAGE_DURATION = REGISTRY.histogram(
+    "article_stage_duration_seconds", "Duration of each crew task", ["stage"], buckets=STAGE_BUCKETS
+)
+GENERATION_DURATION = REGISTRY.histogram(
+    "article_generation_duration_seconds", "Duration of a full crew run", ["outcome"], buckets=STAGE_BUCKETS
+)
+GENERATIONS_IN_FLIGHT = REGISTRY.gauge(
+    "article_generations_in_flight", "Crew runs currently executing in this process"
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens consumed, per agent and token type", ["agent", "type"]
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Successful LLM requests, per agent", ["agent"]
+)
+LLM_CACHE_LOOKUPS = REGISTRY.counter(
+    "llm_completion_cache_lookups_total", "LLM completion cache lookups (hit or miss)", ["result"]
+)
+REVIEW_OUTPUT_REJECTED = REGISTRY.counter(
+    "review_output_rejected_total", "Reviewer responses rejected as unparseable, while streaming or complete",
+    ["phase"]
+)
+CONTEXT_TOKENS = REGISTRY.counter(
+    "context_compaction_tokens_total", "Estimated context tokens before and after compaction, per stage",
+    ["stage", "kind"]
+)
+CREW_CONSTRUCTION = REGISTRY.histogram(
+    "crew_construction_seconds", "Time to prepare a crew for one run", ["mode"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "app_startup_seconds", "One-off startup cost per phase (crewai import, crew template)", ["phase"]
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "admission_rejected_total", "Requests rejected before any crew was built, per reason", ["reason"]
+)
+TOPIC_VALIDATION_SECONDS = REGISTRY.histogram(
+    "topic_validation_seconds", "Time to normalize and validate a requested topic",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+WIKIPEDIA_ATTEMPTS = REGISTRY.counter(
+    "wikipedia_request_attempts_total", "HTTP attempts against the Wikipedia API", ["mode"]
+)
+WIKIPEDIA_RETRIES = REGISTRY.counter(
+    "wikipedia_request_retries_total", "Attempts that were retried after a failure", ["mode"]
+)
+WIKIPEDIA_FAILURES = REGISTRY.counter(
+    "wikipedia_request_failures_total", "Wikipedia API calls that gave up without a response", ["mode"]
+)
+WIKIPEDIA_RATE_LIMIT_WAIT = REGISTRY.histogram(
+    "wikipedia_rate_limit_wait_seconds", "Time each Wikipedia request waited for the shared rate limiter",
+    ["mode"], buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+WIKIPEDIA_THROTTLED = REGISTRY.counter(
+    "wikipedia_throttled_total", "Wikipedia responses that asked to slow down (Retry-After)", ["mode"]
+)
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    "singleflight_calls_total", "Callers that started an execution or joined one already in flight",
+    ["flight", "result"]
+)
+WIKIPEDIA_CACHE_LOOKUPS = REGISTRY.counter(
+    "wikipedia_tool_cache_lookups_total", "Wikipedia tool result cache lookups", ["result"]
+)
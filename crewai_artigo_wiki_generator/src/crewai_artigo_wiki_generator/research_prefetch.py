@@ -0,0 +1,55 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from tools.wiki_cache import get_shared_cache
+from tools.wikipedia_tool import WikipediaTool
+
+# agent: the researcher queries `wikipedia_tool` in its own loop (one LLM call per step)
+# prefetch: the material is fetched in code and the researcher only summarizes it (one call)
+# direct: the material goes straight to the writer, without a research stage
+RESEARCH_MODES = ("agent", "prefetch", "direct")
+DEFAULT_RELATED_PAGES = 4
+BUNDLE_CACHE_NAMESPACE = "research_bundle"
+
+
+def get_research_mode(mode: Optional[str] = None) -> str:
+    """Validated research mode: the argument, else RESEARCH_MODE, else 'agent'"""
+    mode = (mode or os.environ.get("RESEARCH_MODE") or "agent").strip().lower()
+    if mode not in RESEARCH_MODES:
+        raise ValueError(f"Modo de pesquisa inválido: '{mode}' (use {', '.join(RESEARCH_MODES)})")
+    return mode
+
+
+def prefetch_research(topic: str, tool: Optional[WikipediaTool] = None,
+                      related_pages: Optional[int] = None, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Fetch the research bundle for the topic without an agent: the full article split
+    into sections plus the intros of the linked pages it cites first (see
+    `WikipediaTool.fetch_bundle`). Complete bundles are kept in the shared Wikipedia
+    cache; fallbacks and bundles missing a request that failed are not.
+    """
+    tool = tool or WikipediaTool()
+    if related_pages is None:
+        related_pages = int(os.environ.get("RESEARCH_RELATED_PAGES", DEFAULT_RELATED_PAGES))
+    query = tool._parse_query_input(topic) or topic
+    cache = get_shared_cache(BUNDLE_CACHE_NAMESPACE)
+    cache_key = f"{query}|{related_pages}"
+    fingerprint = tool._source_fingerprint()
+    if fingerprint:
+        # Offline backend and local indexes keep their own bundles, as in the tool's cache
+        cache_key = f"{cache_key}|fonte:{fingerprint}"
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+    bundle = tool.fetch_bundle(query, related_pages=related_pages)
+    if bundle is None:
+        # Same last resort as the agent's tool: local/API search over the text
+        bundle = {"query": query, "title": None, "text": tool._try_search_api(query), "sections": [], "related": []}
+    bundle["topic"] = topic
+
+    if use_cache and bundle["title"] is not None and bundle.get("complete"):
+        cache.set(cache_key, json.dumps(bundle, ensure_ascii=False))
+    return bundle
@@ -0,0 +1,88 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from metrics import SINGLEFLIGHT_CALLS
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+        self.progress: List[Any] = []
+        self.listeners: List[Callable[[Any], None]] = []
+
+
+class SingleFlight:
+    """
+    In-process request coalescing: concurrent callers with the same key wait on
+    a single execution of `fn` and all receive its result (or its exception).
+
+    While it runs, the execution can `publish` progress items for its key; a caller
+    passing `listener` receives every item published so far, then each new one.
+    Executions and coalesced callers are counted in `singleflight_calls_total`
+    under `name`.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any], listener: Optional[Callable[[Any], None]] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executions"] += 1
+                leader = True
+            SINGLEFLIGHT_CALLS.inc(flight=self.name, result="executed" if leader else "coalesced")
+            if listener is not None:
+                # Replayed under the lock, so no item is missed or delivered twice
+                for item in call.progress:
+                    listener(item)
+                call.listeners.append(listener)
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def publish(self, key: str, item: Any) -> None:
+        """Hand a progress item of the running execution to its current and future listeners"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                return
+            call.progress.append(item)
+            for listener in call.listeners:
+                listener(item)
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently executing"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,12 @@
+import pytest
+
+"""
+Configuração comum dos testes: nada é gravado nos bancos e pastas reais do usuário.
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_article_outputs(tmp_path, monkeypatch):
+    """Banco de artigos e exportação em pastas temporárias, para qualquer geração feita nos testes"""
+    monkeypatch.setenv("ARTICLE_STORE_PATH", str(tmp_path / "articles.sqlite3"))
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path / "export"))
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from unittest.mock import MagicMock
+
+import main
+from admission import ClientBusyError, ClientLimiter, admit_topic, validate_topic
+from metrics import ADMISSION_REJECTED
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes da admissão de requisições: validação linear do tópico e limite de gerações por cliente.
+"""
+
+
+@pytest.mark.parametrize("topic", ["Saúde", "Guerra Fria", "Cancan", "ONU", "Inteligência artificial", "Rio 2016"])
+def test_accepts_real_topics(topic):
+    validate_topic(topic)
+
+
+@pytest.mark.parametrize("topic", ["", "a", "12345", "!!!", "awdawdawd", "abcabcabc", "kkkkkk rs", "x" * 201])
+def test_rejects_garbage_topics(topic):
+    with pytest.raises(ValueError):
+        validate_topic(topic)
+
+
+def test_validation_is_linear_on_long_inputs(monkeypatch):
+    monkeypatch.setenv("TOPIC_MAX_CHARS", "1000000")
+    topic = "ab" * 100000 + "c"
+    started = time.perf_counter()
+    validate_topic(topic)
+    with pytest.raises(ValueError):
+        validate_topic("abc" * 100000)
+    assert time.perf_counter() - started < 2
+
+
+def test_admission_shares_the_tool_normalization():
+    raw = "Intelig%C3%AAncia   artificial!?"
+    assert admit_topic(raw) == "Inteligência artificial"
+    assert WikipediaTool()._normalize_query(raw) == admit_topic(raw).title()
+
+
+def test_client_limiter_caps_concurrent_generations():
+    limiter = ClientLimiter(max_per_client=2)
+    limiter.acquire("a")
+    with limiter.slot("a"):
+        with pytest.raises(ClientBusyError):
+            limiter.acquire("a")
+        limiter.acquire("b")
+    assert (limiter.active("a"), limiter.active("b")) == (1, 1)
+    assert ClientLimiter(max_per_client=0).acquire("a") is None
+
+
+def test_endpoints_reject_before_building_a_crew(monkeypatch):
+    run = MagicMock(return_value={"titulo": "x"})
+    monkeypatch.setattr(main, "execute_crew_process", run)
+    monkeypatch.setattr(main.crew_templates, "create", MagicMock())
+    client = main.app.test_client()
+    rejected = ADMISSION_REJECTED.value(reason="invalid_topic")
+
+    assert client.get("/generate_article?topic=awdawdawd").status_code == 400
+    assert client.get("/generate_article/stream?topic=12345").status_code == 400
+    assert client.post("/jobs", json={"topic": "!!!"}).status_code == 400
+    assert ADMISSION_REJECTED.value(reason="invalid_topic") == rejected + 3
+    run.assert_not_called()
+    main.crew_templates.create.assert_not_called()
+
+    assert client.get("/generate_article?topic=Sa%C3%BAde!").status_code == 200
+    run.assert_called_once_with("Saúde", use_cache=True, refresh=False)
+
+
+def test_busy_client_gets_429_and_stream_releases_its_slot(monkeypatch):
+    limiter = ClientLimiter(max_per_client=1)
+    monkeypatch.setattr(main, "client_limiter", limiter)
+    monkeypatch.setattr(main, "execute_crew_process", MagicMock(return_value={"titulo": "x"}))
+
+    def fake_stream(topic, on_done, **options):
+        try:
+            yield "event: result\ndata: {}\n\n"
+        finally:
+            on_done()
+
+    monkeypatch.setattr(main, "stream_generation", fake_stream)
+    client = main.app.test_client()
+
+    limiter.acquire("127.0.0.1")
+    assert client.get("/generate_article?topic=Saúde").status_code == 429
+    assert client.get("/generate_article/stream?topic=Saúde").status_code == 429
+    busy = ADMISSION_REJECTED.value(reason="client_concurrency")
+    limiter.release("127.0.0.1")
+
+    response = client.get("/generate_article/stream?topic=Saúde")
+    assert response.get_data(as_text=True).startswith("event: result")
+    response.close()
+    assert limiter.active("127.0.0.1") == 0
+    assert ADMISSION_REJECTED.value(reason="client_concurrency") == busy
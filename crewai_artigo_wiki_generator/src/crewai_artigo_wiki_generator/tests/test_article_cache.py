@@ -0,0 +1,75 @@
+import os
+
+import pytest
+from unittest.mock import patch
+import main
+from article_cache import ArticleCache, ConfigFingerprint, normalize_topic
+from tools.wiki_cache import TwoTierCache
+
+"""
+Testes do cache de artigos validados usado por execute_crew_process.
+"""
+
+ARTIGO = {
+    "titulo": "Saúde",
+    "topico": "Saúde",
+    "data_criacao": "2025-04-18T15:30:00",
+    "autor": "MultiAgente AI",
+    "paragrafos": [{"titulo": "Resumo", "conteudo": "Texto"}],
+    "referencias": [],
+}
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    for name in ("agents.yaml", "tasks.yaml"):
+        (tmp_path / name).write_text(f"# {name}\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def article_cache(config_dir, monkeypatch):
+    cache = ArticleCache(TwoTierCache(path=None), ConfigFingerprint(config_dir=str(config_dir)))
+    monkeypatch.setattr(main, "article_cache", cache)
+    return cache
+
+
+def test_normalize_topic():
+    assert normalize_topic("  Sa%C3%BAde   Pública ") == normalize_topic("saúde pública")
+
+
+def test_prompt_edit_invalidates_entries(article_cache, config_dir):
+    article_cache.set("Saúde", ARTIGO)
+    assert article_cache.get("saúde") == ARTIGO
+
+    tasks = config_dir / "tasks.yaml"
+    tasks.write_text("# prompt alterado\n", encoding="utf-8")
+    os.utime(tasks, ns=(1, 1))
+    assert article_cache.get("Saúde") is None
+
+
+@pytest.mark.parametrize("key, value", [
+    ("RESEARCH_MODE", "prefetch"), ("CONTEXT_TOKEN_BUDGET", "400"), ("WIKI_BUNDLE_PAGES", "3"),
+])
+def test_research_settings_invalidate_entries(article_cache, monkeypatch, key, value):
+    monkeypatch.delenv(key, raising=False)
+    article_cache.set("Saúde", ARTIGO)
+    monkeypatch.setenv(key, value)
+    assert article_cache.get("Saúde") is None
+
+
+@patch.object(main, "CrewaiArtigoWikiGenerator")
+def test_execute_crew_process_uses_cache_and_flags(mocked_generator, article_cache):
+    mocked_generator.return_value.crew.return_value.kickoff.return_value = dict(ARTIGO)
+    kickoff = mocked_generator.return_value.crew.return_value.kickoff
+
+    first = main.execute_crew_process("Saúde")
+    second = main.execute_crew_process("saúde")
+    assert first == second
+    assert kickoff.call_count == 1
+
+    main.execute_crew_process("Saúde", refresh=True)
+    assert kickoff.call_count == 2
+
+    main.execute_crew_process("Saúde", use_cache=False)
+    assert kickoff.call_count == 3
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+import main
+from article_export import MANIFEST_NAME, export_generated_article, render_html, render_markdown, run_export
+
+"""
+Testes da exportação incremental dos artigos para Markdown ABNT e HTML.
+"""
+
+ARTICLE = {
+    "titulo": "Saúde &amp; bem-estar",
+    "topico": "Saúde",
+    "data_criacao": "2024-05-01T10:00:00",
+    "autor": "Artigo Multiagente IA",
+    "paragrafos": [
+        {"titulo": "Resumo", "conteudo": "Um resumo."},
+        {"titulo": "Introdução", "conteudo": "Primeiro bloco.\n\nSegundo <bloco>."},
+        {"titulo": "História", "conteudo": "Texto."},
+    ],
+    "referencias": ["WIKIPEDIA. Saúde", "https://pt.wikipedia.org/wiki/Saúde"],
+}
+
+
+def write_articles(directory, count):
+    os.makedirs(directory, exist_ok=True)
+    for index in range(count):
+        with open(os.path.join(directory, f"artigo_{index}.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(ARTICLE, topico=str(index)), f, ensure_ascii=False)
+
+
+def test_markdown_keeps_the_abnt_layout():
+    markdown = "".join(render_markdown(ARTICLE))
+    assert markdown.startswith("# SAÚDE & BEM-ESTAR\n\n**Autor:** IA, Artigo Multiagente\n\n**Data:** 01/05/2024\n\n---\n\n")
+    assert "## RESUMO\n\nUm resumo.\n\n**Palavras-chave:**" in markdown
+    assert "## 1 INTRODUÇÃO\n\n" in markdown and "### História\n\nTexto.\n\n" in markdown
+    assert "- WIKIPEDIA. Saúde.\n- Disponível em: <https://pt.wikipedia.org/wiki/Saúde>. Acesso em: [data].\n" in markdown
+    assert markdown.endswith("\n\n---\n")
+
+
+def test_html_escapes_content_and_splits_blocks():
+    page = "".join(render_html(ARTICLE))
+    assert "<h1>SAÚDE &amp; BEM-ESTAR</h1>" in page
+    assert "<p>Primeiro bloco.</p>\n<p>Segundo &lt;bloco&gt;.</p>" in page
+    assert "<h3>História</h3>" in page and page.endswith("</html>\n")
+
+
+def test_only_changed_articles_are_converted_again(tmp_path):
+    source_dir, output_dir = str(tmp_path / "json"), str(tmp_path / "saida")
+    write_articles(source_dir, 6)
+    with open(os.path.join(source_dir, "_batch_log.jsonl"), "w") as f:
+        f.write("{}\n")
+
+    first = run_export([source_dir], output_dir=output_dir, workers=2)
+    assert (first["converted"], first["unchanged"], first["failed"]) == (6, 0, 0)
+    assert first["articles_per_second"] > 0
+    assert os.path.exists(os.path.join(output_dir, "artigo_0_ABNT.md"))
+    assert os.path.exists(os.path.join(output_dir, "artigo_5.html"))
+
+    second = run_export([source_dir], output_dir=output_dir, workers=2)
+    assert (second["converted"], second["unchanged"]) == (0, 6)
+
+    write_articles(os.path.join(str(tmp_path), "novo"), 1)
+    os.replace(os.path.join(str(tmp_path), "novo", "artigo_0.json"), os.path.join(source_dir, "artigo_1.json"))
+    os.remove(os.path.join(output_dir, "artigo_2.html"))
+    with open(os.path.join(source_dir, "artigo_3.json"), "w") as f:
+        f.write("{quebrado")
+    third = run_export([source_dir], output_dir=output_dir, workers=2)
+    assert (third["converted"], third["unchanged"], third["failed"]) == (2, 3, 1)
+    assert list(third["errors"]) == [os.path.join(source_dir, "artigo_3.json")]
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        assert len(json.load(f)["files"]) == 5
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        run_export([str(tmp_path)], output_dir=str(tmp_path / "saida"), formats=["pdf"])
+
+
+def test_api_post_step_exports_new_articles(tmp_path, monkeypatch):
+    monkeypatch.delenv("EXPORT_DIR", raising=False)
+    assert export_generated_article("Saúde", ARTICLE) is None
+
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    monkeypatch.setenv("EXPORT_FORMATS", "md")
+    outputs = export_generated_article("Saúde", ARTICLE)
+    assert outputs == {"md": os.path.join(str(tmp_path), "edicao-final", "artigo_Saúde_ABNT.md")}
+    assert os.path.exists(os.path.join(str(tmp_path), "json", "artigo_Saúde.json"))
+
+    # Uma falha na exportação não derruba a geração
+    monkeypatch.setattr(main, "export_generated_article", lambda topic, article: 1 / 0)
+    main.export_article("Saúde", ARTICLE)
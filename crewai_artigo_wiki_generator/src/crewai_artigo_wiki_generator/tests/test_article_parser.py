@@ -0,0 +1,128 @@
+import json
+
+import pytest
+from crewai import CrewOutput
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+from article_parser import ArticleOutputGuard, ArticleParser, HopelessOutputError, parse_article
+from benchmark import parse_benchmark
+from main import normalize_output, validate_article_data
+from metrics import REVIEW_OUTPUT_REJECTED
+from models.article_model import Artigo
+
+"""
+Testes do extrator incremental da saída do revisor e da interrupção de respostas sem conserto.
+"""
+
+ARTICLE = {
+    "titulo": "Artigo sobre: Saúde",
+    "topico": "Saúde",
+    "paragrafos": [{"titulo": "Introdução", "conteudo": "A saúde é um \"estado\" de bem-estar.\nFim."}],
+    "referencias": ["WIKIPEDIA. Saúde."],
+}
+OUTPUT = "Thought: I now know the final answer\nFinal Answer: ```json\n" + json.dumps(ARTICLE, ensure_ascii=False) + "\n```"
+
+
+class StreamingLLM(BaseLLM):
+    """Emite a resposta em pedaços como o LLM do CrewAI, que devolve o parcial se o stream falhar"""
+
+    def __init__(self, response: str, chunk_size: int = 8):
+        super().__init__(model="stream-llm")
+        self.response = response
+        self.chunk_size = chunk_size
+        self.sent = 0
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None):
+        received = ""
+        try:
+            for start in range(0, len(self.response), self.chunk_size):
+                chunk = self.response[start:start + self.chunk_size]
+                received += chunk
+                self.sent += len(chunk)
+                crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=chunk))
+        except Exception:
+            pass
+        return received
+
+
+def test_parses_in_one_pass_with_any_chunking():
+    assert parse_article(OUTPUT) == ARTICLE
+    for size in (1, 3, 64):
+        parser = ArticleParser()
+        results = [parser.feed(OUTPUT[start:start + size]) for start in range(0, len(OUTPUT), size)]
+        assert parser.close() == ARTICLE and results[-1] == ARTICLE
+
+
+def test_accepts_python_literals_and_plain_paragraphs():
+    text = "{'titulo': 'O \\'A\\'', 'topico': 'A', 'paragrafos': ['texto', {'conteudo': 'c'},], 'extra': None, 'ok': True}"
+    assert parse_article(text) == {
+        "titulo": "O 'A'", "topico": "A", "extra": None, "ok": True,
+        "paragrafos": [{"titulo": "Parágrafo", "conteudo": "texto"}, {"titulo": "Parágrafo", "conteudo": "c"}],
+    }
+
+
+@pytest.mark.parametrize("text", [
+    '{"titulo": "A", "paragrafos": "um texto corrido que nunca vira lista',
+    '{"titulo": ["A"',
+    '{"paragrafos": [{"titulo": "sem conteúdo"}',
+    '{"titulo": "A"]',
+    "Desculpe, não consigo gerar o artigo. " * 100,
+])
+def test_hopeless_output_is_rejected_early(text):
+    parser = ArticleParser(max_preamble=500)
+    with pytest.raises(HopelessOutputError):
+        for start in range(0, len(text), 16):
+            parser.feed(text[start:start + 16])
+    assert parser.chars < len(text) or len(text) < 100
+
+
+def test_truncated_output_is_not_an_article():
+    parser = ArticleParser()
+    assert parser.feed(OUTPUT[:60]) is None
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_guard_interrupts_hopeless_stream():
+    rejected = REVIEW_OUTPUT_REJECTED.value(phase="stream")
+    hopeless = 'Final Answer: {"titulo": "A", "paragrafos": "' + "texto " * 2000
+    llm = StreamingLLM(hopeless)
+    with pytest.raises(HopelessOutputError):
+        ArticleOutputGuard(llm).call("revise")
+    assert llm.sent < 100 < len(hopeless)
+    assert REVIEW_OUTPUT_REJECTED.value(phase="stream") == rejected + 1
+
+    good = StreamingLLM(OUTPUT)
+    assert ArticleOutputGuard(good).call("revise") == OUTPUT
+
+
+def test_guard_checks_complete_output_without_streaming():
+    class PlainLLM(StreamingLLM):
+        def call(self, messages, tools=None, callbacks=None, available_functions=None):
+            return self.response
+
+    rejected = REVIEW_OUTPUT_REJECTED.value(phase="complete")
+    assert ArticleOutputGuard(PlainLLM(OUTPUT)).call("revise") == OUTPUT
+    with pytest.raises(HopelessOutputError):
+        ArticleOutputGuard(PlainLLM('{"titulo": {"texto": "A"}}')).call("revise")
+    assert REVIEW_OUTPUT_REJECTED.value(phase="complete") == rejected + 1
+
+
+def test_normalize_uses_the_crew_parsed_article():
+    artigo = Artigo(**ARTICLE)
+    output = CrewOutput(raw="não é JSON", pydantic=artigo)
+    assert normalize_output(output) == artigo.model_dump()
+    assert normalize_output(CrewOutput(raw=OUTPUT))["titulo"] == "Artigo sobre: Saúde"
+
+    validated = validate_article_data(OUTPUT)
+    assert validated["paragrafos"] == ARTICLE["paragrafos"] and validated["autor"] == "Artigo Multiagente IA"
+    with pytest.raises(ValueError):
+        validate_article_data(normalize_output("Desculpe, não consigo."))
+
+
+def test_parse_benchmark_reports_large_payload_timings():
+    result = parse_benchmark(paragraphs=20, repeat=1)
+    assert result["payload_chars"] > 30000
+    assert result["parse_seconds"] > 0 and result["parse_streamed_seconds"] > 0
+    assert result["hopeless_rejected_after_chars"] < 1000
@@ -0,0 +1,140 @@
+import json
+import os
+
+import pytest
+from unittest.mock import patch
+
+import main
+from article_cache import ArticleCache
+from article_export import render_markdown, write_chunks_atomic
+from article_store import ArticleStore, get_article_store, import_articles, parse_abnt_markdown
+from tools.wiki_cache import TwoTierCache
+
+"""
+Testes do banco de artigos (SQLite + FTS5): paginação, busca textual, importação e endpoints.
+"""
+
+ARTICLE = {
+    "titulo": "Guerra Fria: Origens e Consequências",
+    "topico": "Guerra Fria",
+    "data_criacao": "2024-05-01T00:00:00",
+    "autor": "Artigo Multiagente IA",
+    "paragrafos": [
+        {"titulo": "Resumo", "conteudo": "Disputa entre Estados Unidos e União Soviética."},
+        {"titulo": "Introdução", "conteudo": "A corrida espacial marcou o período.\n\nE a corrida armamentista."},
+        {"titulo": "Bloco Soviético", "conteudo": "O Pacto de Varsóvia reuniu os aliados."},
+    ],
+    "referencias": ["WIKIPEDIA. Guerra Fria", "https://pt.wikipedia.org/wiki/Guerra_Fria"],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArticleStore(str(tmp_path / "articles.sqlite3"))
+
+
+def article(index, topico="Saúde", **fields):
+    return dict(ARTICLE, titulo=f"Artigo {index}", topico=topico, **fields)
+
+
+def test_keyset_pages_cover_every_article_once(store):
+    for index in range(7):
+        store.save(article(index, topico="Saúde" if index % 2 else "Rio Amazonas"), timestamp=1000 + index)
+
+    seen, cursor = [], None
+    while True:
+        page = store.list(limit=3, cursor=cursor)
+        seen.extend(a["titulo"] for a in page["articles"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"Artigo {index}" for index in reversed(range(7))]
+    by_topic = store.list(topic="rio  AMAZONAS")["articles"]
+    assert [a["titulo"] for a in by_topic] == ["Artigo 6", "Artigo 4", "Artigo 2", "Artigo 0"]
+    with pytest.raises(ValueError):
+        store.list(cursor="abc")
+
+
+def test_saving_the_same_title_replaces_and_keeps_creation_time(store):
+    first = store.save(article(1), timestamp=1000)
+    second = store.save(article(1, autor="Outro"), timestamp=2000)
+    assert first == second and store.count() == 1
+
+    stored = store.get(first)
+    assert stored["autor"] == "Outro" and stored["paragrafos"] == ARTICLE["paragrafos"]
+    assert stored["created_at"] < stored["updated_at"]
+    assert len(store.search("Varsovia")["articles"]) == 1
+    assert store.get(999) is None
+
+
+def test_search_ignores_accents_and_operators(store):
+    store.save(ARTICLE)
+    for index in range(4):
+        store.save(article(index, paragrafos=[{"titulo": "Resumo", "conteudo": f"Saúde pública número {index}."}]))
+
+    result = store.search("uniao sovietica")
+    assert [a["titulo"] for a in result["articles"]] == [ARTICLE["titulo"]]
+    assert "[União] [Soviética]" in result["articles"][0]["trecho"]
+
+    first = store.search("saude", limit=3)
+    second = store.search("saude", limit=3, cursor=first["next_cursor"])
+    assert len(first["articles"]) == 3 and len(second["articles"]) == 1 and second["next_cursor"] is None
+    # Aspas e parênteses não quebram a consulta; operadores viram palavras comuns
+    assert store.search('"saude" (') == store.search("saude")
+    assert store.search("saude NOT") == {"articles": [], "next_cursor": None}
+    assert store.search("!!!") == {"articles": [], "next_cursor": None}
+
+
+def test_import_reads_json_and_abnt_markdown(tmp_path, store):
+    folder = tmp_path / "artigos-gerados"
+    (folder / "json").mkdir(parents=True)
+    (folder / "edicao-final").mkdir()
+    # Exportação antiga: o nome do arquivo é o título sem pontuação
+    write_chunks_atomic(str(folder / "edicao-final" / "Guerra Fria Origens e Consequências_ABNT.md"),
+                        render_markdown(ARTICLE))
+    # O Markdown não guarda o tópico: o título faz esse papel
+    parsed = parse_abnt_markdown("".join(render_markdown(ARTICLE)), "Guerra Fria Origens e Consequências")
+    assert parsed == dict(ARTICLE, topico=ARTICLE["titulo"])
+
+    (folder / "json" / "artigo_Saúde.json").write_text(
+        json.dumps(dict(ARTICLE, topico="Guerra Fria (JSON)"), ensure_ascii=False), encoding="utf-8")
+    (folder / "json" / "_batch_log.jsonl").write_text("{}\n")
+    (folder / "rascunho.md").write_text("## Rascunho\n\nTexto solto.\n", encoding="utf-8")
+    (folder / "quebrado.json").write_text('{"titulo": ["A"]}', encoding="utf-8")
+
+    result = import_articles([str(folder)], store)
+    assert result["imported"] == 2 and result["articles"] == 1
+    assert sorted(os.path.basename(path) for path in result["skipped"]) == ["quebrado.json", "rascunho.md"]
+    assert store.list()["articles"][0]["topico"] == "Guerra Fria (JSON)"
+
+
+@patch.object(main, "CrewaiArtigoWikiGenerator")
+def test_only_stored_generations_are_saved_and_exported(mocked_generator, tmp_path, monkeypatch):
+    mocked_generator.return_value.crew.return_value.kickoff.return_value = dict(ARTICLE)
+    monkeypatch.setattr(main, "article_cache", ArticleCache(TwoTierCache(path=None)))
+    store = get_article_store()  # ARTICLE_STORE_PATH e EXPORT_DIR apontam para tmp_path (conftest)
+
+    # cache=0, replay e benchmark não deixam rastro
+    assert "error" not in main._run_crew("Guerra Fria", store=False)
+    assert store.count() == 0 and not os.path.exists(tmp_path / "export")
+
+    main._run_crew("Guerra Fria", store=True)
+    assert store.count() == 1
+    assert os.path.exists(tmp_path / "export" / "json" / "artigo_Guerra Fria.json")
+
+
+def test_endpoints_list_search_and_fetch():
+    main.save_article(ARTICLE)
+    main.save_article({"titulo": "sem parágrafos"})  # Inválido: só registrado no log
+    client = main.app.test_client()
+
+    listed = client.get("/articles?limit=1").get_json()
+    assert [a["titulo"] for a in listed["articles"]] == [ARTICLE["titulo"]] and listed["next_cursor"] is None
+    found = client.get("/articles/search?q=corrida espacial").get_json()["articles"]
+    assert found[0]["id"] == listed["articles"][0]["id"]
+    assert client.get(f"/articles/{found[0]['id']}").get_json()["referencias"] == ARTICLE["referencias"]
+
+    assert client.get("/articles/9999").status_code == 404
+    assert client.get("/articles/search").status_code == 400
+    assert client.get("/articles?limit=muitos").status_code == 400
+    assert client.get("/articles?cursor=x").status_code == 400
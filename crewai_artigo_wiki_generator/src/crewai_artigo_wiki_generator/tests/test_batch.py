@@ -0,0 +1,55 @@
+import json
+import os
+
+from batch import article_filename, percentile, read_topics, run_batch
+
+"""
+Testes da geração em lote (batch.py) com um worker simulado, sem LLM.
+"""
+
+
+def fake_worker(topic):
+    if topic == "Falha":
+        return {"topic": topic, "ok": False, "error": "erro simulado", "stages": {}, "total": 0.1}
+    return {
+        "topic": topic,
+        "ok": True,
+        "article": {"titulo": topic, "topico": topic, "paragrafos": []},
+        "stages": {"research_task": 1.0, "reporting_task": 2.0, "review_task": 3.0},
+        "total": 6.0,
+    }
+
+
+def test_read_topics_and_filenames(tmp_path):
+    topics_file = tmp_path / "topicos.txt"
+    topics_file.write_text("# comentário\nSaúde\n\nSaúde\nIA/ML\n", encoding="utf-8")
+
+    assert read_topics(str(topics_file)) == ["Saúde", "IA/ML"]
+    assert article_filename("IA/ML") == "artigo_IAML.json"
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([], 50) is None
+
+
+def test_run_batch_writes_articles_and_resumes(tmp_path):
+    output_dir = str(tmp_path / "json")
+
+    summary = run_batch(["Saúde", "Falha", "História"], output_dir=output_dir, workers=2, worker=fake_worker)
+
+    assert summary["succeeded"] == 2
+    assert summary["failed"] == 1
+    assert summary["stages"]["review_task"]["p95"] == 3.0
+    with open(os.path.join(output_dir, "artigo_Saúde.json"), encoding="utf-8") as f:
+        assert json.load(f)["titulo"] == "Saúde"
+
+    # Segunda execução: apenas o tópico que falhou é processado de novo
+    summary = run_batch(["Saúde", "Falha", "História"], output_dir=output_dir, workers=2, worker=fake_worker)
+    assert summary["skipped"] == 2
+    assert summary["failed"] == 1
+
+    with open(os.path.join(output_dir, "_batch_log.jsonl"), encoding="utf-8") as f:
+        assert len(f.readlines()) == 4
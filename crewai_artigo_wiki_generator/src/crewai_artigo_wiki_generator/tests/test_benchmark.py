@@ -0,0 +1,42 @@
+import json
+
+import benchmark
+from benchmark import DEFAULT_CASSETTE, RecordReplayAdapter, main, peak_rss_bytes
+
+"""
+Testes do benchmark offline: LLM simulado e respostas gravadas da Wikipedia.
+"""
+
+
+def test_replay_adapter_counts_misses():
+    adapter = RecordReplayAdapter(DEFAULT_CASSETTE)
+    url = next(iter(adapter.interactions))
+
+    import requests
+    session = requests.Session()
+    session.mount("https://pt.wikipedia.org/", adapter)
+    assert session.get(url).json()["query"]["pages"]
+    assert session.get("https://pt.wikipedia.org/w/api.php?titles=Outro").status_code == 404
+    assert (adapter.requests, adapter.misses) == (2, 1)
+
+
+def test_benchmark_end_to_end_writes_results(tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+    output = tmp_path / "resultado.json"
+
+    assert main(["Saúde", "-n", "2", "-o", str(output)]) == 0
+
+    results = json.loads(output.read_text(encoding="utf-8"))
+    first, second = results["runs"]
+    assert first["ok"] and second["ok"]
+    assert set(first["stages"]) == {"research_task", "reporting_task", "review_task"}
+    assert (first["wikipedia_requests"], second["wikipedia_requests"]) == (1, 0)
+    assert second["cache_hit_rate"] == 1.0
+    assert results["summary"]["replay_misses"] == 0
+    assert results["summary"]["peak_rss_bytes"] > 0
+
+
+def test_peak_rss_is_unavailable_without_getrusage(monkeypatch):
+    assert peak_rss_bytes() > 0
+    monkeypatch.setattr(benchmark, "resource", None)  # Como no Windows
+    assert peak_rss_bytes() is None
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+from context_compaction import compact_context, compaction_guardrail, estimate_tokens
+from crew import CrewaiArtigoWikiGenerator
+from metrics import CONTEXT_TOKENS
+from tools.wiki_bundle import format_bundle
+
+"""
+Testes da compactação do contexto passado entre as etapas da crew.
+"""
+
+PESQUISA = """Pesquisa sobre Saúde:
+
+(Redirecionado de 'saude' para 'Saúde')
+
+Saúde é um estado de completo bem-estar físico, mental e social. O conceito foi definido pela OMS em 1946.
+
+(Não encontrado exatamente 'Saude publica'; resultado mais relevante: 'Saúde pública')
+
+Saúde é um estado de completo bem-estar FÍSICO, mental e social! A saúde pública estuda a saúde de populações.
+
+Outros resultados:
+- Saúde mental
+- Saúde coletiva"""
+
+
+def test_removes_boilerplate_and_repeated_sentences():
+    compacted, stats = compact_context(PESQUISA, budget=0)
+    assert compacted == (
+        "Pesquisa sobre Saúde:\n\n"
+        "Saúde é um estado de completo bem-estar físico, mental e social. O conceito foi definido pela OMS em 1946.\n\n"
+        "A saúde pública estuda a saúde de populações."
+    )
+    assert stats["saved"] == stats["before"] - stats["after"] > 0
+
+
+def test_budget_keeps_informative_sentences_in_order():
+    filler = " ".join(f"Frase de enchimento número {i} sobre saúde." for i in range(40))
+    text = f"Pesquisa sobre Saúde:\n\n{filler}\n\nA vacinação erradicou a varíola em 1980."
+    compacted, stats = compact_context(text, budget=40)
+
+    assert stats["after"] <= 40 < stats["before"]
+    assert compacted.startswith("Pesquisa sobre Saúde:")
+    assert compacted.endswith("A vacinação erradicou a varíola em 1980.")
+    assert estimate_tokens(compacted) == stats["after"]
+
+
+def test_compacted_bundle_keeps_headings_and_line_breaks():
+    filler = "\n".join(f"Frase de enchimento número {i} sobre saúde." for i in range(40))
+    bundle = format_bundle({
+        "title": "Saúde",
+        "sections": [
+            {"title": "Introdução", "level": 2, "text": "Saúde é bem-estar físico.\nA OMS a definiu em 1946."},
+            {"title": "Detalhes", "level": 2, "text": filler},
+        ],
+        "related": [{"title": "Vacina", "text": "A vacinação erradicou a varíola em 1980."}],
+    })
+    compacted, stats = compact_context(bundle, budget=90)
+
+    assert stats["after"] <= 90 < stats["before"]
+    assert compacted.startswith("# Saúde\n\n## Introdução\n\nSaúde é bem-estar físico.\nA OMS a definiu em 1946.")
+    assert "\n\n## Detalhes\n\nFrase de enchimento número" in compacted
+    assert compacted.endswith("# Páginas relacionadas\n\n## Vacina\n\nA vacinação erradicou a varíola em 1980.")
+    # Seções que ficaram vazias perdem também o título
+    assert compact_context("# Saúde\n\nTexto.\n\n## Vazia\n\nTexto.", budget=0)[0] == "# Saúde\n\nTexto."
+
+
+def test_guardrail_replaces_output_and_counts_tokens():
+    before = CONTEXT_TOKENS.value(stage="teste", kind="before")
+    success, compacted = compaction_guardrail("teste", budget=0)(SimpleNamespace(raw=PESQUISA))
+    assert success and "Redirecionado" not in compacted
+    assert CONTEXT_TOKENS.value(stage="teste", kind="before") == before + estimate_tokens(PESQUISA)
+
+
+def test_research_task_keeps_guardrail_when_copied():
+    crew = CrewaiArtigoWikiGenerator().crew()
+    research = crew.tasks[0]
+    assert research.guardrail is not None
+    assert crew.copy().tasks[0].guardrail is not None
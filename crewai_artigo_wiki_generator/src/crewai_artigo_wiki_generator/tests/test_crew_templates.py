@@ -0,0 +1,44 @@
+from crew import CrewaiArtigoWikiGenerator
+from crew_templates import CrewTemplates
+from benchmark import FakeLLM
+from tests.test_streaming import FakeGenerator
+
+"""
+Testes da reutilização do crew pré-construído (template copiado a cada execução).
+"""
+
+
+def test_create_copies_the_warm_template():
+    templates = CrewTemplates(enabled=True)
+    llm = FakeLLM()
+    templates.warm_up(CrewaiArtigoWikiGenerator, llm)
+    template = templates.template(CrewaiArtigoWikiGenerator, llm)
+
+    callback = lambda output: None
+    first = templates.create(CrewaiArtigoWikiGenerator, task_callback=callback, llm=llm)
+    second = templates.create(CrewaiArtigoWikiGenerator, llm=llm)
+
+    assert first is not template and first is not second
+    assert first.agents[0] is not template.agents[0]
+    assert [task.name for task in first.tasks] == [task.name for task in template.tasks]
+    assert all(agent.llm is llm for agent in first.agents[:2])
+    assert first.agents[2].llm.llm is llm  # Revisor: o mesmo LLM por trás do ArticleOutputGuard
+    assert first.agents[0].tools[0] is template.agents[0].tools[0]  # Ferramenta compartilhada
+    assert first.task_callback is callback and second.task_callback is None
+
+    stats = templates.stats()
+    assert (stats["templates"], stats["clones"], stats["builds"]) == (1, 2, 0)
+    assert stats["avg_clone_seconds"] is not None
+
+
+def test_falls_back_to_fresh_build():
+    templates = CrewTemplates(enabled=True)
+    crew = templates.create(FakeGenerator, task_callback=print)
+    assert isinstance(crew, FakeGenerator) and crew.task_callback is print
+    assert templates.stats()["builds"] == 1
+
+    disabled = CrewTemplates(enabled=False)
+    llm = FakeLLM()
+    assert disabled.warm_up(CrewaiArtigoWikiGenerator, llm) >= 0
+    disabled.create(CrewaiArtigoWikiGenerator, llm=llm)
+    assert (disabled.stats()["templates"], disabled.stats()["builds"]) == (0, 1)
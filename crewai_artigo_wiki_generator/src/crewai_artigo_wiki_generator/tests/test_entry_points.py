@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+"""
+Testes dos scripts do pyproject.toml: cada um é importado como módulo do pacote,
+num interpretador novo e fora da pasta do projeto, como faz o script instalado.
+"""
+
+SRC_DIR = Path(__file__).resolve().parents[2]
+PROJECT_DIR = SRC_DIR.parent
+
+
+def script_target(name: str) -> str:
+    for line in (PROJECT_DIR / "pyproject.toml").read_text(encoding="utf-8").splitlines():
+        key, _, value = line.partition("=")
+        if key.strip() == name:
+            return value.strip().strip('"')
+    raise AssertionError(f"script {name} não está no pyproject.toml")
+
+
+def run_installed(code: str, tmp_path) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR), OTEL_SDK_DISABLED="true", CREWAI_DISABLE_TELEMETRY="true")
+    return subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+@pytest.mark.parametrize("name, extra", [
+    # O worker do lote importa a crew só dentro do processo filho
+    ("batch", "from main import _run_crew"),
+    ("benchmark", ""),
+    ("import_articles", ""),
+])
+def test_script_entry_points_import_as_a_package(name, extra, tmp_path):
+    module, function = script_target(name).split(":")
+    code = f"import importlib\nassert callable(importlib.import_module({module!r}).{function})\n{extra}\n"
+
+    result = run_installed(code, tmp_path)
+
+    assert result.returncode == 0, result.stderr
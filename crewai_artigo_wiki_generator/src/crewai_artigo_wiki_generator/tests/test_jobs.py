@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+import main
+from jobs import JobManager, QueueFullError
+
+"""
+Testes da API assíncrona de jobs (POST /jobs e GET /jobs/<id>).
+A crew é substituída por funções simples, sem chamadas a LLM.
+"""
+
+
+def wait_for(manager, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job não terminou a tempo")
+
+
+def test_job_manager_runs_and_reports_result():
+    manager = JobManager(lambda topic, **options: {"titulo": topic}, max_workers=1, max_queue=2)
+    job = manager.submit("Saúde")
+
+    finished = wait_for(manager, job["id"])
+    assert finished["status"] == "done"
+    assert finished["result"] == {"titulo": "Saúde"}
+    manager.shutdown()
+
+
+def test_job_manager_rejects_when_queue_is_full():
+    release = threading.Event()
+    manager = JobManager(lambda topic, **options: release.wait() and {}, max_workers=1, max_queue=1)
+
+    manager.submit("primeiro")  # ocupa o único worker
+    time.sleep(0.05)
+    manager.submit("segundo")   # ocupa a única vaga da fila
+    with pytest.raises(QueueFullError):
+        manager.submit("terceiro")
+
+    release.set()
+    manager.shutdown()
+
+
+def test_retry_after_estimates_the_next_free_worker():
+    manager = JobManager(lambda topic, **options: {}, max_workers=2, max_queue=20)
+    assert manager.retry_after() == 30  # Sem histórico: 60 s por job, divididos entre 2 workers
+
+    now = time.time()
+    manager._jobs = {
+        "a": {"status": "done", "started_at": now - 200, "finished_at": now - 160},
+        "b": {"status": "done", "started_at": now - 150, "finished_at": now - 110},
+        "c": {"status": "running", "started_at": now - 30, "finished_at": None},
+        "d": {"status": "running", "started_at": now - 5, "finished_at": None},
+    }
+    # Média de 40 s; o job mais adiantado termina em ~10 s, não 40 * 20 / 2 = 400 s
+    assert 9 <= manager.retry_after() <= 10
+
+    manager._jobs["c"]["started_at"] = now - 90  # Já passou da média
+    assert manager.retry_after() == 1
+    manager.shutdown()
+
+
+def test_jobs_endpoints(monkeypatch):
+    manager = JobManager(lambda topic, **options: {"error": "falhou"} if topic == "Erro" else {"titulo": topic},
+                         max_workers=1, max_queue=5)
+    monkeypatch.setattr(main, "job_manager", manager)
+    client = main.app.test_client()
+
+    response = client.post("/jobs", json={"topic": "Inteligência Artificial"})
+    assert response.status_code == 202
+    job_id = response.json["job_id"]
+    assert response.headers["Location"] == f"/jobs/{job_id}"
+
+    wait_for(manager, job_id)
+    response = client.get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json["status"] == "done"
+    assert response.json["result"]["titulo"] == "Inteligência Artificial"
+
+    failed_id = client.post("/jobs", json={"topic": "Erro"}).json["job_id"]
+    assert wait_for(manager, failed_id)["error"] == "falhou"
+
+    assert client.post("/jobs", json={}).status_code == 400
+    assert client.get("/jobs/inexistente").status_code == 404
+    manager.shutdown()
+
+
+def test_jobs_endpoint_returns_429_when_full(monkeypatch):
+    release = threading.Event()
+    manager = JobManager(lambda topic, **options: release.wait() and {}, max_workers=1, max_queue=0)
+    monkeypatch.setattr(main, "job_manager", manager)
+
+    response = main.app.test_client().post("/jobs", json={"topic": "Saúde"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    release.set()
+    manager.shutdown()
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from benchmark import FakeLLM, main as run_benchmark
+from llm_cache import CachedLLM, LLMCacheMiss, cached_llm, get_llm_cache_mode
+from tools.wiki_cache import TwoTierCache
+
+"""
+Testes do cache persistente de respostas do LLM e do modo de reprodução estrita.
+"""
+
+MESSAGES = [{"role": "system", "content": "Você é um redator."}, {"role": "user", "content": "Escreva sobre Saúde."}]
+
+
+class EchoLLM(FakeLLM):
+    def call(self, messages, tools=None, callbacks=None, available_functions=None) -> str:
+        self.calls += 1
+        return f"resposta {self.calls} com temperatura {self.temperature}"
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    return TwoTierCache(path=str(tmp_path / "llm.sqlite3"), ttl=float("inf"), namespace="llm_completion")
+
+
+def test_mode_validation(monkeypatch):
+    monkeypatch.delenv("LLM_CACHE", raising=False)
+    assert get_llm_cache_mode() == "off"
+    monkeypatch.setenv("LLM_CACHE", "Replay")
+    assert get_llm_cache_mode() == "replay"
+    with pytest.raises(ValueError):
+        get_llm_cache_mode("sempre")
+
+
+def test_repeated_prompts_are_served_from_disk(tmp_path, disk_cache):
+    llm = EchoLLM()
+    cached = CachedLLM(llm, cache=disk_cache, mode="on")
+    first = cached.call(MESSAGES)
+    assert cached.call(MESSAGES) == first
+    assert llm.calls == 1
+
+    # Outro processo (nova instância do cache) lê o mesmo arquivo
+    reopened = TwoTierCache(path=disk_cache.path, ttl=float("inf"), namespace="llm_completion")
+    assert CachedLLM(EchoLLM(), cache=reopened, mode="replay").call(MESSAGES) == first
+
+
+def test_key_covers_model_prompt_and_parameters(disk_cache):
+    llm = EchoLLM()
+    cached = CachedLLM(llm, cache=disk_cache, mode="on")
+    cached.call(MESSAGES)
+    cached.call(MESSAGES[:1])
+    cached.stop = ["\nObservation:"]
+    cached.call(MESSAGES)
+    llm.temperature = 0.7
+    cached.call(MESSAGES)
+    assert llm.calls == 4
+    assert llm.stop == ["\nObservation:"]  # As stop words chegam ao LLM que de fato responde
+
+
+def test_replay_fails_on_miss(disk_cache):
+    llm = EchoLLM()
+    with pytest.raises(LLMCacheMiss):
+        CachedLLM(llm, cache=disk_cache, mode="replay").call(MESSAGES)
+    assert llm.calls == 0
+
+
+def test_cached_llm_follows_environment(monkeypatch, tmp_path):
+    llm = EchoLLM()
+    monkeypatch.setenv("LLM_CACHE", "off")
+    assert cached_llm(llm) is llm
+    monkeypatch.setenv("LLM_CACHE", "on")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm.sqlite3"))
+    wrapped = cached_llm(llm)
+    assert isinstance(wrapped, CachedLLM) and wrapped.llm is llm
+    assert cached_llm(wrapped) is wrapped
+
+
+def test_benchmark_replays_recorded_completions(tmp_path, monkeypatch):
+    # O benchmark ajusta LLM_CACHE/LLM_CACHE_PATH; restaurados ao final do teste
+    monkeypatch.setenv("LLM_CACHE", "off")
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "padrao.sqlite3"))
+    path = str(tmp_path / "llm.sqlite3")
+    recorded, replayed = tmp_path / "gravado.json", tmp_path / "reproduzido.json"
+    assert run_benchmark(["Saúde", "-n", "1", "--llm-cache", "on", "--llm-cache-path", path, "-o", str(recorded)]) == 0
+    assert run_benchmark(["Saúde", "-n", "1", "--llm-cache", "replay", "--llm-cache-path", path,
+                          "-o", str(replayed)]) == 0
+
+    first = json.loads(recorded.read_text(encoding="utf-8"))["summary"]
+    second = json.loads(replayed.read_text(encoding="utf-8"))["summary"]
+    assert first["llm_calls"] == 4 and first["llm_cache_hits"] == 0
+    assert second["llm_calls"] == 0 and second["llm_cache_hits"] == 4
+
+    assert run_benchmark(["Rio Amazonas", "-n", "1", "--llm-cache", "replay", "--llm-cache-path", path,
+                          "-o", str(tmp_path / "falha.json")]) == 2
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import main
+from metrics import Counter, Gauge, Histogram, Registry, STAGE_DURATION, WIKIPEDIA_ATTEMPTS, WIKIPEDIA_RETRIES, _Metric
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes das métricas no formato Prometheus e do endpoint /metrics.
+"""
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests_total = registry.counter("req_total", "Requisições", ["route"])
+    in_flight = registry.gauge("in_flight", "Em andamento")
+    duration = registry.histogram("duration_seconds", "Duração", buckets=(0.1, 1))
+
+    requests_total.inc(route="/a")
+    requests_total.inc(2, route="/a")
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 1
+    duration.observe(0.1)
+    duration.observe(5)
+
+    text = registry.render()
+    assert '# TYPE req_total counter\nreq_total{route="/a"} 3' in text
+    assert "in_flight 0" in text
+    assert 'duration_seconds_bucket{le="0.1"} 1' in text
+    assert 'duration_seconds_bucket{le="+Inf"} 2' in text
+    assert "duration_seconds_count 2" in text
+    with pytest.raises(ValueError):
+        requests_total.inc(route="/a", method="GET")
+
+
+def test_counters_only_increase_and_metrics_need_samples():
+    counter = Counter("eventos_total", "Eventos")
+    gauge = Gauge("fila", "Fila")
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+    gauge.inc(3)
+    gauge.dec(5)
+    assert (counter.value(), gauge.value()) == (0, -2)
+    assert not isinstance(gauge, Counter)
+    with pytest.raises(TypeError):
+        _Metric("sem_amostras", "Métrica sem _samples")
+
+
+def test_request_retries_are_counted(monkeypatch, tmp_path):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+    tool = WikipediaTool()
+    attempts, retries = WIKIPEDIA_ATTEMPTS.value(mode="sync"), WIKIPEDIA_RETRIES.value(mode="sync")
+
+    ok = MagicMock()
+    ok.json.return_value = {"query": {}}
+    import requests
+    session = MagicMock()
+    session.get.side_effect = [requests.exceptions.ConnectionError("falha"), ok]
+    with patch("tools.wikipedia_tool.get_session", return_value=session), \
+            patch("tools.wikipedia_tool.backoff_delay", return_value=0):
+        assert tool._request_json("https://pt.wikipedia.org/w/api.php", "Saúde") == {"query": {}}
+
+    assert WIKIPEDIA_ATTEMPTS.value(mode="sync") == attempts + 2
+    assert WIKIPEDIA_RETRIES.value(mode="sync") == retries + 1
+
+
+def test_metrics_endpoint_exposes_stage_histogram(monkeypatch):
+    from tests.test_streaming import FakeGenerator
+    monkeypatch.setattr(main, "CrewaiArtigoWikiGenerator", FakeGenerator)
+    before = STAGE_DURATION.count(stage="review_task")
+
+    assert "error" not in main._run_crew("Saúde", store=False)
+    response = main.app.test_client().get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert STAGE_DURATION.count(stage="review_task") == before + 1
+    assert 'article_stage_duration_seconds_count{stage="research_task"}' in body
+    assert "article_generations_in_flight 0" in body
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from benchmark import main as run_benchmark
+from research_prefetch import get_research_mode, prefetch_research
+from tools.wiki_bundle import format_bundle
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes do modo de pesquisa pré-carregada (sem o ciclo de ferramentas do agente).
+"""
+
+INTRO = "Saúde é um estado de completo bem-estar físico, mental e social, e não apenas a ausência de doença."
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+
+
+def test_research_mode_validation(monkeypatch):
+    monkeypatch.setenv("RESEARCH_MODE", "prefetch")
+    assert get_research_mode() == "prefetch"
+    assert get_research_mode("Direct") == "direct"
+    with pytest.raises(ValueError):
+        get_research_mode("manual")
+
+
+def test_prefetch_caches_bundles_and_falls_back_to_search():
+    tool = WikipediaTool()
+    bundle = {"title": "Saúde", "text": INTRO, "sections": [], "related": [], "complete": True, "seconds": 0.1}
+    tool.__dict__.update(fetch_bundle=MagicMock(return_value=dict(bundle)))
+
+    first = prefetch_research("saude", tool=tool, related_pages=3)
+    assert first["title"] == "Saúde" and first["topic"] == "saude"
+    assert prefetch_research("saude", tool=tool, related_pages=3) == first
+    tool.fetch_bundle.assert_called_once_with("Saude", related_pages=3)
+
+    tool.__dict__.update(
+        fetch_bundle=MagicMock(return_value=None),
+        _try_search_api=MagicMock(return_value="Não encontrado exatamente 'Xyz'"),
+    )
+    missing = prefetch_research("xyz", tool=tool)
+    assert missing["title"] is None and missing["text"].startswith("Não encontrado")
+    assert format_bundle(missing) == "# xyz\n\nNão encontrado exatamente 'Xyz'"
+
+
+def test_network_outage_is_not_cached_as_research():
+    tool = WikipediaTool()
+    with patch.object(WikipediaTool, "_request_json", return_value=None) as offline:
+        bundle = prefetch_research("Saúde", tool=tool)
+        assert bundle["title"] is None and bundle["sections"] == []
+        assert tool.fetch_bundle("Saúde") is None
+        requests = offline.call_count
+        prefetch_research("Saúde", tool=tool)
+        assert offline.call_count > requests  # Nada foi para o cache
+
+    # Página resolvida, mas o texto completo e os links ficaram sem resposta
+    intro = {"query": {"pages": {"1": {"title": "Saúde", "extract": INTRO}}}}
+    with patch.object(WikipediaTool, "_request_json",
+                      side_effect=lambda url, label, deadline=None: intro if "exintro" in url else None):
+        partial = prefetch_research("Saúde", tool=tool)
+    assert partial["title"] == "Saúde" and partial["complete"] is False
+    assert partial["sections"][0]["text"] == INTRO
+    with patch.object(WikipediaTool, "fetch_bundle", return_value=None) as refetch, \
+            patch.object(WikipediaTool, "_try_search_api", return_value="busca"):
+        prefetch_research("Saúde", tool=tool)
+    refetch.assert_called_once()
+
+
+@pytest.mark.parametrize("mode, calls", [("prefetch", 3), ("direct", 2)])
+def test_benchmark_runs_prefetched_modes(tmp_path, mode, calls):
+    output = tmp_path / "resultado.json"
+    assert run_benchmark(["Saúde", "-n", "1", "--research-mode", mode, "-o", str(output)]) == 0
+
+    run = json.loads(output.read_text(encoding="utf-8"))["runs"][0]
+    assert run["ok"] and run["llm_calls"] == calls
+    assert "prefetch" in run["stages"]
+    assert ("research_task" in run["stages"]) == (mode == "prefetch")
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+from metrics import SINGLEFLIGHT_CALLS
+from singleflight import SingleFlight
+
+"""
+Testes da coalescência de requisições concorrentes para o mesmo tópico.
+"""
+
+
+def run_concurrently(flight, key, fn, callers=10):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("teste")
+    coalesced = SINGLEFLIGHT_CALLS.value(flight="teste", result="coalesced")
+    executions = []
+
+    def generate():
+        executions.append(1)
+        time.sleep(0.1)
+        return {"titulo": "Saúde"}
+
+    results, errors = run_concurrently(flight, "saúde", generate)
+
+    assert not errors
+    assert len(executions) == 1
+    assert results == [{"titulo": "Saúde"}] * 10
+    stats = flight.stats()
+    assert stats["coalesced"] == 9
+    assert stats["in_flight"] == 0
+    assert SINGLEFLIGHT_CALLS.value(flight="teste", result="coalesced") == coalesced + 9
+
+
+def test_concurrent_callers_share_the_error():
+    flight = SingleFlight()
+
+    def generate():
+        time.sleep(0.1)
+        raise RuntimeError("falhou")
+
+    results, errors = run_concurrently(flight, "saúde", generate, callers=3)
+
+    assert not results
+    assert [str(e) for e in errors] == ["falhou"] * 3
+    with pytest.raises(RuntimeError):
+        flight.do("saúde", generate)  # nova chamada após o término executa de novo
+
+
+def test_listeners_get_past_and_future_progress():
+    flight = SingleFlight()
+    started, resume = threading.Event(), threading.Event()
+    leader_items, follower_items = [], []
+
+    def generate():
+        flight.publish("saúde", "pesquisa")
+        started.set()
+        resume.wait(5)
+        flight.publish("saúde", "revisão")
+        return "artigo"
+
+    leader = threading.Thread(target=flight.do, args=("saúde", generate, leader_items.append))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=flight.do, args=("saúde", generate, follower_items.append))
+    follower.start()
+    while flight.stats()["coalesced"] == 0:
+        time.sleep(0.01)
+    resume.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert leader_items == follower_items == ["pesquisa", "revisão"]
+    flight.publish("saúde", "depois")  # Sem execução em andamento: descartado
+    assert leader_items == ["pesquisa", "revisão"]
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+
+import pytest
+from types import SimpleNamespace
+import main
+from admission import ClientLimiter
+from article_cache import ArticleCache
+from tools.wiki_cache import TwoTierCache
+
+"""
+Testes do endpoint SSE /generate_article/stream com uma crew simulada
+que dispara o task_callback ao final de cada etapa.
+"""
+
+ARTIGO = {
+    "titulo": "Saúde",
+    "topico": "Saúde",
+    "data_criacao": "2025-04-18T15:30:00",
+    "autor": "MultiAgente AI",
+    "paragrafos": [{"titulo": "Resumo", "conteudo": "Texto"}],
+    "referencias": [],
+}
+
+
+class FakeGenerator:
+    def __init__(self, task_callback=None, llm=None, research_mode=None):
+        self.task_callback = task_callback
+
+    def crew(self):
+        return self
+
+    def kickoff(self, inputs):
+        for name, agent in (("research_task", "Pesquisador"), ("reporting_task", "Redator"),
+                            ("review_task", "Revisor")):
+            self.task_callback(SimpleNamespace(name=name, agent=agent, raw=f"saída de {name}"))
+        return dict(ARTIGO)
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture(autouse=True)
+def isolated_article_cache(monkeypatch):
+    monkeypatch.setattr(main, "article_cache", ArticleCache(TwoTierCache(path=None)))
+    monkeypatch.setattr(main, "CrewaiArtigoWikiGenerator", FakeGenerator)
+    # O cliente de teste só libera a vaga do stream ao fechar a resposta
+    monkeypatch.setattr(main, "client_limiter", ClientLimiter(max_per_client=0))
+
+
+def test_stream_emits_each_stage_then_result():
+    response = main.app.test_client().get("/generate_article/stream?topic=Saúde")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ["start", "stage", "stage", "stage", "result"]
+    assert [data["stage"] for name, data in events if name == "stage"] == [
+        "research_task", "reporting_task", "review_task"
+    ]
+    assert all(data["duration"] >= 0 for name, data in events if name == "stage")
+    assert events[-1][1]["article"]["titulo"] == "Saúde"
+
+
+def test_stream_serves_cached_article_without_crew():
+    main.article_cache.set("Saúde", ARTIGO)
+    response = main.app.test_client().get("/generate_article/stream?topic=saúde")
+
+    events = parse_events(response.get_data(as_text=True))
+    assert [name for name, _ in events] == ["start", "result"]
+    assert events[-1][1]["cached"] is True
+
+
+def test_concurrent_streams_share_one_crew_run(monkeypatch):
+    kickoffs, resume = [], threading.Event()
+
+    class SlowGenerator(FakeGenerator):
+        def kickoff(self, inputs):
+            kickoffs.append(inputs["topic"])
+            self.task_callback(SimpleNamespace(name="research_task", agent="Pesquisador", raw="pesquisa"))
+            resume.wait(5)
+            self.task_callback(SimpleNamespace(name="review_task", agent="Revisor", raw="revisão"))
+            return dict(ARTIGO)
+
+    monkeypatch.setattr(main, "CrewaiArtigoWikiGenerator", SlowGenerator)
+    bodies = {}
+
+    def stream(name, topic):
+        bodies[name] = main.app.test_client().get(f"/generate_article/stream?topic={topic}").get_data(as_text=True)
+
+    leader = threading.Thread(target=stream, args=("leader", "Saúde"))
+    leader.start()
+    while not main.generation_flights.in_flight():
+        time.sleep(0.01)
+    coalesced = main.generation_flights.stats()["coalesced"]
+    follower = threading.Thread(target=stream, args=("follower", "saúde"))
+    follower.start()
+    while main.generation_flights.stats()["coalesced"] == coalesced:
+        time.sleep(0.01)
+    resume.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert kickoffs == ["Saúde"]
+    for body in bodies.values():
+        events = parse_events(body)
+        # Quem entrou depois recebe também as etapas já concluídas
+        assert [data.get("stage") for name, data in events if name == "stage"] == ["research_task", "review_task"]
+        assert events[-1][0] == "result" and events[-1][1]["article"]["titulo"] == "Saúde"
+
+
+def test_uncached_run_does_not_absorb_a_caching_caller(monkeypatch):
+    kickoffs, started, resume = [], threading.Event(), threading.Event()
+
+    class SlowGenerator(FakeGenerator):
+        def kickoff(self, inputs):
+            kickoffs.append(inputs["topic"])
+            started.set()
+            resume.wait(5)
+            return dict(ARTIGO)
+
+    monkeypatch.setattr(main, "CrewaiArtigoWikiGenerator", SlowGenerator)
+    uncached = threading.Thread(target=main.execute_crew_process, args=("Saúde",), kwargs={"use_cache": False})
+    uncached.start()
+    started.wait(5)
+    cached = threading.Thread(target=main.execute_crew_process, args=("saúde",))
+    cached.start()
+    deadline = time.monotonic() + 1
+    while len(kickoffs) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    resume.set()
+    uncached.join(5)
+    cached.join(5)
+
+    # cache=0 não pode liderar quem pediu o artigo guardado
+    assert len(kickoffs) == 2
+    assert main.article_cache.get("Saúde") is not None
+
+
+def test_disconnected_stream_keeps_its_slot_until_the_crew_finishes(monkeypatch):
+    resume, finished = threading.Event(), threading.Event()
+
+    class SlowGenerator(FakeGenerator):
+        def kickoff(self, inputs):
+            self.task_callback(SimpleNamespace(name="research_task", agent="Pesquisador", raw="pesquisa"))
+            resume.wait(5)
+            finished.set()
+            return dict(ARTIGO)
+
+    limiter = ClientLimiter(max_per_client=1)
+    monkeypatch.setattr(main, "client_limiter", limiter)
+    monkeypatch.setattr(main, "CrewaiArtigoWikiGenerator", SlowGenerator)
+    client = main.app.test_client()
+
+    response = client.get("/generate_article/stream?topic=Saúde", buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b"event: start")
+    assert next(chunks).startswith(b"event: stage")
+    response.close()  # Cliente desconecta no meio da geração
+
+    # A crew continua rodando: a vaga continua ocupada e um novo stream recebe 429
+    assert limiter.active("127.0.0.1") == 1
+    assert client.get("/generate_article/stream?topic=Saúde").status_code == 429
+
+    resume.set()
+    finished.wait(5)
+    deadline = time.monotonic() + 2
+    while limiter.active("127.0.0.1") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert limiter.active("127.0.0.1") == 0
+
+
+def test_stream_closed_before_the_first_event_releases_its_slot(monkeypatch):
+    limiter = ClientLimiter(max_per_client=1)
+    monkeypatch.setattr(main, "client_limiter", limiter)
+
+    response = main.app.test_client().get("/generate_article/stream?topic=Saúde", buffered=False)
+    response.close()
+
+    assert limiter.active("127.0.0.1") == 0
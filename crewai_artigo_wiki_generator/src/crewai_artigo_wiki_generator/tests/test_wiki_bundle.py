@@ -0,0 +1,57 @@
+from tools.wiki_bundle import format_bundle, rank_links, split_sections
+
+"""
+Testes do pacote de pesquisa: divisão do artigo em seções e escolha das páginas relacionadas.
+"""
+
+ARTIGO = """Saúde é um estado de completo bem-estar físico, mental e social.
+
+== História ==
+A definição de 1946 ampliou a visão anterior.
+
+== Determinantes ==
+
+=== Saúde pública ===
+A saúde pública reúne ações coletivas de prevenção.
+
+== Ver também ==
+Saúde mental
+
+=== Listas ===
+Lista de doenças
+
+== Referências ==
+OMS, 1946."""
+
+
+def test_split_sections_skips_navigation_and_empty_headings():
+    sections = split_sections(ARTIGO)
+    assert [(s["title"], s["level"]) for s in sections] == [
+        ("Introdução", 2), ("História", 2), ("Saúde pública", 3)
+    ]
+    assert sections[2]["text"] == "A saúde pública reúne ações coletivas de prevenção."
+
+
+def test_split_sections_respects_character_budget():
+    sections = split_sections(ARTIGO, max_chars=80)
+    assert sum(len(s["text"]) for s in sections) <= 83  # "..." do corte
+    assert sections[-1]["text"].endswith("...")
+
+
+def test_rank_links_by_first_mention():
+    links = ["Doença", "Medicina", "Bem-estar", "Saúde", "Saúde pública"]
+    assert rank_links(links, ARTIGO, 5, exclude="Saúde") == ["Bem-estar", "Saúde pública"]
+    assert rank_links(links, ARTIGO, 1, exclude="Saúde") == ["Bem-estar"]
+
+
+def test_format_bundle_structure():
+    bundle = {
+        "title": "Saúde",
+        "sections": split_sections(ARTIGO)[:2],
+        "related": [{"title": "Bem-estar", "text": "Bem-estar é..."}],
+    }
+    assert format_bundle(bundle) == (
+        "# Saúde\n\n## Introdução\n\nSaúde é um estado de completo bem-estar físico, mental e social.\n\n"
+        "## História\n\nA definição de 1946 ampliou a visão anterior.\n\n"
+        "# Páginas relacionadas\n\n## Bem-estar\n\nBem-estar é..."
+    )
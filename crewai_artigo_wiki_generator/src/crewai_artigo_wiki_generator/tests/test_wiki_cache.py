@@ -0,0 +1,64 @@
+import time
+
+import pytest
+from tools.wiki_cache import TwoTierCache
+
+"""
+Testes do cache em dois níveis usado pela WikipediaTool.
+"""
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "wikipedia.sqlite3")
+
+
+def test_cache_hit_memory_and_disk(cache_path):
+    cache = TwoTierCache(path=cache_path, max_bytes=1024, ttl=60)
+    cache.set("Saúde", "Texto sobre saúde")
+
+    assert cache.get("Saúde") == "Texto sobre saúde"
+    assert cache.stats()["memory_hits"] == 1
+
+    # Um novo processo/worker enxerga apenas o disco
+    other = TwoTierCache(path=cache_path, max_bytes=1024, ttl=60)
+    assert other.get("Saúde") == "Texto sobre saúde"
+    assert other.stats()["disk_hits"] == 1
+    assert other.get("Saúde") == "Texto sobre saúde"
+    assert other.stats()["memory_hits"] == 1
+
+
+def test_cache_lru_eviction_by_bytes():
+    cache = TwoTierCache(path=None, max_bytes=30, ttl=60)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    cache.get("a")  # "a" passa a ser o mais recente
+    cache.set("c", "z" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10
+    assert cache.get("c") == "z" * 10
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_bytes"] <= 30
+
+
+def test_cache_ttl_expiration(cache_path):
+    cache = TwoTierCache(path=cache_path, max_bytes=1024, ttl=60)
+    cache.set("Efêmero", "valor", ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("Efêmero") is None
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["expired"] >= 1
+
+
+def test_cache_namespaces_are_isolated(cache_path):
+    positive = TwoTierCache(path=cache_path, namespace="positivo")
+    negative = TwoTierCache(path=cache_path, namespace="negativo")
+    positive.set("Tópico", "conteúdo")
+
+    assert negative.get("Tópico") is None
+    negative.clear()
+    assert positive.get("Tópico") == "conteúdo"
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+from unittest.mock import patch
+from tools.wiki_offline import OfflineWikipedia, build_index
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes do backend offline (índice local via mmap) com dumps de exemplo em tests/fixtures.
+"""
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    path = str(tmp_path / "index")
+    build_index(os.path.join(FIXTURES, "ptwiki_sample.jsonl"), path)
+    return path
+
+
+@pytest.fixture
+def offline_tool(index_dir, tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+    return WikipediaTool(backend="offline", offline_index=index_dir)
+
+
+def test_build_index_reports_stats(tmp_path):
+    stats = build_index(os.path.join(FIXTURES, "ptwiki_sample.jsonl"), str(tmp_path / "index"))
+
+    assert stats["pages"] == 6
+    assert stats["redirects"] == 5
+    assert stats["bytes"] > 0
+
+
+def test_lookup_titles_and_redirects(index_dir):
+    offline = OfflineWikipedia(index_dir)
+
+    assert offline.lookup("saúde")["title"] == "Saúde"
+    redirect = offline.lookup("IA")
+    assert redirect["title"] == "Inteligência artificial"
+    assert redirect["redirected"] is True
+    assert offline.lookup("Inexistente") is None
+    offline.close()
+
+
+def test_xml_dump(tmp_path):
+    path = str(tmp_path / "xml_index")
+    stats = build_index(os.path.join(FIXTURES, "ptwiki_sample.xml"), path)
+    offline = OfflineWikipedia(path)
+
+    assert stats["pages"] == 1
+    page = offline.lookup("Diversidade biológica")
+    assert page["title"] == "Biodiversidade"
+    assert page["text"] == "Biodiversidade é a variedade de vida no planeta, incluindo a diversidade de espécies."
+    offline.close()
+
+
+def test_tool_serves_offline_without_network(offline_tool):
+    with patch.object(WikipediaTool, "_request_json", side_effect=AssertionError("sem rede")):
+        result = offline_tool._run("Saude")
+
+    assert result == (
+        "(Redirecionado de 'Saude' para 'Saúde')\n\n"
+        "Saúde é um estado de completo bem-estar físico, mental e social, e não apenas a ausência de doença."
+        "\n\nO conceito foi definido pela Organização Mundial da Saúde em 1946."
+    )
+
+
+def test_offline_and_online_results_never_share_the_cache(offline_tool, tmp_path):
+    online_tool = WikipediaTool(backend="online")
+    with patch.object(WikipediaTool, "_search_with_fallbacks", return_value="Texto online sobre Xyz."):
+        assert online_tool._run("Xyz") == "Texto online sobre Xyz."
+
+    # O resultado online não vaza para o offline, e o "nenhum resultado" offline não vaza para o online
+    with patch.object(WikipediaTool, "_request_json", side_effect=AssertionError("sem rede")):
+        assert offline_tool._run("Xyz") == "Nenhum resultado encontrado para 'Xyz'"
+        assert offline_tool._run("Abc") == "Nenhum resultado encontrado para 'Abc'"
+    with patch.object(WikipediaTool, "_search_with_fallbacks", return_value="Texto online sobre Abc."):
+        assert online_tool._run("Abc") == "Texto online sobre Abc."
+
+    # Reconstruir o índice muda a chave: nada da versão anterior é reaproveitado
+    key = offline_tool._cache_key("Xyz")
+    build_index(os.path.join(FIXTURES, "ptwiki_sample.jsonl"), str(tmp_path / "index"))
+    os.utime(os.path.join(offline_tool.offline_index, "index.bin"), ns=(0, 0))
+    assert offline_tool._cache_key("Xyz") != key
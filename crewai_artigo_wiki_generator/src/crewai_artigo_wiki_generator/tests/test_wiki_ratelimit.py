@@ -0,0 +1,146 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+from unittest.mock import MagicMock, patch
+
+from metrics import WIKIPEDIA_ATTEMPTS, WIKIPEDIA_RATE_LIMIT_WAIT, WIKIPEDIA_THROTTLED
+from tools.wiki_http import parse_retry_after
+from tools.wiki_ratelimit import RateLimiter, get_rate_limiter
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes do limite de taxa global das requisições à Wikipedia (balde de fichas em SQLite).
+"""
+
+
+@pytest.fixture
+def limiter_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "wikipedia.sqlite3")
+    monkeypatch.setenv("WIKI_CACHE_PATH", path)
+    return path
+
+
+def test_burst_then_requests_are_spaced(limiter_path):
+    limiter = RateLimiter(rate=10, burst=3, path=limiter_path)
+    waits = [limiter.reserve() for _ in range(5)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.1, abs=0.02)
+    assert waits[4] == pytest.approx(0.2, abs=0.02)
+
+
+def test_bucket_is_shared_by_every_worker_on_the_file(limiter_path):
+    # Cada instância representa um worker: o único estado em comum é o arquivo
+    first = RateLimiter(rate=5, burst=2, path=limiter_path)
+    second = RateLimiter(rate=5, burst=2, path=limiter_path)
+    assert first.reserve() == 0 and second.reserve() == 0
+    assert second.reserve() == pytest.approx(0.2, abs=0.02)
+
+    # Uma espera além do prazo não consome a ficha
+    assert first.reserve(max_wait=0.1) is None
+    assert first.reserve() == pytest.approx(0.4, abs=0.02)
+
+
+def test_retry_after_pauses_every_worker(limiter_path):
+    first = RateLimiter(rate=100, burst=10, path=limiter_path)
+    second = RateLimiter(rate=100, burst=10, path=limiter_path)
+    first.penalize(0.5)
+    assert second.reserve() == pytest.approx(0.5, abs=0.02)
+    assert first.reserve() == pytest.approx(0.51, abs=0.02)
+
+
+def test_disabled_limiter_never_waits(monkeypatch, limiter_path):
+    monkeypatch.setenv("WIKI_RATE_LIMIT", "0")
+    limiter = get_rate_limiter()
+    assert not limiter.enabled
+    assert [limiter.reserve() for _ in range(100)] == [0.0] * 100
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after("amanhã") is None and parse_retry_after(None) is None
+
+
+def test_tool_waits_for_the_limiter_and_honors_retry_after(limiter_path, monkeypatch):
+    monkeypatch.setenv("WIKI_RATE_LIMIT", "1000")
+    throttled = requests.Response()
+    throttled.status_code = 429
+    throttled.headers["Retry-After"] = "0.3"
+    ok = MagicMock()
+    ok.json.return_value = {"query": {}}
+    session = MagicMock()
+    session.get.side_effect = [requests.exceptions.HTTPError(response=throttled), ok]
+
+    counts = WIKIPEDIA_RATE_LIMIT_WAIT.count(mode="sync"), WIKIPEDIA_THROTTLED.value(mode="sync")
+    attempts = WIKIPEDIA_ATTEMPTS.value(mode="sync")
+    started = time.monotonic()
+    with patch("tools.wikipedia_tool.get_session", return_value=session):
+        assert WikipediaTool()._request_json("https://pt.wikipedia.org/w/api.php", "Saúde") == {"query": {}}
+
+    assert 0.25 < time.monotonic() - started < 1.5
+    assert WIKIPEDIA_ATTEMPTS.value(mode="sync") == attempts + 2
+    assert WIKIPEDIA_RATE_LIMIT_WAIT.count(mode="sync") == counts[0] + 2
+    assert WIKIPEDIA_THROTTLED.value(mode="sync") == counts[1] + 1
+    assert WIKIPEDIA_RATE_LIMIT_WAIT.sum(mode="sync") >= 0.25
+
+
+def test_tool_gives_up_when_the_limiter_exceeds_the_deadline(limiter_path, monkeypatch):
+    monkeypatch.setenv("WIKI_RATE_LIMIT", "1000")
+    get_rate_limiter().penalize(30)
+    session = MagicMock()
+    started = time.monotonic()
+    with patch("tools.wikipedia_tool.get_session", return_value=session):
+        result = WikipediaTool()._request_json("https://pt.wikipedia.org/w/api.php", "Saúde",
+                                               deadline=time.monotonic() + 1)
+    assert result is None
+    assert time.monotonic() - started < 0.5
+    session.get.assert_not_called()
+
+
+def test_async_reservation_does_not_block_the_event_loop(limiter_path):
+    class ContendedLimiter:
+        def reserve(self, max_wait=None):
+            time.sleep(0.3)  # Outro processo segurando a transação do balde
+            return 0.0
+
+    class Response:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        async def json(self, content_type=None):
+            return {"query": {}}
+
+    class Session:
+        def get(self, url, timeout):
+            return Response()
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        result, _ = await asyncio.gather(
+            WikipediaTool()._amake_api_request(Session(), "https://pt.wikipedia.org/w/api.php", "Saúde"),
+            ticker(),
+        )
+        return result, ticks
+
+    with patch("tools.wikipedia_tool.get_rate_limiter", return_value=ContendedLimiter()):
+        started = time.monotonic()
+        result, ticks = asyncio.run(scenario())
+
+    assert result == {"query": {}}
+    # Com a reserva no loop, o ticker só voltaria a rodar depois dos 0,3 s
+    assert ticks[-1] - started < 0.25
@@ -0,0 +1,82 @@
+import os
+import sqlite3
+
+import pytest
+from unittest.mock import patch
+from tools import wiki_search
+from tools.wiki_search import SearchIndex, build_search_index, tokenize
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes do índice de busca BM25 local usado como último recurso da ferramenta.
+"""
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / "busca.sqlite3")
+    build_search_index(os.path.join(FIXTURES, "ptwiki_sample.jsonl"), path)
+    return path
+
+
+def test_tokenize_folds_accents_and_stopwords():
+    assert tokenize("A Saúde Pública do Brasil") == ["saude", "publica", "brasil"]
+
+
+def test_search_ranks_by_bm25(index_path):
+    index = SearchIndex(index_path)
+
+    hits = index.search("rio neotropicais")
+    assert [hit["title"] for hit in hits] == ["Rio Amazonas", "Biodiversidade"]
+    assert hits[0]["score"] > hits[1]["score"]
+    assert index.search("xyzzy") == []
+
+    stats = index.stats()
+    assert stats["documents"] == 5  # A página vazia não é indexada
+    assert stats["bytes"] > 0
+    assert stats["build_seconds"] >= 0
+
+
+def test_incremental_update_replaces_document(index_path):
+    index = SearchIndex(index_path)
+
+    result = index.add_documents([
+        {"title": "Rio Amazonas", "text": "Rio sul-americano."},
+        {"title": "Rio Negro", "text": "O rio Negro tem peixes neotropicais."},
+    ])
+
+    assert result["added"] == 1 and result["replaced"] == 1
+    assert index.stats()["documents"] == 6
+    assert [hit["title"] for hit in index.search("neotropicais")] == ["Rio Negro", "Biodiversidade"]
+
+
+@pytest.mark.skipif(not hasattr(sqlite3.Connection, "setlimit"), reason="requer Python 3.11+")
+def test_common_terms_scale_past_the_sql_variable_limit(tmp_path, monkeypatch):
+    index = SearchIndex(str(tmp_path / "busca.sqlite3"))
+    index.add_documents(
+        {"title": f"Página {i}", "text": "Brasil " * (1 + i % 3) + ("amazonas" if i == 7 else f"termo{i}")}
+        for i in range(600)
+    )
+    # Mais páginas com o termo do que variáveis permitidas em uma consulta
+    index._connect().setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 100)
+
+    hits = index.search("brasil amazonas", limit=3)
+    assert hits[0]["title"] == "Página 7"
+    assert len(index.search("brasil", limit=10)) == 10
+
+    # Só as postings de maior tf de um termo comum são lidas
+    monkeypatch.setattr(wiki_search, "MAX_TERM_POSTINGS", 50)
+    assert all("Brasil Brasil Brasil" in hit["text"] for hit in index.search("brasil", limit=60))
+
+
+def test_tool_returns_best_page_content_locally(index_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+    tool = WikipediaTool(search_index=index_path)
+
+    with patch.object(WikipediaTool, "_request_json", side_effect=AssertionError("sem rede")):
+        result = tool._try_search_api("peixes do amazonas")
+
+    assert result.startswith("(Não encontrado exatamente 'peixes do amazonas'; resultado mais relevante: 'Rio Amazonas')")
+    assert "maior rio do mundo em volume de água" in result
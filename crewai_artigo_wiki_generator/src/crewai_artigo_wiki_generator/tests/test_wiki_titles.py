@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from unittest.mock import patch
+from tools.wiki_titles import TitleIndex, build_title_index, fold_title
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes do índice de resolução de títulos (chaves dobradas -> títulos canônicos).
+"""
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    path = str(tmp_path / "titulos.sqlite3")
+    build_title_index(os.path.join(FIXTURES, "ptwiki_sample.jsonl"), path)
+    return path
+
+
+def test_fold_title_ignores_case_accents_and_plurals():
+    assert fold_title("Inteligências Artificiais") == fold_title("inteligencia artificial")
+    assert fold_title("Ações_Humanas") == "acao humana"
+    assert fold_title("Rios") == fold_title("rio")
+
+
+def test_resolve_and_prefix(index_path):
+    index = TitleIndex(index_path)
+
+    assert index.resolve("Inteligência Artificial") == ["Inteligência artificial"]
+    assert index.resolve("inteligencia artificial") == ["Inteligência artificial"]
+    assert index.resolve("Diversidade Biológica") == ["Biodiversidade"]
+    assert index.resolve("Inexistente") == []
+    assert index.prefix("Hist") == ["História da saúde"]
+    assert index.stats()["titles"] == 6
+
+
+def test_tool_uses_index_instead_of_heuristic_variations(index_path, tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+    tool = WikipediaTool(title_index=index_path)
+    calls = []
+
+    def fake_request(titles, deadline=None):
+        calls.append(list(titles))
+        pages = {"-1": {"title": "Inteligência Artificial", "missing": ""}}
+        if "Inteligência artificial" in titles:
+            pages["7"] = {"title": "Inteligência artificial", "extract": "IA é um campo da computação."}
+        return {"query": {"pages": pages}}
+
+    with patch.object(WikipediaTool, "_make_api_request", side_effect=fake_request):
+        result = tool._search_with_fallbacks("Inteligência Artificial")
+
+    assert calls == [["Inteligência Artificial", "Inteligência artificial"]]
+    assert result == (
+        "(Redirecionado de 'Inteligência Artificial' para 'Inteligência artificial')\n\n"
+        "IA é um campo da computação."
+    )
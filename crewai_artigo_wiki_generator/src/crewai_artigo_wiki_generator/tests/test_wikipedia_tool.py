@@ -0,0 +1,211 @@
+import asyncio
+import time
+
+import pytest
+import requests
+from unittest.mock import patch
+from tools.wikipedia_tool import WikipediaTool
+
+"""
+Testes da WikipediaTool sem acesso à rede: as respostas da API são simuladas.
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("WIKI_CACHE_PATH", str(tmp_path / "wikipedia.sqlite3"))
+
+
+@pytest.fixture
+def tool():
+    return WikipediaTool()
+
+
+def test_batch_resolution_keeps_normalization_and_redirects(tool):
+    response = {
+        "query": {
+            "normalized": [{"from": "saude", "to": "Saude"}],
+            "redirects": [{"from": "Saude", "to": "Saúde"}],
+            "pages": {
+                "-1": {"title": "Saúde Pública De X", "missing": ""},
+                "123": {"title": "Saúde", "extract": "A saúde é um estado[1] de bem-estar."},
+            },
+        }
+    }
+
+    with patch.object(WikipediaTool, "_make_api_request", return_value=response) as mocked:
+        resolved = tool._search_wikipedia_batch(["Saúde Pública De X", "saude"])
+
+    assert mocked.call_count == 1
+    assert resolved["Saúde Pública De X"]["text"].startswith("Página não encontrada")
+    entry = resolved["saude"]
+    assert entry["normalized"] == "Saude"
+    assert entry["redirected_from"] == "Saude"
+    assert entry["title"] == "Saúde"
+    assert entry["text"] == "A saúde é um estado de bem-estar."
+
+
+def test_fallbacks_use_at_most_two_requests(tool):
+    calls = []
+
+    def fake_request(titles, deadline=None):
+        calls.append(list(titles))
+        pages = {str(-i): {"title": t, "missing": ""} for i, t in enumerate(titles, 1)}
+        if "História de Xyz" in titles:
+            pages["42"] = {"title": "História de Xyz", "extract": "Texto histórico."}
+            pages.pop(str(-(titles.index("História de Xyz") + 1)))
+        return {"query": {"pages": pages}}
+
+    with patch.object(WikipediaTool, "_make_api_request", side_effect=fake_request), \
+            patch.object(WikipediaTool, "_try_search_api", return_value="busca") as search_api:
+        result = tool._search_with_fallbacks("Xyz")
+
+    assert len(calls) <= 2
+    assert all(len(batch) <= tool._BATCH_SIZE for batch in calls)
+    assert result == "(Redirecionado de 'Xyz' para 'História de Xyz')\n\nTexto histórico."
+    search_api.assert_not_called()
+
+
+def test_async_fallbacks_first_valid_wins_and_cancels_others(tool):
+    cancelled = []
+
+    async def fake_request(session, url, label, deadline=None):
+        titles = label.split("|")
+        if "História de Xyz" in titles:
+            return {"query": {"pages": {"42": {"title": "História de Xyz", "extract": "Texto histórico."}}}}
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(label)
+            raise
+        return None
+
+    with patch.object(WikipediaTool, "_amake_api_request", side_effect=fake_request):
+        result = asyncio.run(tool._arun("Xyz"))
+
+    assert result == "(Redirecionado de 'Xyz' para 'História de Xyz')\n\nTexto histórico."
+    assert cancelled
+
+
+def test_request_respects_lookup_deadline(tool):
+    class DeadSession:
+        calls = 0
+
+        def get(self, url, timeout):
+            DeadSession.calls += 1
+            time.sleep(0.05)
+            raise requests.exceptions.ConnectionError("sem rede")
+
+    started = time.monotonic()
+    with patch("tools.wikipedia_tool.get_session", return_value=DeadSession()):
+        result = tool._request_json("https://pt.wikipedia.org/w/api.php", "Xyz", deadline=time.monotonic() + 0.3)
+
+    assert result is None
+    assert time.monotonic() - started < 1.5
+    assert 1 <= DeadSession.calls <= tool._MAX_RETRIES
+
+
+def test_connection_failures_are_not_cached(tool):
+    with patch.object(WikipediaTool, "_search_with_fallbacks",
+                      return_value="Erro ao conectar com a Wikipedia. Tente novamente mais tarde."):
+        tool._run("Saúde")
+
+    assert WikipediaTool._get_cache().get("Saúde") is None
+
+
+def test_known_missing_titles_skip_the_network(tool):
+    missing = {"query": {"pages": {"-1": {"title": "Xyz Inexistente", "missing": ""}}}}
+
+    with patch.object(WikipediaTool, "_make_api_request", return_value=missing) as mocked:
+        first = tool._search_wikipedia("Xyz Inexistente")
+        second = tool._search_wikipedia("Xyz Inexistente")
+
+    assert first == second == "Página não encontrada para: Xyz Inexistente"
+    assert mocked.call_count == 1
+    assert WikipediaTool.negative_cache_stats()["hits"] == 1
+
+
+def test_bundle_refetches_article_and_links_of_the_resolved_title(tool):
+    resolved = {"title": "Inteligência artificial", "text": "IA imita a inteligência humana.",
+                "requested": "Inteligência Artificial", "normalized": None,
+                "redirected_from": None, "fragment": None}
+    article = "IA imita a inteligência humana.\n\n== História ==\nRamo da ciência da computação.\n\n== Referências ==\nX"
+    requested = []
+
+    def fake_request(url, label, deadline=None):
+        requested.append(("links" if "prop=links" in url else "article", label))
+        if label != "Inteligência artificial":
+            return {"query": {"pages": {"-1": {"title": label, "missing": ""}}}}
+        if "prop=links" in url:
+            links = [{"ns": 0, "title": t} for t in ("Ciência da computação", "Inteligência humana", "Robótica")]
+            return {"query": {"pages": {"1": {"title": label, "links": links}}}}
+        return {"query": {"pages": {"1": {"title": label, "extract": article}}}}
+
+    related = {
+        "Inteligência humana": {"title": "Inteligência humana", "text": "Capacidade mental."},
+        "Ciência da computação": {"title": "Ciência da computação", "text": "Página não encontrada para: X"},
+    }
+    with patch.object(WikipediaTool, "_request_json", side_effect=fake_request), \
+            patch.object(WikipediaTool, "_resolve_page", return_value=resolved), \
+            patch.object(WikipediaTool, "_search_wikipedia_batch", return_value=related) as batch:
+        bundle = tool.fetch_bundle("inteligência artificial", related_pages=2)
+
+    assert sorted(requested) == [
+        ("article", "Inteligência Artificial"), ("article", "Inteligência artificial"),
+        ("links", "Inteligência Artificial"), ("links", "Inteligência artificial"),
+    ]
+    assert [s["title"] for s in bundle["sections"]] == ["Introdução", "História"]
+    batch.assert_called_once()
+    assert batch.call_args[0][0] == ["Inteligência humana", "Ciência da computação"]
+    assert bundle["related"] == [{"title": "Inteligência humana", "text": "Capacidade mental."}]
+
+
+def test_bundle_mode_uses_its_own_cache_entry(tool):
+    bundle_tool = WikipediaTool(bundle_pages=2)
+    with patch.object(WikipediaTool, "_search_with_fallbacks", return_value="introdução"), \
+            patch.object(WikipediaTool, "_search_bundle", return_value=("# Saúde\n\npacote", True)) as mocked:
+        assert tool._run("Saúde") == "introdução"
+        assert bundle_tool._run("Saúde") == "# Saúde\n\npacote"
+        assert bundle_tool._run("Saúde") == "# Saúde\n\npacote"
+    assert mocked.call_count == 1
+
+
+def test_bundle_mode_never_caches_connection_failures():
+    bundle_tool = WikipediaTool(bundle_pages=2)
+    intro = {"query": {"pages": {"1": {"title": "Saúde", "extract": "Saúde é bem-estar."}}}}
+
+    with patch.object(WikipediaTool, "_request_json", return_value=None):
+        assert "Saúde é bem-estar" not in bundle_tool._run("Saúde")
+    # Página resolvida, mas sem o artigo completo e os links: pacote incompleto
+    with patch.object(WikipediaTool, "_request_json",
+                      side_effect=lambda url, label, deadline=None: intro if "exintro" in url else None):
+        assert bundle_tool._run("Saúde") == "# Saúde\n\nSaúde é bem-estar."
+    assert WikipediaTool._get_cache().get(bundle_tool._cache_key("Saúde")) is None
+
+
+def test_async_cache_lookup_does_not_block_the_event_loop(tool):
+    cache = WikipediaTool._get_cache()
+    cache.set("Saúde", "Saúde é bem-estar.")
+    real_get = cache.get
+
+    def contended_get(key):
+        time.sleep(0.3)  # Outro processo segurando o lock do SQLite
+        return real_get(key)
+
+    async def scenario():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        _, result = await asyncio.gather(ticker(), tool._arun("Saúde"))
+        return result, ticks
+
+    with patch.object(cache, "get", side_effect=contended_get):
+        result, ticks = asyncio.run(scenario())
+
+    assert result == "Saúde é bem-estar."
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.25
@@ -0,0 +1,19 @@
+import re
+import unicodedata
+from urllib.parse import unquote
+
+QUERY_SPECIAL_CHARS = re.compile(r'[^\w\sáéíóúâêîôûãõç-]', re.IGNORECASE)
+
+
+def clean_query(query: str) -> str:
+    """Consulta decodificada (%XX), sem caracteres especiais e com espaços simples: 'Saúde%21  pública' -> 'Saúde pública'"""
+    if '%' in query:
+        query = unquote(query)
+    query = QUERY_SPECIAL_CHARS.sub('', query)
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+def strip_accents(text: str) -> str:
+    """Remove acentos e cedilhas: 'Saúde e Ação' -> 'Saude e Acao'"""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
@@ -0,0 +1,90 @@
+import re
+from typing import Dict, List, Optional
+
+from tools.text_utils import strip_accents
+from tools.wiki_offline import truncate_extract
+
+# Seções de navegação e fontes: não acrescentam conteúdo à pesquisa
+SKIPPED_SECTIONS = frozenset({
+    "ver tambem", "referencias", "ligacoes externas", "bibliografia", "notas",
+    "notas e referencias", "leitura adicional", "leituras adicionais", "fontes",
+})
+BUNDLE_MAX_CHARS = 12000  # Texto total das seções (~3000 tokens)
+SECTION_HEADING = re.compile(r"^(={2,6})\s*(.+?)\s*\1\s*$", re.MULTILINE)
+
+
+def _fold(text: str) -> str:
+    return " " + " ".join(re.findall(r"\w+", strip_accents(text.casefold()))) + " "
+
+
+def split_sections(extract: str, max_chars: int = BUNDLE_MAX_CHARS) -> List[Dict[str, object]]:
+    """
+    Divide o texto completo do artigo (`exsectionformat=wiki`) em seções
+    {"title", "level", "text"}. A introdução vem primeiro; seções de navegação
+    (Ver também, Referências...) e suas subseções são descartadas, e o texto
+    total é limitado a `max_chars`.
+    """
+    sections = []
+    headings = list(SECTION_HEADING.finditer(extract))
+    intro = extract[:headings[0].start()] if headings else extract
+    sections.append({"title": "Introdução", "level": 2, "text": intro.strip()})
+
+    skipped_level = None
+    for position, heading in enumerate(headings):
+        level = len(heading.group(1))
+        title = heading.group(2)
+        end = headings[position + 1].start() if position + 1 < len(headings) else len(extract)
+        if skipped_level is not None and level > skipped_level:
+            continue
+        skipped_level = level if _fold(title).strip() in SKIPPED_SECTIONS else None
+        if skipped_level is None:
+            sections.append({"title": title, "level": level, "text": extract[heading.end():end].strip()})
+
+    budget = max_chars
+    kept = []
+    for section in sections:
+        if not section["text"]:
+            continue
+        if budget <= 0:
+            break
+        text = truncate_extract(section["text"], budget)
+        budget -= len(text)
+        kept.append(dict(section, text=text))
+    return kept
+
+
+def rank_links(links: List[str], text: str, limit: int, exclude: Optional[str] = None) -> List[str]:
+    """
+    Títulos linkados que aparecem no texto, na ordem da primeira menção: as páginas
+    em que o próprio artigo se apoia. Links não citados (caixas de navegação, listas)
+    e `exclude` (a própria página) são ignorados.
+    """
+    folded_text = _fold(text)
+    excluded = _fold(exclude) if exclude else None
+    positions = []
+    for link in dict.fromkeys(links):
+        if _fold(link) == excluded:
+            continue
+        position = folded_text.find(_fold(link))
+        if position >= 0:
+            positions.append((position, -len(link), link))
+    return [link for _, _, link in sorted(positions)[:limit]]
+
+
+def format_bundle(bundle: Dict[str, object]) -> str:
+    """Texto estruturado do pacote de pesquisa: seções do artigo seguidas das páginas relacionadas"""
+    parts = [f"# {bundle.get('title') or bundle.get('topic')}"]
+    sections = bundle.get("sections") or []
+    if sections:
+        for section in sections:
+            if len(sections) > 1:
+                parts.append("#" * section["level"] + f" {section['title']}")
+            parts.append(section["text"])
+    else:
+        parts.append(bundle.get("text") or "")
+    related = bundle.get("related") or []
+    if related:
+        parts.append("# Páginas relacionadas")
+        for page in related:
+            parts.extend([f"## {page['title']}", page["text"]])
+    return "\n\n".join(parts)
@@ -0,0 +1,201 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "WIKI_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "crewai_artigo_wiki_generator", "wikipedia.sqlite3"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("WIKI_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+DEFAULT_TTL = float(os.environ.get("WIKI_CACHE_TTL", 7 * 24 * 3600))
+# Páginas inexistentes podem ser criadas a qualquer momento: guardamos por menos tempo
+NEGATIVE_TTL = float(os.environ.get("WIKI_NEGATIVE_CACHE_TTL", 24 * 3600))
+
+
+class TwoTierCache:
+    """
+    Cache em dois níveis para resultados da Wikipedia:
+    - Memória: LRU limitado pelo tamanho total (em bytes) dos valores
+    - Disco: SQLite compartilhado entre processos, com TTL por entrada
+
+    O nível em disco usa WAL, então vários workers (gunicorn, processos de lote)
+    podem ler e escrever no mesmo arquivo ao mesmo tempo.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+        namespace: str = "default",
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.namespace = namespace
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expired": 0,
+            "sets": 0,
+        }
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "namespace TEXT NOT NULL, "
+                    "key TEXT NOT NULL, "
+                    "value TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL, "
+                    "PRIMARY KEY (namespace, key))"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão SQLite da thread atual (uma por thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _sizeof(key: str, value: str) -> int:
+        return len(key.encode("utf-8")) + len(value.encode("utf-8"))
+
+    def _memory_put(self, key: str, value: str, expires_at: float) -> None:
+        size = self._sizeof(key, value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[2]
+
+        self._memory[key] = (value, expires_at, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats["evictions"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Busca primeiro na memória e depois no disco; promove acertos do disco para a memória"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                self._memory.pop(key)
+                self._memory_bytes -= size
+                self._stats["expired"] += 1
+
+        if self.path:
+            try:
+                row = self._connect().execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao ler cache em disco para '{key}': {str(e)}")
+                row = None
+
+            if row is not None:
+                value, expires_at = row
+                if expires_at > now:
+                    with self._lock:
+                        self._memory_put(key, value, expires_at)
+                        self._stats["disk_hits"] += 1
+                    return value
+                with self._lock:
+                    self._stats["expired"] += 1
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Grava a entrada nos dois níveis com o TTL informado (ou o padrão do cache)"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._memory_put(key, value, expires_at)
+            self._stats["sets"] += 1
+
+        if self.path:
+            try:
+                self._connect().execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, value, expires_at),
+                )
+            except sqlite3.Error as e:
+                logger.warning(f"Falha ao gravar cache em disco para '{key}': {str(e)}")
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def purge_expired(self) -> int:
+        """Remove do disco as entradas expiradas deste namespace"""
+        if not self.path:
+            return 0
+        cursor = self._connect().execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time()),
+        )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """Limpa os dois níveis (apenas o namespace deste cache) e zera os contadores"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for name in self._stats:
+                self._stats[name] = 0
+        if self.path:
+            self._connect().execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna uma cópia dos contadores de acertos, falhas e remoções"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        return stats
+
+
+_shared_caches: Dict[tuple, TwoTierCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(namespace: str = "default", ttl: float = DEFAULT_TTL,
+                     path: Optional[str] = None) -> TwoTierCache:
+    """Retorna a instância de cache compartilhada do processo para o namespace/arquivo informados"""
+    path = path or os.environ.get("WIKI_CACHE_PATH", DEFAULT_CACHE_PATH)
+    with _shared_lock:
+        cache = _shared_caches.get((path, namespace))
+        if cache is None:
+            cache = TwoTierCache(path=path, ttl=ttl, namespace=namespace)
+            _shared_caches[(path, namespace)] = cache
+        return cache
@@ -0,0 +1,68 @@
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Códigos que valem uma nova tentativa (limite de taxa e falhas temporárias do servidor)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_session_lock = threading.Lock()
+
+
+def get_session(user_agent: str, pool_size: int = 20) -> requests.Session:
+    """
+    Retorna a sessão HTTP compartilhada do processo (keep-alive + pool de conexões).
+
+    A sessão é recriada após um fork, para que cada worker tenha seu próprio pool.
+    """
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": user_agent})
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Backoff exponencial com jitter total: valor aleatório entre 0 e min(cap, base * 2^tentativa)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def remaining(deadline: Optional[float]) -> Optional[float]:
+    """Segundos restantes até o prazo (monotônico); None quando não há prazo"""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def make_deadline(timeout: Optional[float]) -> Optional[float]:
+    """Converte um tempo limite em segundos para um prazo absoluto no relógio monotônico"""
+    if timeout is None or timeout <= 0:
+        return None
+    return time.monotonic() + timeout
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos pedidos pelo cabeçalho Retry-After (número ou data HTTP); None se ausente ou inválido"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,257 @@
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"WKIX"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sIQ")
+# key_offset, key_length, data_offset, data_length
+ENTRY = struct.Struct("<QIQI")
+EXTRACT_CHARS = 1500  # Mesmo limite usado em `exchars` na API online
+
+
+def normalize_title(title: str) -> str:
+    """Normalização de títulos do MediaWiki: '_' vira espaço e a primeira letra fica maiúscula"""
+    title = re.sub(r'[\s_]+', ' ', title).strip()
+    return title[:1].upper() + title[1:]
+
+
+def truncate_extract(text: str, limit: int = EXTRACT_CHARS) -> str:
+    """Corta o extrato no limite de caracteres, sem quebrar palavras (como o `exchars`)"""
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    if ' ' in cut:
+        cut = cut[:cut.rindex(' ')]
+    return cut.rstrip() + "..."
+
+
+def wikitext_to_intro(wikitext: str) -> str:
+    """Converte o wikitexto da introdução (antes da primeira seção) em texto simples"""
+    intro = re.split(r'^==[^=].*$', wikitext, maxsplit=1, flags=re.MULTILINE)[0]
+    intro = re.sub(r'<ref[^>]*/>', '', intro)
+    intro = re.sub(r'<ref[^>]*>.*?</ref>', '', intro, flags=re.DOTALL)
+    intro = re.sub(r'<!--.*?-->', '', intro, flags=re.DOTALL)
+    # Remove predefinições {{...}}, inclusive aninhadas
+    previous = None
+    while previous != intro:
+        previous = intro
+        intro = re.sub(r'\{\{[^{}]*\}\}', '', intro)
+    intro = re.sub(r'\{\|.*?\|\}', '', intro, flags=re.DOTALL)  # tabelas
+    intro = re.sub(r'\[\[(?:Ficheiro|Arquivo|Imagem|File|Image|Categoria|Category):[^\]]*(?:\[\[[^\]]*\]\][^\]]*)*\]\]', '', intro)
+    intro = re.sub(r'\[\[[^\]|]*\|([^\]]*)\]\]', r'\1', intro)
+    intro = re.sub(r'\[\[([^\]]*)\]\]', r'\1', intro)
+    intro = re.sub(r'\[https?://[^\s\]]+\s*([^\]]*)\]', r'\1', intro)
+    intro = re.sub(r"'{2,}", '', intro)
+    intro = re.sub(r'<[^>]+>', '', intro)
+    intro = re.sub(r'[ \t]+', ' ', intro)
+    return re.sub(r'\n{3,}', '\n\n', intro).strip()
+
+
+def iter_dump(path: str) -> Iterator[Dict[str, object]]:
+    """
+    Lê um dump de extratos e gera registros {"title", "text"} ou {"title", "redirect"}.
+
+    Formatos aceitos:
+    - JSONL: {"title": ..., "extract"|"text": ..., "redirects": [...]} ou {"title": ..., "redirect": ...}
+    - XML de exportação do MediaWiki (pages-articles), apenas o espaço nominal principal
+    """
+    if path.endswith((".jsonl", ".json")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                if item.get("redirect"):
+                    yield {"title": item["title"], "redirect": item["redirect"]}
+                    continue
+                yield {"title": item["title"], "text": item.get("extract", item.get("text", ""))}
+                for alias in item.get("redirects", []):
+                    yield {"title": alias, "redirect": item["title"]}
+        return
+
+    def local(tag: str) -> str:
+        return tag.rsplit('}', 1)[-1]
+
+    for _, elem in ET.iterparse(path, events=("end",)):
+        if local(elem.tag) != "page":
+            continue
+        fields = {local(child.tag): child for child in elem}
+        namespace = fields.get("ns")
+        if namespace is None or (namespace.text or "0").strip() == "0":
+            title = fields["title"].text or ""
+            redirect = fields.get("redirect")
+            if redirect is not None:
+                yield {"title": title, "redirect": redirect.get("title", "")}
+            else:
+                text = ""
+                revision = fields.get("revision")
+                if revision is not None:
+                    for child in revision:
+                        if local(child.tag) == "text":
+                            text = child.text or ""
+                yield {"title": title, "text": wikitext_to_intro(text)}
+        elem.clear()
+
+
+def build_index(dump_path: str, index_dir: str) -> Dict[str, float]:
+    """
+    Constrói o índice compacto em `index_dir`:
+    - data.bin: registros "título\\nextrato" em UTF-8
+    - keys.bin: títulos e redirecionamentos normalizados, ordenados
+    - index.bin: cabeçalho + entradas (chave -> offset/tamanho do registro), para busca binária via mmap
+    """
+    started = time.monotonic()
+    os.makedirs(index_dir, exist_ok=True)
+
+    entries: Dict[bytes, Tuple[int, int]] = {}
+    redirects: Dict[str, str] = {}
+    pages = 0
+    with open(os.path.join(index_dir, "data.bin.tmp"), "wb") as data:
+        offset = 0
+        for item in iter_dump(dump_path):
+            title = normalize_title(str(item["title"]))
+            if "redirect" in item:
+                redirects[title] = normalize_title(str(item["redirect"]))
+                continue
+            record = f"{title}\n{truncate_extract(str(item['text']))}".encode("utf-8")
+            data.write(record)
+            entries[title.encode("utf-8")] = (offset, len(record))
+            offset += len(record)
+            pages += 1
+
+    resolved_redirects = 0
+    for source, target in redirects.items():
+        hops = 0
+        while target in redirects and hops < 5:  # Redirecionamentos duplos
+            target = redirects[target]
+            hops += 1
+        location = entries.get(target.encode("utf-8"))
+        key = source.encode("utf-8")
+        if location is not None and key not in entries:
+            entries[key] = location
+            resolved_redirects += 1
+
+    keys = sorted(entries)
+    with open(os.path.join(index_dir, "keys.bin.tmp"), "wb") as keys_file, \
+            open(os.path.join(index_dir, "index.bin.tmp"), "wb") as index_file:
+        index_file.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(keys)))
+        key_offset = 0
+        for key in keys:
+            data_offset, data_length = entries[key]
+            keys_file.write(key)
+            index_file.write(ENTRY.pack(key_offset, len(key), data_offset, data_length))
+            key_offset += len(key)
+
+    for name in ("data.bin", "keys.bin", "index.bin"):
+        os.replace(os.path.join(index_dir, f"{name}.tmp"), os.path.join(index_dir, name))
+
+    stats = {
+        "pages": pages,
+        "redirects": resolved_redirects,
+        "keys": len(keys),
+        "bytes": sum(os.path.getsize(os.path.join(index_dir, name)) for name in ("data.bin", "keys.bin", "index.bin")),
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Índice offline construído em {index_dir}: {stats}")
+    return stats
+
+
+class OfflineWikipedia:
+    """Consulta o índice local com leituras via mmap (sem rede e sem carregar o dump em memória)"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._files = []
+        self._data = self._map("data.bin")
+        self._keys = self._map("keys.bin")
+        self._index = self._map("index.bin")
+
+        magic, version, self.count = HEADER.unpack_from(self._index, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"Índice offline inválido em {index_dir}")
+
+    def _map(self, name: str) -> mmap.mmap:
+        f = open(os.path.join(self.index_dir, name), "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""  # mmap não aceita arquivos vazios
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _entry(self, position: int) -> Tuple[bytes, int, int]:
+        key_offset, key_length, data_offset, data_length = ENTRY.unpack_from(
+            self._index, HEADER.size + position * ENTRY.size
+        )
+        return self._keys[key_offset:key_offset + key_length], data_offset, data_length
+
+    def _find(self, key: bytes) -> Optional[Tuple[int, int]]:
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            current, data_offset, data_length = self._entry(middle)
+            if current == key:
+                return data_offset, data_length
+            if current < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def lookup(self, title: str) -> Optional[Dict[str, object]]:
+        """Retorna {"title", "text", "normalized", "redirected"} ou None se o título não existir"""
+        normalized = normalize_title(title)
+        location = self._find(normalized.encode("utf-8"))
+        if location is None:
+            return None
+        data_offset, data_length = location
+        canonical, _, text = self._data[data_offset:data_offset + data_length].decode("utf-8").partition("\n")
+        return {
+            "title": canonical,
+            "text": text,
+            "normalized": normalized if normalized != title else None,
+            "redirected": canonical != normalized,
+        }
+
+    def __contains__(self, title: str) -> bool:
+        return self._find(normalize_title(title).encode("utf-8")) is not None
+
+    def close(self) -> None:
+        for mapped in (self._data, self._keys, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for f in self._files:
+            f.close()
+
+
+_offline_indexes: Dict[str, OfflineWikipedia] = {}
+_offline_lock = threading.Lock()
+
+
+def get_offline_index(index_dir: str) -> OfflineWikipedia:
+    """Instância compartilhada do índice offline para o diretório informado"""
+    with _offline_lock:
+        index = _offline_indexes.get(index_dir)
+        if index is None:
+            index = OfflineWikipedia(index_dir)
+            _offline_indexes[index_dir] = index
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Constrói o índice offline da Wikipedia a partir de um dump")
+    parser.add_argument("dump", help="dump de extratos (.jsonl) ou XML de exportação do MediaWiki")
+    parser.add_argument("index_dir", help="diretório de saída do índice")
+    args = parser.parse_args()
+    print(build_index(args.dump, args.index_dir))
@@ -0,0 +1,151 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from tools.wiki_cache import DEFAULT_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Requisições por segundo à API da Wikipedia, somando todas as threads e processos (0 = sem limite)
+DEFAULT_RATE = 10.0
+# Requisições que podem sair de uma vez depois de um período ocioso
+DEFAULT_BURST = 20
+
+
+class RateLimiter:
+    """
+    Balde de fichas compartilhado por todas as threads e processos que usam o mesmo arquivo.
+
+    O estado fica numa linha do SQLite (o mesmo arquivo do cache da Wikipedia, por
+    padrão) e guarda apenas o instante teórico da próxima ficha (GCRA), o que equivale
+    a um balde com `rate` fichas por segundo e capacidade `burst`. Cada requisição
+    reserva sua ficha numa transação curta e depois espera fora dela, então nenhum
+    processo segura o arquivo enquanto dorme.
+
+    Um `Retry-After` recebido por qualquer worker (`penalize`) adia a próxima ficha de
+    todos eles; depois da pausa as requisições voltam espaçadas, sem rajada.
+    Com `path=None` o balde vale só para o processo atual.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 path: Optional[str] = DEFAULT_CACHE_PATH, name: str = "wikipedia"):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.path = path
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_at = 0.0  # Estado usado quando não há arquivo
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connect().execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit (name TEXT PRIMARY KEY, next_at REAL NOT NULL)"
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão SQLite da thread atual (uma por thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _update(self, step) -> Optional[float]:
+        """Aplica `step(next_at, agora) -> (novo next_at, resultado)` de forma atômica"""
+        now = time.time()
+        if not self.path:
+            with self._lock:
+                self._next_at, result = step(self._next_at, now)
+            return result
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_at FROM rate_limit WHERE name = ?", (self.name,)).fetchone()
+            next_at, result = step(row[0] if row else 0.0, now)
+            conn.execute("INSERT OR REPLACE INTO rate_limit (name, next_at) VALUES (?, ?)", (self.name, next_at))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserva uma ficha e retorna quantos segundos esperar antes de usá-la.
+
+        Retorna None, sem consumir ficha, quando a espera passaria de `max_wait`.
+        """
+        if not self.enabled:
+            return 0.0
+        interval = 1.0 / self.rate
+        tolerance = (self.burst - 1) * interval
+
+        def step(next_at: float, now: float):
+            wait = max(0.0, next_at - tolerance - now)
+            if max_wait is not None and wait > max_wait:
+                return next_at, None
+            return max(next_at, now) + interval, wait
+
+        try:
+            return self._update(step)
+        except sqlite3.Error as e:
+            # Sem o arquivo não há coordenação: segue sem limite em vez de travar a pesquisa
+            logger.warning(f"Falha ao consultar o limite de taxa em disco: {str(e)}")
+            return 0.0
+
+    def acquire(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """Espera pela próxima ficha; retorna o tempo esperado ou None se passaria de `max_wait`"""
+        wait = self.reserve(max_wait)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float) -> None:
+        """Adia a próxima ficha de todos os workers por `seconds` (cabeçalho Retry-After)"""
+        if not self.enabled or seconds <= 0:
+            return
+        tolerance = (self.burst - 1) / self.rate
+
+        def step(next_at: float, now: float):
+            return max(next_at, now + seconds + tolerance), None
+
+        try:
+            self._update(step)
+        except sqlite3.Error as e:
+            logger.warning(f"Falha ao registrar Retry-After no limite de taxa: {str(e)}")
+
+
+_shared_limiters: Dict[tuple, RateLimiter] = {}
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter(path: Optional[str] = None) -> RateLimiter:
+    """
+    Retorna o limitador compartilhado do processo para as requisições à Wikipedia.
+
+    Configuração: WIKI_RATE_LIMIT (requisições/s, padrão 10, 0 desliga), WIKI_RATE_BURST
+    (padrão 20) e WIKI_RATE_LIMIT_PATH (padrão: o arquivo do cache, WIKI_CACHE_PATH).
+    """
+    path = path or os.environ.get("WIKI_RATE_LIMIT_PATH") or os.environ.get("WIKI_CACHE_PATH", DEFAULT_CACHE_PATH)
+    rate = float(os.environ.get("WIKI_RATE_LIMIT", DEFAULT_RATE))
+    burst = int(os.environ.get("WIKI_RATE_BURST", DEFAULT_BURST))
+    with _shared_lock:
+        limiter = _shared_limiters.get((path, rate, burst))
+        if limiter is None:
+            limiter = RateLimiter(rate=rate, burst=burst, path=path)
+            _shared_limiters[(path, rate, burst)] = limiter
+        return limiter
@@ -0,0 +1,262 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from tools.text_utils import strip_accents
+from tools.wiki_offline import iter_dump, normalize_title, truncate_extract
+
+logger = logging.getLogger(__name__)
+
+# Parâmetros clássicos do BM25
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3  # Termos do título contam como se aparecessem 3 vezes no texto
+# Termos muito comuns: só as postings de maior frequência entram na pontuação
+MAX_TERM_POSTINGS = 10000
+MAX_QUERY_TERMS = 32  # Os termos mais raros da consulta (os de maior idf)
+
+STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em entre era foi ha na nas no nos o os ou para pela pelas "
+    "pelo pelos por que se sem ser sao sua suas seu seus um uma umas uns".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sem acentos e sem stopwords: 'Saúde Pública' -> ['saude', 'publica']"""
+    tokens = re.findall(r"\w+", strip_accents(text.casefold()))
+    return [token for token in tokens if token not in STOPWORDS and len(token) > 1]
+
+
+class SearchIndex:
+    """
+    Índice invertido BM25 sobre títulos e introduções, persistido em SQLite.
+
+    - docs: título, introdução e tamanho (em termos) de cada página
+    - terms: frequência de documento (df) de cada termo
+    - postings: (termo, página) -> frequência do termo, agrupados por termo no disco,
+      com um índice por (termo, frequência) para ler primeiro as de maior impacto
+
+    A pontuação é feita no próprio SQLite, lendo no máximo `MAX_TERM_POSTINGS` postings
+    por termo, de modo que termos presentes em boa parte do corpus não custam uma
+    leitura completa da lista.
+
+    Páginas podem ser adicionadas ou substituídas a qualquer momento (`add_documents`),
+    sem reconstruir o índice inteiro.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "id INTEGER PRIMARY KEY, title TEXT NOT NULL UNIQUE, text TEXT NOT NULL, length INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "term TEXT NOT NULL, doc_id INTEGER NOT NULL, tf INTEGER NOT NULL, "
+            "PRIMARY KEY (term, doc_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS postings_by_tf ON postings (term, tf DESC);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL NOT NULL);"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão SQLite da thread atual (uma por thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, conn: sqlite3.Connection, key: str) -> float:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0.0
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: float) -> None:
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _term_counts(title: str, text: str) -> Counter:
+        counts = Counter(tokenize(text))
+        for token in tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        return counts
+
+    def _remove(self, conn: sqlite3.Connection, doc_id: int) -> int:
+        """Remove as postings de uma página e devolve o tamanho que ela tinha"""
+        terms = [row[0] for row in conn.execute("SELECT term FROM postings WHERE doc_id = ?", (doc_id,))]
+        conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?", ((term,) for term in terms))
+        conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        length = conn.execute("SELECT length FROM docs WHERE id = ?", (doc_id,)).fetchone()[0]
+        conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+        return length
+
+    def add_documents(self, documents: Iterable[Dict[str, str]]) -> Dict[str, float]:
+        """
+        Indexa (ou substitui, pelo título) as páginas {"title", "text"} informadas.
+        Registros de redirecionamento ({"title", "redirect"}) são ignorados.
+        """
+        started = time.monotonic()
+        added = replaced = 0
+        with self._write_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                total_docs = self._meta(conn, "documents")
+                total_length = self._meta(conn, "total_length")
+                for document in documents:
+                    if "redirect" in document:
+                        continue
+                    title = normalize_title(str(document["title"]))
+                    text = truncate_extract(str(document.get("text", "")))
+                    if not text.strip():
+                        continue
+
+                    row = conn.execute("SELECT id FROM docs WHERE title = ?", (title,)).fetchone()
+                    if row is not None:
+                        total_length -= self._remove(conn, row[0])
+                        total_docs -= 1
+                        replaced += 1
+                    else:
+                        added += 1
+
+                    counts = self._term_counts(title, text)
+                    length = sum(counts.values())
+                    doc_id = conn.execute(
+                        "INSERT INTO docs (title, text, length) VALUES (?, ?, ?)", (title, text, length)
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                        ((term, doc_id, tf) for term, tf in counts.items()),
+                    )
+                    conn.executemany(
+                        "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                        ((term,) for term in counts),
+                    )
+                    total_docs += 1
+                    total_length += length
+
+                conn.execute("DELETE FROM terms WHERE df <= 0")
+                self._set_meta(conn, "documents", total_docs)
+                self._set_meta(conn, "total_length", total_length)
+                seconds = time.monotonic() - started
+                self._set_meta(conn, "build_seconds", self._meta(conn, "build_seconds") + seconds)
+                self._set_meta(conn, "updated_at", time.time())
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        logger.info(f"Índice de busca atualizado: {added} nova(s), {replaced} substituída(s) em {seconds:.2f}s")
+        return {"added": added, "replaced": replaced, "seconds": round(seconds, 3)}
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, object]]:
+        """Páginas mais relevantes para `query`, em ordem decrescente de pontuação BM25"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        conn = self._connect()
+        total_docs = self._meta(conn, "documents")
+        if total_docs <= 0:
+            return []
+        average_length = self._meta(conn, "total_length") / total_docs
+
+        weighted = []
+        for term in terms:
+            row = conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is not None:
+                weighted.append((math.log(1 + (total_docs - row[0] + 0.5) / (row[0] + 0.5)), term))
+        if not weighted:
+            return []
+        weighted = sorted(weighted, reverse=True)[:MAX_QUERY_TERMS]
+
+        # Uma subconsulta por termo (as postings de maior tf, até o limite), somadas por página
+        matches = " UNION ALL ".join(
+            "SELECT doc_id, tf, ? AS idf FROM "
+            "(SELECT doc_id, tf FROM postings WHERE term = ? ORDER BY tf DESC LIMIT ?)"
+            for _ in weighted
+        )
+        params = [value for idf, term in weighted for value in (idf, term, MAX_TERM_POSTINGS)]
+        best = conn.execute(
+            f"SELECT m.doc_id, SUM(m.idf * m.tf * ? / (m.tf + ? * (? + ? * d.length))) AS score "
+            f"FROM ({matches}) AS m JOIN docs AS d ON d.id = m.doc_id "
+            f"GROUP BY m.doc_id ORDER BY score DESC, m.doc_id LIMIT ?",
+            [K1 + 1, K1, 1 - B, B / average_length] + params + [limit],
+        ).fetchall()
+
+        results = []
+        for doc_id, score in best:
+            title, text = conn.execute("SELECT title, text FROM docs WHERE id = ?", (doc_id,)).fetchone()
+            results.append({"title": title, "text": text, "score": round(score, 4)})
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        """Tamanho do índice (documentos, termos, bytes em disco) e tempo acumulado de construção"""
+        conn = self._connect()
+        size = sum(
+            os.path.getsize(self.path + suffix)
+            for suffix in ("", "-wal") if os.path.exists(self.path + suffix)
+        )
+        return {
+            "documents": int(self._meta(conn, "documents")),
+            "terms": conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0],
+            "postings": conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+            "bytes": size,
+            "build_seconds": round(self._meta(conn, "build_seconds"), 3),
+        }
+
+
+def build_search_index(dump_path: str, index_path: str) -> Dict[str, float]:
+    """Indexa (ou atualiza) as páginas de um dump no mesmo formato aceito por `wiki_offline.iter_dump`"""
+    index = SearchIndex(index_path)
+    index.add_documents(iter_dump(dump_path))
+    stats = index.stats()
+    logger.info(f"Índice de busca em {index_path}: {stats}")
+    return stats
+
+
+_search_indexes: Dict[str, SearchIndex] = {}
+_search_lock = threading.Lock()
+
+
+def get_search_index(path: str) -> SearchIndex:
+    """Instância compartilhada do índice de busca para o arquivo informado"""
+    with _search_lock:
+        index = _search_indexes.get(path)
+        if index is None:
+            index = SearchIndex(path)
+            _search_indexes[path] = index
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Índice de busca BM25 local sobre um dump da Wikipedia")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="indexa (ou atualiza) as páginas de um dump")
+    build.add_argument("dump", help="dump de extratos (.jsonl) ou XML de exportação do MediaWiki")
+    build.add_argument("index", help="arquivo SQLite do índice")
+    query = subparsers.add_parser("query", help="consulta o índice")
+    query.add_argument("index", help="arquivo SQLite do índice")
+    query.add_argument("text", help="termos da busca")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(build_search_index(args.dump, args.index))
+    else:
+        for hit in get_search_index(args.index).search(args.text):
+            print(f"{hit['score']:>8}  {hit['title']}")
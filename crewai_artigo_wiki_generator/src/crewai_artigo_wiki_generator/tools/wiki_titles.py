@@ -0,0 +1,191 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tools.text_utils import strip_accents
+from tools.wiki_offline import iter_dump, normalize_title
+
+logger = logging.getLogger(__name__)
+
+# Regras de singularização aplicadas a cada palavra (já sem acentos), na ordem
+PLURAL_RULES = (
+    (re.compile(r"(?<=\w{2})(oes|aes)$"), "ao"),   # ações -> acao, pães -> pao
+    (re.compile(r"(?<=\w{2})ais$"), "al"),         # animais -> animal
+    (re.compile(r"(?<=\w{2})(r|z)es$"), r"\1"),    # doutores -> doutor, luzes -> luz
+    (re.compile(r"(?<=\w{2})ns$"), "m"),           # homens -> homem
+    (re.compile(r"(?<=\w{3})s$"), ""),             # rios -> rio
+)
+
+
+def fold_title(title: str) -> str:
+    """
+    Chave de comparação de títulos: sem caixa, acentos, pontuação e plurais.
+    'Inteligências Artificiais' e 'inteligencia artificial' geram a mesma chave.
+    """
+    words = re.findall(r"\w+", strip_accents(title.replace("_", " ").casefold()))
+    folded = []
+    for word in words:
+        for pattern, replacement in PLURAL_RULES:
+            word, count = pattern.subn(replacement, word)
+            if count:
+                break
+        folded.append(word)
+    return " ".join(folded)
+
+
+def iter_titles(path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Gera pares (título, destino do redirecionamento ou None).
+
+    Aceita os dumps de `wiki_offline.iter_dump` ou uma lista em texto com um título
+    por linha, opcionalmente seguido de TAB e do título de destino (redirecionamento).
+    """
+    if path.endswith((".txt", ".tsv")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                title, _, target = line.rstrip("\n").partition("\t")
+                if title.strip():
+                    yield title, target or None
+        return
+
+    for item in iter_dump(path):
+        yield str(item["title"]), item.get("redirect")
+
+
+class TitleIndex:
+    """
+    Índice de resolução de títulos: chave dobrada (`fold_title`) -> títulos canônicos.
+
+    Persistido em SQLite com a chave como prefixo da chave primária, então tanto a
+    consulta exata quanto a busca por prefixo percorrem apenas um intervalo do índice.
+    Páginas canônicas têm prioridade sobre redirecionamentos com a mesma chave.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "key TEXT NOT NULL, "
+            "title TEXT NOT NULL, "
+            "is_redirect INTEGER NOT NULL, "
+            "PRIMARY KEY (key, is_redirect, title)) WITHOUT ROWID"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão SQLite da thread atual (uma por thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_titles(self, titles: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, float]:
+        """Indexa pares (título, destino); redirecionamentos apontam para o título de destino"""
+        started = time.monotonic()
+        pairs = list(titles)
+        redirects = {
+            normalize_title(title): normalize_title(target) for title, target in pairs if target
+        }
+
+        rows = set()
+        for title, target in pairs:
+            title = normalize_title(title)
+            canonical = title
+            hops = 0
+            while canonical in redirects and hops < 5:  # Redirecionamentos duplos
+                canonical = redirects[canonical]
+                hops += 1
+            key = fold_title(title)
+            if key:
+                rows.add((key, canonical, 1 if target else 0))
+
+        with self._write_lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO titles (key, title, is_redirect) VALUES (?, ?, ?)", sorted(rows)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        seconds = time.monotonic() - started
+        logger.info(f"Índice de títulos atualizado com {len(rows)} chave(s) em {seconds:.2f}s")
+        return {"keys": len(rows), "seconds": round(seconds, 3)}
+
+    def resolve(self, query: str) -> List[str]:
+        """Títulos canônicos cuja chave é igual à da consulta (páginas antes de redirecionamentos)"""
+        key = fold_title(query)
+        if not key:
+            return []
+        rows = self._connect().execute(
+            "SELECT title FROM titles WHERE key = ? ORDER BY is_redirect, length(title), title", (key,)
+        )
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def prefix(self, query: str, limit: int = 10) -> List[str]:
+        """Títulos canônicos cuja chave começa pela chave da consulta, na ordem das chaves"""
+        key = fold_title(query)
+        if not key:
+            return []
+        rows = self._connect().execute(
+            "SELECT title FROM titles WHERE key >= ? AND key < ? "
+            "ORDER BY key, is_redirect, title LIMIT ?",
+            (key, key + "\U0010ffff", limit * 4),
+        )
+        return list(dict.fromkeys(row[0] for row in rows))[:limit]
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        return {
+            "keys": conn.execute("SELECT COUNT(DISTINCT key) FROM titles").fetchone()[0],
+            "titles": conn.execute("SELECT COUNT(DISTINCT title) FROM titles").fetchone()[0],
+            "bytes": os.path.getsize(self.path),
+        }
+
+
+def build_title_index(titles_path: str, index_path: str) -> Dict[str, int]:
+    """Indexa (ou atualiza) os títulos e redirecionamentos de um dump ou lista de títulos"""
+    index = TitleIndex(index_path)
+    result = index.add_titles(iter_titles(titles_path))
+    stats = dict(index.stats(), seconds=result["seconds"])
+    logger.info(f"Índice de títulos em {index_path}: {stats}")
+    return stats
+
+
+_title_indexes: Dict[str, TitleIndex] = {}
+_title_lock = threading.Lock()
+
+
+def get_title_index(path: str) -> TitleIndex:
+    """Instância compartilhada do índice de títulos para o arquivo informado"""
+    with _title_lock:
+        index = _title_indexes.get(path)
+        if index is None:
+            index = TitleIndex(path)
+            _title_indexes[path] = index
+        return index
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Constrói o índice de resolução de títulos da Wikipedia")
+    parser.add_argument("titles", help="dump (.jsonl/.xml) ou lista de títulos (.txt/.tsv: título[TAB destino])")
+    parser.add_argument("index", help="arquivo SQLite do índice")
+    args = parser.parse_args()
+    print(build_title_index(args.titles, args.index))
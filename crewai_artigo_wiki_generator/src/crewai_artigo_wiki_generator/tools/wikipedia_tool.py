@@ -1,11 +1,29 @@
 from crewai.tools import BaseTool
+import aiohttp
+import asyncio
+import hashlib
 import requests
 from pydantic import BaseModel, Field, ValidationError, field_validator
 import logging
+import os
 from urllib.parse import quote
 import re
 import time
-from typing import Optional, Dict, Union
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import ClassVar, List, Optional, Dict, Union
+from metrics import (
+    WIKIPEDIA_ATTEMPTS, WIKIPEDIA_CACHE_LOOKUPS, WIKIPEDIA_FAILURES, WIKIPEDIA_RATE_LIMIT_WAIT, WIKIPEDIA_RETRIES,
+    WIKIPEDIA_THROTTLED,
+)
+from tools.wiki_bundle import format_bundle, rank_links, split_sections
+from tools.wiki_cache import NEGATIVE_TTL, TwoTierCache, get_shared_cache
+from tools.wiki_http import RETRYABLE_STATUS, backoff_delay, get_session, make_deadline, parse_retry_after, remaining
+from tools.text_utils import clean_query, strip_accents
+from tools.wiki_offline import OfflineWikipedia, get_offline_index
+from tools.wiki_ratelimit import get_rate_limiter
+from tools.wiki_search import SearchIndex, get_search_index
+from tools.wiki_titles import TitleIndex, get_title_index
 
 logger = logging.getLogger(__name__)
 
@@ -27,11 +45,18 @@ class WikipediaToolSchema(BaseModel):
 class WikipediaTool(BaseTool):
     """
     Ferramenta avançada de pesquisa na Wikipedia em português com:
-    - Sistema de tentativas com backoff exponencial
+    - Sistema de tentativas com backoff exponencial (com jitter) e prazo por consulta
+    - Sessão HTTP compartilhada com pool de conexões keep-alive
+    - Limite de taxa global (balde de fichas entre threads e workers) que respeita o Retry-After
     - Normalização inteligente de consultas
-    - Cache otimizado
+    - Cache em dois níveis (LRU em memória + SQLite compartilhado entre workers)
     - Tratamento robusto de erros
-    - Variações automáticas de termos
+    - Resolução de títulos por índice pré-calculado (caixa, acentos e plurais), sem tentativas especulativas
+    - Variações automáticas de termos quando não há índice de títulos
+    - Caminho assíncrono (`_arun`) com estratégias de fallback concorrentes
+    - Backend offline opcional, servido de um índice local do dump (sem rede)
+    - Busca textual local (BM25) como último recurso, devolvendo o conteúdo da melhor página
+    - Modo pacote opcional: artigo completo por seções + páginas linkadas, em paralelo
     """
     name: str = "wikipedia_tool"
     description: str = (
@@ -39,36 +64,78 @@ class WikipediaTool(BaseTool):
         "Fornece resumos concisos e confiáveis, com tratamento especial para "
         "termos técnicos e históricos."
     )
+    lookup_timeout: float = Field(
+        default=60.0,
+        description="Tempo máximo (s) de uma consulta completa, incluindo tentativas e fallbacks",
+    )
+    backend: str = Field(
+        default_factory=lambda: os.environ.get("WIKI_BACKEND", "online"),
+        description="'online' (pt.wikipedia.org) ou 'offline' (índice local construído com wiki_offline.py)",
+    )
+    offline_index: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("WIKI_OFFLINE_INDEX"),
+        description="Diretório do índice offline (obrigatório quando backend='offline')",
+    )
+    title_index: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("WIKI_TITLE_INDEX"),
+        description="Arquivo do índice de títulos (wiki_titles.py) que substitui as variações heurísticas",
+    )
+    search_index: Optional[str] = Field(
+        default_factory=lambda: os.environ.get("WIKI_SEARCH_INDEX"),
+        description="Arquivo do índice BM25 local (wiki_search.py) usado quando o título exato não existe",
+    )
+    bundle_pages: int = Field(
+        default_factory=lambda: int(os.environ.get("WIKI_BUNDLE_PAGES", 0)),
+        description="Se > 0, cada consulta devolve o artigo completo por seções e as introduções "
+                    "de até N páginas linkadas (pacote de pesquisa)",
+    )
     
     # Configurações avançadas
-    _cache: Dict[str, str] = {}
-    _MAX_CACHE_SIZE = 200
-    _MAX_RETRIES = 20
-    _INITIAL_TIMEOUT = 5
+    _CACHE_NAMESPACE: ClassVar[str] = "wikipedia_tool"
+    _NEGATIVE_CACHE_NAMESPACE: ClassVar[str] = "wikipedia_tool_missing"
+    _async_limiters: ClassVar["weakref.WeakKeyDictionary"] = weakref.WeakKeyDictionary()
+    _MAX_RETRIES = 5
+    _REQUEST_TIMEOUT = 10
+    _BATCH_SIZE = 20  # Com exintro, a API devolve no máximo 20 extratos por requisição
+    _MAX_FALLBACKS = 20
+    _MAX_CONCURRENT_REQUESTS = 4
     _USER_AGENT = "CrewAI-ResearchBot/2.0 (https://github.com/org/repo; contact@email.com)"
     
+    @classmethod
+    def _get_cache(cls) -> TwoTierCache:
+        """Retorna o cache compartilhado por todas as instâncias e processos"""
+        return get_shared_cache(cls._CACHE_NAMESPACE)
+
+    @classmethod
+    def _get_negative_cache(cls) -> TwoTierCache:
+        """Cache de títulos inexistentes, com TTL menor que o dos resultados"""
+        return get_shared_cache(cls._NEGATIVE_CACHE_NAMESPACE, ttl=NEGATIVE_TTL)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, int]:
+        """Contadores de acertos, falhas e remoções do cache de resultados"""
+        return cls._get_cache().stats()
+
+    @classmethod
+    def negative_cache_stats(cls) -> Dict[str, int]:
+        """Contadores do cache de títulos inexistentes"""
+        return cls._get_negative_cache().stats()
+
     def _normalize_query(self, query: str) -> str:
         """Normaliza a consulta para melhor correspondência na Wikipedia"""
-        # Decodifica primeiro se vier codificado
-        print(query)
-        if '%' in query:
-            from urllib.parse import unquote
-            query = unquote(query)
-        
-        # Remove caracteres especiais e normaliza espaços
-        query = re.sub(r'[^\w\sáéíóúâêîôûãõç-]', '', query, flags=re.IGNORECASE)
-        query = re.sub(r'\s+', ' ', query).strip()
-        
-        return query.title()
+        logger.debug(f"Consulta recebida: {query}")
+        # Decodifica, remove caracteres especiais e normaliza espaços (mesma limpeza da admissão na API)
+        return clean_query(query).title()
 
-    def _make_api_request(self, query: str) -> Optional[Dict]:
-        """Faz requisição à API da Wikipedia com tratamento de erros"""
-        encoded_query = quote(query)
-        url = (
+    def _build_extracts_url(self, query: Union[str, List[str]]) -> str:
+        """Monta a URL de extratos para um ou vários títulos (separados por '|')"""
+        titles = [query] if isinstance(query, str) else list(query)
+        encoded_query = quote("|".join(titles))
+        return (
             "https://pt.wikipedia.org/w/api.php?"
             "action=query&"
             "prop=extracts&"
-            "exlimit=1&"
+            "exlimit=max&"
             "exchars=1500&"  # Aumentado para mais conteúdo
             "explaintext=1&"
             "exintro=1&"
@@ -77,26 +144,113 @@ class WikipediaTool(BaseTool):
             "utf8=1&"
             "redirects=1"
         )
+
+    def _build_article_url(self, title: str) -> str:
+        """Monta a URL do texto completo de uma página, com os cabeçalhos de seção (== Seção ==)"""
+        return (
+            "https://pt.wikipedia.org/w/api.php?"
+            "action=query&"
+            "prop=extracts&"
+            "explaintext=1&"
+            "exsectionformat=wiki&"
+            f"titles={quote(title)}&"
+            "format=json&"
+            "utf8=1&"
+            "redirects=1"
+        )
+
+    def _build_links_url(self, title: str) -> str:
+        """Monta a URL da lista de links internos (artigos) de uma página"""
+        return (
+            "https://pt.wikipedia.org/w/api.php?"
+            "action=query&"
+            "prop=links&"
+            "plnamespace=0&"
+            "pllimit=max&"
+            f"titles={quote(title)}&"
+            "format=json&"
+            "utf8=1&"
+            "redirects=1"
+        )
+
+    def _build_search_url(self, query: str) -> str:
+        """Monta a URL da API de busca textual"""
+        return (
+            "https://pt.wikipedia.org/w/api.php?"
+            "action=query&"
+            "list=search&"
+            "srlimit=5&"
+            "srprop=size&"
+            f"srsearch={quote(query)}&"
+            "format=json"
+        )
+
+    def _reserve_slot(self, label: str, deadline: Optional[float], mode: str) -> Optional[float]:
+        """Reserva a vez da requisição no limite de taxa global; None se a espera passaria do prazo"""
+        wait = get_rate_limiter().reserve(remaining(deadline))
+        if wait is None:
+            logger.warning(f"Prazo esgotado para '{label}' aguardando o limite de taxa da Wikipedia")
+            return None
+        WIKIPEDIA_RATE_LIMIT_WAIT.observe(wait, mode=mode)
+        return wait
+
+    def _honor_retry_after(self, headers, mode: str) -> bool:
+        """Repassa o Retry-After da resposta ao limite de taxa de todos os workers"""
+        retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+        if retry_after is None:
+            return False
+        WIKIPEDIA_THROTTLED.inc(mode=mode)
+        get_rate_limiter().penalize(retry_after)
+        return True
+
+    def _request_json(self, url: str, label: str, deadline: Optional[float] = None) -> Optional[Dict]:
+        """GET na sessão compartilhada com limite de taxa, backoff exponencial e limite pelo prazo da consulta"""
+        session = get_session(self._USER_AGENT)
         
         for attempt in range(self._MAX_RETRIES):
+            time_left = remaining(deadline)
+            if time_left is not None and time_left <= 0:
+                logger.warning(f"Prazo esgotado para '{label}' após {attempt} tentativa(s)")
+                break
+            wait = self._reserve_slot(label, deadline, "sync")
+            if wait is None:
+                break
+            if wait:
+                time.sleep(wait)
+            throttled = False
+            
             try:
-                timeout = self._INITIAL_TIMEOUT * (attempt + 1)
-                response = requests.get(
-                    url,
-                    timeout=timeout,
-                    headers={'User-Agent': self._USER_AGENT}
-                )
+                time_left = remaining(deadline)
+                timeout = self._REQUEST_TIMEOUT if time_left is None else min(self._REQUEST_TIMEOUT, time_left)
+                WIKIPEDIA_ATTEMPTS.inc(mode="sync")
+                response = session.get(url, timeout=timeout)
                 response.raise_for_status()
                 return response.json()
                 
             except requests.exceptions.RequestException as e:
-                logger.warning(f"Tentativa {attempt + 1} falhou para '{query}': {str(e)}")
-                if attempt < self._MAX_RETRIES - 1:
-                    time.sleep(1 * (attempt + 1))  # Backoff exponencial
-                continue
+                logger.warning(f"Tentativa {attempt + 1} falhou para '{label}': {str(e)}")
+                response = getattr(e, "response", None)
+                status = getattr(response, "status_code", None)
+                if status is not None and status not in RETRYABLE_STATUS:
+                    break  # Erro do cliente: repetir não muda o resultado
+                throttled = self._honor_retry_after(getattr(response, "headers", None), "sync")
+            
+            if attempt < self._MAX_RETRIES - 1:
+                # Com Retry-After, a espera fica a cargo do limite de taxa na próxima tentativa
+                delay = 0.0 if throttled else backoff_delay(attempt)
+                time_left = remaining(deadline)
+                if time_left is not None and delay >= time_left:
+                    break
+                WIKIPEDIA_RETRIES.inc(mode="sync")
+                time.sleep(delay)
                 
+        WIKIPEDIA_FAILURES.inc(mode="sync")
         return None
 
+    def _make_api_request(self, query: Union[str, List[str]], deadline: Optional[float] = None) -> Optional[Dict]:
+        """Faz requisição à API da Wikipedia com tratamento de erros (aceita um ou vários títulos)"""
+        return self._request_json(self._build_extracts_url(query), str(query), deadline)
+
     def _try_variations(self, original_query: str) -> str:
         """Tenta variações alternativas para a consulta"""
         variations = [
@@ -116,31 +270,162 @@ class WikipediaTool(BaseTool):
                 
         return f"Nenhum resultado encontrado para '{original_query}' ou variações relacionadas"
 
-    def _search_wikipedia(self, query: str) -> str:
-        """Executa a pesquisa na Wikipedia e processa os resultados"""
-        data = self._make_api_request(query)
-        if not data:
-            return "Erro ao conectar com a Wikipedia. Tente novamente mais tarde."
-            
-        pages = data.get("query", {}).get("pages", {})
-        if not pages:
-            return f"Nenhum resultado encontrado para: {query}"
-            
-        page = next(iter(pages.values()))
-        if "missing" in page:
-            return f"Página não encontrada para: {query}"
-            
-        text = page.get("extract", "")
-        if not text:
-            return f"Conteúdo não disponível para: {query}"
-            
-        # Limpeza do texto
+    def _clean_extract(self, text: str) -> str:
+        """Remove marcas de citação e excesso de quebras de linha do extrato"""
         text = re.sub(r'\[\d+\]', '', text)  # Remove citações [1], [2], etc.
         text = re.sub(r'\n{3,}', '\n\n', text)  # Normaliza quebras de linha
         return text.strip()
 
-    def _get_search_fallbacks(self, query: str) -> list:
-        """Gera uma sequência hierárquica de estratégias de fallback"""
+    def _resolve_titles(self, data: Dict, titles: List[str]) -> Dict[str, Dict]:
+        """
+        Associa cada título pedido à página retornada, seguindo os blocos
+        `query.normalized` e `query.redirects` da resposta.
+        """
+        query_block = data.get("query", {})
+        normalized = {item["from"]: item["to"] for item in query_block.get("normalized", [])}
+        redirects = {item["from"]: item for item in query_block.get("redirects", [])}
+        pages = {page.get("title"): page for page in query_block.get("pages", {}).values()}
+
+        resolved = {}
+        for title in titles:
+            current = normalized.get(title, title)
+            redirected_from = None
+            fragment = None
+            hops = 0
+            while current in redirects and hops < 5:  # Evita ciclos de redirecionamento
+                redirected_from = redirected_from or current
+                fragment = redirects[current].get("tofragment") or fragment
+                current = redirects[current]["to"]
+                hops += 1
+
+            page = pages.get(current)
+            missing = False
+            if not pages:
+                text = f"Nenhum resultado encontrado para: {title}"
+            elif page is None or "missing" in page:
+                text = f"Página não encontrada para: {title}"
+                missing = True
+            elif not page.get("extract"):
+                text = f"Conteúdo não disponível para: {title}"
+            else:
+                text = self._clean_extract(page["extract"])
+
+            resolved[title] = self._make_entry(
+                title, text,
+                normalized=normalized.get(title),
+                redirected_from=redirected_from,
+                fragment=fragment,
+                resolved_title=current,
+                missing=missing,
+            )
+        return resolved
+
+    def _make_entry(self, title: str, text: str, normalized: Optional[str] = None,
+                    redirected_from: Optional[str] = None, fragment: Optional[str] = None,
+                    resolved_title: Optional[str] = None, missing: bool = False, failed: bool = False) -> Dict:
+        """Monta o registro de resolução de um título pedido (`failed`: a Wikipedia não respondeu)"""
+        return {
+            "requested": title,
+            "normalized": normalized,
+            "redirected_from": redirected_from,
+            "fragment": fragment,
+            "title": resolved_title or title,
+            "text": text,
+            "missing": missing,
+            "failed": failed,
+        }
+
+    def _split_known_missing(self, titles: List[str]) -> tuple:
+        """Separa os títulos já sabidamente inexistentes (sem rede) dos que precisam ser consultados"""
+        negative_cache = self._get_negative_cache()
+        known_missing = {}
+        to_fetch = []
+        for title in titles:
+            if negative_cache.get(title) is not None:
+                known_missing[title] = self._make_entry(
+                    title, f"Página não encontrada para: {title}", missing=True
+                )
+            else:
+                to_fetch.append(title)
+        return known_missing, to_fetch
+
+    def _remember_missing(self, resolved: Dict[str, Dict]) -> None:
+        """Registra no cache negativo os títulos que a API marcou como inexistentes"""
+        negative_cache = self._get_negative_cache()
+        for title, entry in resolved.items():
+            if entry["missing"]:
+                negative_cache.set(title, entry["title"])
+
+    def _search_wikipedia(self, query: str, deadline: Optional[float] = None) -> str:
+        """Executa a pesquisa na Wikipedia e processa os resultados"""
+        return self._search_wikipedia_batch([query], deadline)[query]["text"]
+
+    def _get_offline(self) -> Optional[OfflineWikipedia]:
+        """Índice local quando o backend offline está ativo; None no modo online"""
+        if self.backend != "offline":
+            return None
+        if not self.offline_index:
+            raise ValueError("Backend offline requer o diretório do índice (WIKI_OFFLINE_INDEX)")
+        return get_offline_index(self.offline_index)
+
+    def _resolve_offline(self, offline: OfflineWikipedia, titles: List[str]) -> Dict[str, Dict]:
+        """Equivalente local de `_resolve_titles`: mesmas mensagens e mesmo texto limpo"""
+        resolved = {}
+        for title in titles:
+            page = offline.lookup(title)
+            if page is None:
+                resolved[title] = self._make_entry(title, f"Página não encontrada para: {title}", missing=True)
+                continue
+
+            source = page["normalized"] or title
+            text = self._clean_extract(page["text"]) if page["text"] else f"Conteúdo não disponível para: {title}"
+            resolved[title] = self._make_entry(
+                title, text,
+                normalized=page["normalized"],
+                redirected_from=source if page["redirected"] else None,
+                resolved_title=page["title"],
+            )
+        return resolved
+
+    def _search_wikipedia_batch(self, titles: List[str], deadline: Optional[float] = None) -> Dict[str, Dict]:
+        """Resolve vários títulos em lotes de até `_BATCH_SIZE` por requisição"""
+        offline = self._get_offline()
+        if offline is not None:
+            return self._resolve_offline(offline, titles)
+
+        resolved, to_fetch = self._split_known_missing(titles)
+        for start in range(0, len(to_fetch), self._BATCH_SIZE):
+            chunk = to_fetch[start:start + self._BATCH_SIZE]
+            data = self._make_api_request(chunk, deadline)
+            if not data:
+                for title in chunk:
+                    resolved[title] = self._make_entry(
+                        title, "Erro ao conectar com a Wikipedia. Tente novamente mais tarde.", failed=True
+                    )
+                continue
+            chunk_resolved = self._resolve_titles(data, chunk)
+            self._remember_missing(chunk_resolved)
+            resolved.update(chunk_resolved)
+        return resolved
+
+    def _describe_resolution(self, query: str, entry: Dict) -> str:
+        """Monta o aviso de redirecionamento a partir da variação, normalização e redirect usados"""
+        steps = [query]
+        for step in (entry["requested"], entry["normalized"], entry["redirected_from"], entry["title"]):
+            if step and step != steps[-1]:
+                steps.append(step)
+        if len(steps) == 1:
+            return ""
+
+        target = entry["title"]
+        if entry["fragment"]:
+            target = f"{target}#{entry['fragment']}"
+        if len(steps) == 2:
+            return f"(Redirecionado de '{query}' para '{target}')\n\n"
+        return f"(Redirecionado de '{query}' para '{target}': {' → '.join(steps)})\n\n"
+
+    def _get_search_strategies(self, query: str) -> List[List[str]]:
+        """Gera os grupos de variações de cada estratégia de fallback, na ordem de prioridade"""
         strategies = [
             # 1. Tentar o termo exato (já normalizado)
             lambda q: [q],
@@ -176,49 +461,211 @@ class WikipediaTool(BaseTool):
             ],
             
             # 5. Busca fonética aproximada (sem acentos)
-            lambda q: [''.join(
-                {'á':'a','é':'e','í':'i','ó':'o','ú':'u',
-                 'â':'a','ê':'e','î':'i','ô':'o','û':'u',
-                 'ã':'a','õ':'o','ç':'c'}.get(c, c) for c in q
-            )]
+            lambda q: [strip_accents(q)]
         ]
         
-        # Gera todas as variações sem duplicatas
-        variations = []
+        # Gera os grupos sem variações repetidas entre estratégias
+        groups = []
         seen = set()
         for strategy in strategies:
+            group = []
             for variation in strategy(query):
                 if variation not in seen:
                     seen.add(variation)
-                    variations.append(variation)
+                    group.append(variation)
+            if group:
+                groups.append(group)
         
-        return variations
+        return groups
 
-    def _search_with_fallbacks(self, query: str) -> str:
-        """Executa a pesquisa com todas as estratégias de fallback"""
-        # 1. Primeiro tenta a pesquisa direta
-        result = self._search_wikipedia(query)
-        if self._is_valid_result(result):
-            return result
+    def _get_title_index(self) -> Optional[TitleIndex]:
+        """Índice de resolução de títulos, quando configurado"""
+        if not self.title_index:
+            return None
+        return get_title_index(self.title_index)
+
+    def _get_indexed_candidates(self, query: str) -> Optional[List[str]]:
+        """
+        Títulos canônicos para a consulta segundo o índice de títulos: correspondências
+        exatas da chave dobrada ou, na falta delas, as primeiras por prefixo.
+        None quando não há índice (usa-se então as variações heurísticas).
+        """
+        index = self._get_title_index()
+        if index is None:
+            return None
+        try:
+            titles = index.resolve(query) or index.prefix(query, limit=3)
+        except Exception as e:
+            logger.warning(f"Falha no índice de títulos para '{query}': {str(e)}")
+            return None
+        return [title for title in titles if title != query]
+
+    def _get_search_fallbacks(self, query: str) -> list:
+        """Gera uma sequência hierárquica de estratégias de fallback"""
+        return [variation for group in self._get_search_strategies(query) for variation in group]
+
+    def _resolve_page(self, query: str, deadline: Optional[float] = None) -> Optional[Dict]:
+        """
+        Primeira página válida entre o termo direto e suas variações; None se nenhuma
+        existir ou se a Wikipedia não respondeu (falhas de conexão não contam como página)
+        """
+        # 1. Monta a lista ordenada: termo direto seguido dos títulos do índice
+        #    ou, sem índice, das variações heurísticas (limitadas a 20)
+        candidates = [query]
+        variations = self._get_indexed_candidates(query)
+        if variations is None:
+            variations = self._get_search_fallbacks(query)[:self._MAX_FALLBACKS]
+        for variation in variations:
+            if variation not in candidates:
+                candidates.append(variation)
         
-        # 2. Obtém todas as variações possíveis
-        fallbacks = self._get_search_fallbacks(query)
+        # 2. Resolve todas as variações em uma ou duas requisições com múltiplos títulos
+        try:
+            resolved = self._search_wikipedia_batch(candidates, deadline)
+        except Exception as e:
+            logger.warning(f"Falha na resolução em lote para {query}: {str(e)}")
+            resolved = {}
         
-        # 3. Tenta cada variação com timeout progressivo
-        for i, variation in enumerate(fallbacks[:20]):  # Limita a 20 tentativas
-            try:
-                result = self._search_wikipedia(variation)
-                if self._is_valid_result(result):
-                    # Adiciona contexto sobre o redirecionamento
-                    if variation != query:
-                        result = f"(Redirecionado de '{query}' para '{variation}')\n\n{result}"
-                    return result
-            except Exception as e:
-                logger.warning(f"Falha na variação {variation}: {str(e)}")
-                continue
+        # 3. Escolhe o primeiro resultado válido respeitando a ordem das estratégias
+        for variation in candidates:
+            entry = resolved.get(variation)
+            if entry and not entry.get("failed") and self._is_valid_result(entry["text"]):
+                return entry
+        return None
+
+    def _search_with_fallbacks(self, query: str, deadline: Optional[float] = None) -> str:
+        """Executa a pesquisa com todas as estratégias de fallback"""
+        entry = self._resolve_page(query, deadline)
+        if entry is not None:
+            # Adiciona contexto sobre o redirecionamento
+            return self._describe_resolution(query, entry) + entry["text"]
         
         # 4. Como último recurso, tenta a API de busca
-        return self._try_search_api(query)
+        return self._try_search_api(query, deadline)
+
+    def _first_page(self, data: Optional[Dict]) -> Optional[Dict]:
+        """Primeira página existente de uma resposta `query.pages`"""
+        for page in (data or {}).get("query", {}).get("pages", {}).values():
+            if "missing" not in page and "invalid" not in page:
+                return page
+        return None
+
+    def _fetch_article(self, title: str, deadline: Optional[float] = None) -> tuple:
+        """
+        (título resolvido, texto completo com os cabeçalhos de seção, houve resposta);
+        sem página, (None, '', houve resposta)
+        """
+        data = self._request_json(self._build_article_url(title), title, deadline)
+        page = self._first_page(data)
+        if page is None:
+            return None, "", data is not None
+        return page.get("title"), self._clean_extract(page.get("extract", "")), True
+
+    def _fetch_links(self, title: str, deadline: Optional[float] = None) -> tuple:
+        """(título resolvido, links internos na ordem da API, houve resposta); sem página, (None, [], ...)"""
+        data = self._request_json(self._build_links_url(title), title, deadline)
+        page = self._first_page(data)
+        if page is None:
+            return None, [], data is not None
+        return page.get("title"), [link["title"] for link in page.get("links", [])], True
+
+    def fetch_bundle(self, query: Union[str, dict], related_pages: int = 4,
+                     timeout: Optional[float] = None) -> Optional[Dict]:
+        """
+        Pacote de pesquisa de uma consulta: o artigo completo dividido em seções e as
+        introduções das `related_pages` páginas linkadas citadas primeiro no texto.
+
+        O texto completo e os links do termo como digitado são pedidos em paralelo com
+        a resolução do título (no caso comum não há variação) e pedidos de novo só se a
+        página resolvida for outra; as introduções relacionadas saem em lotes paralelos.
+        As requisições simultâneas são limitadas a `_MAX_CONCURRENT_REQUESTS`.
+        Devolve None se nenhuma página for encontrada (ou se a Wikipedia não responder à
+        resolução). `complete` é False quando alguma outra requisição ficou sem resposta:
+        o pacote vale para esta pesquisa, mas não deve ir para o cache.
+        """
+        clean_query = self._parse_query_input(query)
+        if clean_query is None:
+            return None
+        deadline = make_deadline(self.lookup_timeout if timeout is None else timeout)
+        started = time.monotonic()
+
+        offline = self._get_offline()
+        with ThreadPoolExecutor(max_workers=self._MAX_CONCURRENT_REQUESTS, thread_name_prefix="wiki-bundle") as pool:
+            article = links = None
+            if offline is None:
+                article = pool.submit(self._fetch_article, clean_query, deadline)
+                links = pool.submit(self._fetch_links, clean_query, deadline)
+            page = self._resolve_page(clean_query, deadline)
+            if page is None:
+                return None
+            title = page["title"]
+            complete = True
+
+            if offline is not None:
+                sections = [{"title": "Introdução", "level": 2, "text": page["text"]}]
+                related_titles = self._related_offline(page, related_pages)
+            else:
+                if article.result()[0] != title:
+                    article = pool.submit(self._fetch_article, title, deadline)
+                if links.result()[0] != title:
+                    links = pool.submit(self._fetch_links, title, deadline)
+                full_text = article.result()[1]
+                complete = article.result()[2] and links.result()[2]
+                sections = split_sections(full_text) if full_text else [
+                    {"title": "Introdução", "level": 2, "text": page["text"]}
+                ]
+                related_titles = rank_links(
+                    links.result()[1], full_text or page["text"], related_pages, exclude=title
+                )
+
+            chunks = [
+                related_titles[start:start + self._BATCH_SIZE]
+                for start in range(0, len(related_titles), self._BATCH_SIZE)
+            ]
+            resolved = {}
+            for chunk_resolved in pool.map(lambda chunk: self._search_wikipedia_batch(chunk, deadline), chunks):
+                resolved.update(chunk_resolved)
+
+        complete = complete and not any(entry.get("failed") for entry in resolved.values())
+        related = [
+            {"title": resolved[name]["title"], "text": resolved[name]["text"]}
+            for name in related_titles
+            if name in resolved and not resolved[name].get("failed") and self._is_valid_result(resolved[name]["text"])
+        ]
+        bundle = {
+            "query": clean_query,
+            "title": title,
+            "redirect": self._describe_resolution(clean_query, page).strip() or None,
+            "text": page["text"],
+            "sections": sections,
+            "related": related,
+            "complete": complete,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        logger.info(
+            f"Pacote de pesquisa para '{clean_query}': {len(sections)} seção(ões) e "
+            f"{len(related)} página(s) relacionada(s) em {bundle['seconds']:.2f}s"
+        )
+        return bundle
+
+    def _related_offline(self, page: Dict, limit: int) -> List[str]:
+        """Sem a API de links, as páginas relacionadas vêm do índice BM25 local, se configurado"""
+        index = self._get_search_index()
+        if index is None or limit <= 0:
+            return []
+        hits = index.search(f"{page['title']} {page['text'][:300]}", limit=limit + 1)
+        return [hit["title"] for hit in hits if hit["title"] != page["title"]][:limit]
+
+    def _search_bundle(self, query: str, deadline: Optional[float] = None) -> tuple:
+        """
+        Resultado da ferramenta no modo pacote (`bundle_pages` > 0) e se ele pode ir para
+        o cache: só pacotes completos, cujas requisições todas tiveram resposta
+        """
+        bundle = self.fetch_bundle(query, self.bundle_pages, remaining(deadline))
+        if bundle is None:
+            result = self._try_search_api(query, deadline)
+            return result, self._is_cacheable(result)
+        return format_bundle(bundle), bundle["complete"]
 
     def _is_valid_result(self, result: str) -> bool:
         """Verifica se o resultado é válido (não é mensagem de erro)"""
@@ -231,59 +678,313 @@ class WikipediaTool(BaseTool):
         ]
         return not any(phrase in result.lower() for phrase in invalid_phrases)
 
-    def _try_search_api(self, query: str) -> str:
-        """Usa a API de busca quando não encontra por título exato"""
-        search_url = (
-            "https://pt.wikipedia.org/w/api.php?"
-            "action=query&"
-            "list=search&"
-            "srlimit=5&"
-            "srprop=size&"
-            f"srsearch={quote(query)}&"
-            "format=json"
-        )
-        
+    def _format_search_results(self, query: str, data: Dict) -> str:
+        """Converte a resposta da API de busca em sugestões de títulos"""
+        if 'query' in data and data['query']['search']:
+            top_results = [item['title'] for item in data['query']['search'][:3]]
+            return (
+                f"Não encontrado exatamente '{query}', mas talvez queira:\n" +
+                "\n".join(f"- {title}" for title in top_results)
+            )
+        return f"Nenhum resultado encontrado para '{query}'"
+
+    def _get_search_index(self) -> Optional[SearchIndex]:
+        """Índice BM25 local, quando configurado"""
+        if not self.search_index:
+            return None
+        return get_search_index(self.search_index)
+
+    def _search_local(self, query: str) -> Optional[str]:
+        """Busca no índice BM25 local e devolve o conteúdo da página mais bem ranqueada"""
+        index = self._get_search_index()
+        if index is None:
+            return None
         try:
-            response = requests.get(search_url, timeout=10)
-            data = response.json()
-            if 'query' in data and data['query']['search']:
-                top_results = [item['title'] for item in data['query']['search'][:3]]
-                return (
-                    f"Não encontrado exatamente '{query}', mas talvez queira:\n" +
-                    "\n".join(f"- {title}" for title in top_results)
-                )
+            hits = index.search(query, limit=3)
+        except Exception as e:
+            logger.warning(f"Falha na busca local para '{query}': {str(e)}")
+            return None
+        if not hits:
+            return None
+
+        best = hits[0]
+        result = f"(Não encontrado exatamente '{query}'; resultado mais relevante: '{best['title']}')\n\n"
+        result += self._clean_extract(best["text"])
+        if len(hits) > 1:
+            result += "\n\nOutros resultados:\n" + "\n".join(f"- {hit['title']}" for hit in hits[1:])
+        return result
+
+    def _try_search_api(self, query: str, deadline: Optional[float] = None) -> str:
+        """Usa a busca local (ou a API de busca) quando não encontra por título exato"""
+        local = self._search_local(query)
+        if local is not None:
+            return local
+        if self._get_offline() is not None:
+            return f"Nenhum resultado encontrado para '{query}'"
+        data = self._request_json(self._build_search_url(query), query, deadline)
+        if data is None:
+            return f"Falha ao buscar alternativas para '{query}'"
+        return self._format_search_results(query, data)
+
+    def _get_async_limiter(self) -> asyncio.Semaphore:
+        """Semáforo por loop de eventos que limita as requisições simultâneas de todas as instâncias"""
+        loop = asyncio.get_running_loop()
+        limiter = self._async_limiters.get(loop)
+        if limiter is None:
+            limiter = asyncio.Semaphore(self._MAX_CONCURRENT_REQUESTS)
+            self._async_limiters[loop] = limiter
+        return limiter
+
+    async def _amake_api_request(self, session: aiohttp.ClientSession, url: str, label: str,
+                                 deadline: Optional[float] = None) -> Optional[Dict]:
+        """Versão assíncrona de `_request_json` (não bloqueia a thread entre tentativas)"""
+        for attempt in range(self._MAX_RETRIES):
+            time_left = remaining(deadline)
+            if time_left is not None and time_left <= 0:
+                logger.warning(f"Prazo esgotado para '{label}' após {attempt} tentativa(s)")
+                break
+            # A reserva é uma transação SQLite que pode esperar outros processos: fora do loop
+            wait = await asyncio.to_thread(self._reserve_slot, label, deadline, "async")
+            if wait is None:
+                break
+            if wait:
+                await asyncio.sleep(wait)
+            throttled = False
+            
+            try:
+                time_left = remaining(deadline)
+                timeout = self._REQUEST_TIMEOUT if time_left is None else min(self._REQUEST_TIMEOUT, time_left)
+                async with self._get_async_limiter():
+                    WIKIPEDIA_ATTEMPTS.inc(mode="async")
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Tentativa {attempt + 1} falhou para '{label}': {str(e)}")
+                status = getattr(e, "status", None)
+                if status is not None and status not in RETRYABLE_STATUS:
+                    break  # Erro do cliente: repetir não muda o resultado
+                throttled = self._honor_retry_after(getattr(e, "headers", None), "async")
+            
+            if attempt < self._MAX_RETRIES - 1:
+                delay = 0.0 if throttled else backoff_delay(attempt)
+                time_left = remaining(deadline)
+                if time_left is not None and delay >= time_left:
+                    break
+                WIKIPEDIA_RETRIES.inc(mode="async")
+                await asyncio.sleep(delay)
+                
+        WIKIPEDIA_FAILURES.inc(mode="async")
+        return None
+
+    async def _asearch_wikipedia_batch(self, session: aiohttp.ClientSession, titles: List[str],
+                                       deadline: Optional[float] = None) -> Dict[str, Dict]:
+        """Versão assíncrona de `_search_wikipedia_batch`: os lotes são enviados em paralelo"""
+        offline = self._get_offline()
+        if offline is not None:
+            return self._resolve_offline(offline, titles)
+
+        resolved, to_fetch = self._split_known_missing(titles)
+        chunks = [to_fetch[start:start + self._BATCH_SIZE] for start in range(0, len(to_fetch), self._BATCH_SIZE)]
+        responses = await asyncio.gather(*(
+            self._amake_api_request(session, self._build_extracts_url(chunk), "|".join(chunk), deadline)
+            for chunk in chunks
+        ))
+
+        for chunk, data in zip(chunks, responses):
+            if data:
+                chunk_resolved = self._resolve_titles(data, chunk)
+                self._remember_missing(chunk_resolved)
+                resolved.update(chunk_resolved)
+        return resolved
+
+    async def _aprobe_strategy(self, session: aiohttp.ClientSession, query: str, group: List[str],
+                               deadline: Optional[float] = None) -> Optional[str]:
+        """Resolve um grupo de variações e devolve o primeiro resultado válido do grupo"""
+        try:
+            resolved = await self._asearch_wikipedia_batch(session, group, deadline)
+        except Exception as e:
+            logger.warning(f"Falha na estratégia {group}: {str(e)}")
+            return None
+
+        for variation in group:
+            entry = resolved.get(variation)
+            if entry and self._is_valid_result(entry["text"]):
+                return self._describe_resolution(query, entry) + entry["text"]
+        return None
+
+    async def _asearch_with_fallbacks(self, query: str, deadline: Optional[float] = None) -> str:
+        """
+        Executa as estratégias de fallback em paralelo: o primeiro resultado válido
+        vence e as sondagens restantes são canceladas.
+        """
+        # Termo direto como primeira estratégia, seguido dos títulos do índice ou, sem índice,
+        # das variações heurísticas limitadas ao mesmo número do caminho síncrono
+        groups = [[query]]
+        indexed = self._get_indexed_candidates(query)
+        if indexed is not None:
+            if indexed:
+                groups.append(indexed)
+        else:
+            budget = self._MAX_FALLBACKS
+            for group in self._get_search_strategies(query):
+                group = [variation for variation in group if variation != query][:budget]
+                budget -= len(group)
+                if group:
+                    groups.append(group)
+
+        async with aiohttp.ClientSession(headers={'User-Agent': self._USER_AGENT}) as session:
+            probes = [
+                asyncio.ensure_future(self._aprobe_strategy(session, query, group, deadline))
+                for group in groups
+            ]
+            try:
+                for next_done in asyncio.as_completed(probes):
+                    result = await next_done
+                    if result is not None:
+                        return result
+            finally:
+                for probe in probes:
+                    probe.cancel()
+                await asyncio.gather(*probes, return_exceptions=True)
+
+            # Como último recurso, tenta a API de busca
+            return await self._atry_search_api(session, query, deadline)
+
+    async def _atry_search_api(self, session: aiohttp.ClientSession, query: str,
+                               deadline: Optional[float] = None) -> str:
+        """Versão assíncrona de `_try_search_api`"""
+        local = self._search_local(query)
+        if local is not None:
+            return local
+        if self._get_offline() is not None:
             return f"Nenhum resultado encontrado para '{query}'"
-        except Exception:
+        data = await self._amake_api_request(session, self._build_search_url(query), query, deadline)
+        if data is None:
             return f"Falha ao buscar alternativas para '{query}'"
+        return self._format_search_results(query, data)
+
+    def _index_identity(self, path: str) -> str:
+        """Caminho e versão (tamanho e data) de um índice local: reconstruí-lo muda a identidade"""
+        path = os.path.abspath(os.path.expanduser(path))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return path
+        return f"{path}@{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _source_fingerprint(self) -> str:
+        """
+        Resumo da origem das respostas (backend offline e índices de títulos e de busca);
+        vazio no modo online sem índices, que mantém as chaves de sempre
+        """
+        sources = []
+        if self.backend == "offline":
+            sources.append(f"offline={self._index_identity(os.path.join(self.offline_index or '', 'index.bin'))}")
+        if self.title_index:
+            sources.append(f"titulos={self._index_identity(self.title_index)}")
+        if self.search_index:
+            sources.append(f"busca={self._index_identity(self.search_index)}")
+        if not sources:
+            return ""
+        return hashlib.sha256("|".join(sources).encode("utf-8")).hexdigest()[:16]
+
+    def _cache_key(self, clean_query: str) -> str:
+        """
+        Chave do cache de resultados: o modo pacote guarda um resultado diferente, e o
+        backend offline e os índices locais têm entradas próprias (um resultado offline
+        nunca é servido a uma execução online, nem o contrário)
+        """
+        key = clean_query
+        if self.bundle_pages > 0:
+            key = f"{key}|pacote:{self.bundle_pages}"
+        fingerprint = self._source_fingerprint()
+        if fingerprint:
+            key = f"{key}|fonte:{fingerprint}"
+        return key
+
+    def _is_cacheable(self, result: str) -> bool:
+        """
+        Falhas de conexão ou prazo esgotado não devem ficar no cache persistente (modo
+        padrão; no modo pacote vale o indicador `complete` do pacote)
+        """
+        return not result.startswith(("Erro ao conectar", "Falha ao buscar", "Erro durante"))
+
+    def _parse_query_input(self, query: Union[str, dict]) -> Optional[str]:
+        """Extrai e normaliza a consulta de uma string ou dict; None se o formato for inválido"""
+        # Handle both string and dict inputs
+        if isinstance(query, dict):
+            if 'query' in query:
+                return self._normalize_query(query['query'])
+            elif 'description' in query:
+                return self._normalize_query(query['description'])
+            return None
+        return self._normalize_query(query)
 
     def _run(self, query: Union[str, dict]) -> str:
         """Método principal que aceita múltiplos formatos de entrada"""
         try:
-            # Handle both string and dict inputs
-            if isinstance(query, dict):
-                if 'query' in query:
-                    clean_query = self._normalize_query(query['query'])
-                elif 'description' in query:
-                    clean_query = self._normalize_query(query['description'])
-                else:
-                    return "Formato de entrada inválido - deve conter 'query' ou 'description'"
-            else:
-                clean_query = self._normalize_query(query)
+            clean_query = self._parse_query_input(query)
+            if clean_query is None:
+                return "Formato de entrada inválido - deve conter 'query' ou 'description'"
                 
             # Verifica cache
-            if clean_query in self._cache:
-                return self._cache[clean_query]
+            cache = self._get_cache()
+            cache_key = self._cache_key(clean_query)
+            cached = cache.get(cache_key)
+            WIKIPEDIA_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
             
-            # Executa a pesquisa com fallbacks
-            result = self._search_with_fallbacks(clean_query)
+            # Executa a pesquisa com fallbacks dentro do prazo da consulta
+            deadline = make_deadline(self.lookup_timeout)
+            if self.bundle_pages > 0:
+                result, cacheable = self._search_bundle(clean_query, deadline)
+            else:
+                result = self._search_with_fallbacks(clean_query, deadline)
+                cacheable = self._is_cacheable(result)
             
             # Atualiza cache
-            if len(self._cache) >= self._MAX_CACHE_SIZE:
-                self._cache.pop(next(iter(self._cache)))
-            self._cache[clean_query] = result
+            if cacheable:
+                cache.set(cache_key, result)
             
             return result
             
+        except Exception as e:
+            logger.exception("Erro inesperado")
+            return f"Erro durante a pesquisa: {str(e)}"
+
+    async def _arun(self, query: Union[str, dict]) -> str:
+        """
+        Versão assíncrona de `_run`, para quem chama a ferramenta de dentro de um loop de
+        eventos: não ocupa uma thread enquanto os fallbacks são resolvidos. Os agentes do
+        CrewAI chamam sempre `_run` (numa thread), que usa a sessão HTTP compartilhada.
+        """
+        try:
+            clean_query = self._parse_query_input(query)
+            if clean_query is None:
+                return "Formato de entrada inválido - deve conter 'query' ou 'description'"
+
+            # O nível em disco é SQLite síncrono (pode esperar o lock): fica fora do loop
+            cache = self._get_cache()
+            cache_key = self._cache_key(clean_query)
+            cached = await asyncio.to_thread(cache.get, cache_key)
+            WIKIPEDIA_CACHE_LOOKUPS.inc(result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+            deadline = make_deadline(self.lookup_timeout)
+            if self.bundle_pages > 0:
+                # As requisições do pacote já saem em paralelo, numa thread separada
+                result, cacheable = await asyncio.to_thread(self._search_bundle, clean_query, deadline)
+            else:
+                result = await self._asearch_with_fallbacks(clean_query, deadline)
+                cacheable = self._is_cacheable(result)
+            if cacheable:
+                await asyncio.to_thread(cache.set, cache_key, result)
+            return result
+
         except Exception as e:
             logger.exception("Erro inesperado")
             return f"Erro durante a pesquisa: {str(e)}"
\ No newline at end of file